@@ -2,13 +2,17 @@ import sys
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, TextIO
 
 import typer
 from loguru import logger
 
 from pms import __version__
 from pms.core import MessageReader, Sensor, SensorReader, Supported, exit_on_fail
+from pms.core.capture import SUFFIX as CAPTURE_SUFFIX
+from pms.core.capture import CaptureWriter
+from pms.core.compression import CompressedWriter, is_compressed
+from pms.core.partition import NAME, PartitionWriter
 
 main = typer.Typer(
     add_completion=False,
@@ -36,6 +40,9 @@ def callback(
     interval: Annotated[
         int, typer.Option("--interval", "-i", min=0, help="seconds to wait between updates")
     ] = 60,
+    align: Annotated[
+        bool, typer.Option("--align", help="align updates to the interval on the wall clock")
+    ] = False,
     samples: Annotated[
         int | None, typer.Option("--samples", "-n", min=1, help="stop after N samples")
     ] = None,
@@ -43,6 +50,13 @@ def callback(
         bool,
         typer.Option("--debug", help="print DEBUG/logging messages"),
     ] = False,
+    replay: Annotated[
+        Path | None,
+        typer.Option(help="replay captured messages instead of reading the sensor"),
+    ] = None,
+    speed: Annotated[
+        float, typer.Option(min=0, help="replay at N times the recorded pace, 0 for no pacing")
+    ] = 1,
     version: Annotated[bool, typer.Option("--version", "-V", callback=version_callback)] = False,
 ):
     """Data acquisition and logging for Air Quality Sensors with UART interface"""
@@ -57,10 +71,12 @@ def callback(
     logger.debug(f"PyPMS v{__version__}")
     logger.debug(f"{ctx.command_path} -m {model} ... {ctx.invoked_subcommand}")
     obj = ctx.ensure_object(dict)
-    if ctx.invoked_subcommand in {"info", "serial"}:
-        obj.update(sensor=Sensor[model], port=port, interval=interval, samples=samples)
+    if ctx.invoked_subcommand in {"info", "serial", "decode"}:
+        obj.update(sensor=Sensor[model], port=port, interval=interval, samples=samples, align=align)
+    elif replay:
+        obj.update(reader=MessageReader(replay, Sensor[model], samples, speed=speed or None))
     else:
-        obj.update(reader=SensorReader(model, port, interval, samples))
+        obj.update(reader=SensorReader(model, port, interval, samples, align=align))
 
 
 @main.command()
@@ -93,11 +109,25 @@ def serial(
         Format | None, typer.Option("--format", "-f", help="formatted output")
     ] = None,
     decode: Annotated[Path | None, typer.Option(help="decode captured messages")] = None,
+    start: Annotated[
+        datetime | None, typer.Option(help="decode messages from this time on")
+    ] = None,
+    end: Annotated[datetime | None, typer.Option(help="decode messages before this time")] = None,
+    follow: Annotated[
+        bool, typer.Option("--follow", help="decode messages appended to the capture file")
+    ] = False,
 ):
     """Read sensor and print formatted measurements"""
     reader: SensorReader | MessageReader
     if decode:
-        reader = MessageReader(decode, ctx.obj["sensor"], ctx.obj["samples"])
+        reader = MessageReader(
+            decode,
+            ctx.obj["sensor"],
+            ctx.obj["samples"],
+            start=int(start.timestamp()) if start else None,
+            end=int(end.timestamp()) if end else None,
+            follow=follow,
+        )
     else:
         reader = SensorReader(**ctx.obj)
 
@@ -117,24 +147,111 @@ def serial(
                 typer.echo(str(obs))
 
 
+@main.command()
+def decode(
+    ctx: typer.Context,
+    path: Annotated[Path, typer.Argument(help="captured messages", show_default=False)],
+    format: Annotated[
+        Format | None, typer.Option("--format", "-f", help="formatted output")
+    ] = None,
+    workers: Annotated[
+        int | None,
+        typer.Option("--workers", "-w", min=1, help="decode on N processes [default: all cores]"),
+    ] = None,
+    start: Annotated[
+        datetime | None, typer.Option(help="decode messages from this time on")
+    ] = None,
+    end: Annotated[datetime | None, typer.Option(help="decode messages before this time")] = None,
+):
+    """Decode captured messages on many processes and print formatted measurements"""
+    if format == "hexdump":
+        raise typer.BadParameter("hexdump is not supported, use `pms serial --decode`")
+
+    from pms.core.parallel import ParallelMessageReader
+
+    reader = ParallelMessageReader(
+        path,
+        [ctx.obj["sensor"]],
+        ctx.obj["samples"],
+        start=int(start.timestamp()) if start else None,
+        end=int(end.timestamp()) if end else None,
+        workers=workers,
+    )
+    with reader:
+        print_header = format == "csv"
+        for _, obs in reader():
+            if not format:
+                typer.echo(str(obs))
+                continue
+            if print_header:
+                typer.echo(f"{obs:header}")
+                print_header = False
+            typer.echo(f"{obs:{format}}")
+
+
 @main.command()
 def csv(
     ctx: typer.Context,
     capture: Annotated[
-        bool, typer.Option("--capture", help="write raw messages instead of observations")
+        bool,
+        typer.Option(
+            "--capture",
+            help=f"write raw messages instead of observations, binary on {CAPTURE_SUFFIX} files",
+        ),
     ] = False,
     overwrite: Annotated[
         bool, typer.Option("--overwrite", help="overwrite file, if already exists")
     ] = False,
-    path: Annotated[Path, typer.Argument(help="csv formatted file", show_default=False)] = Path(),
+    partition: Annotated[
+        bool,
+        typer.Option(
+            "--partition",
+            help="capture to sensor=<name>/date=<YYYY-MM-DD>/ partitions under the PATH directory",
+        ),
+    ] = False,
+    path: Annotated[
+        Path, typer.Argument(help="csv formatted file, compressed on .gz/.xz", show_default=False)
+    ] = Path(),
 ):
     """Read sensor and save measurements to a CSV file"""
+    if partition:
+        if not capture:
+            raise typer.BadParameter("only raw messages can be partitioned, use --capture")
+        # PATH can be the partitions root, or root/name for partition files other than pypms.csv,
+        # a new root (without suffix) is created with the partitions
+        if path.is_dir() or not path.suffix:
+            root, name = path, NAME
+        else:
+            root, name = path.parent, path.name
+        with (
+            exit_on_fail(ctx.obj["reader"]) as reader,
+            PartitionWriter(root, name, overwrite) as cap,
+        ):
+            sensor_name = reader.sensor.name
+            logger.debug(f"capture {sensor_name} messages to partitions under {root}")
+            for raw in reader(raw=True):
+                cap.write(sensor_name, raw)
+        return
+
     if path.is_dir():  # pragma: no cover
         path /= f"{datetime.now():%F}_pypms.csv"
-    mode = "w" if overwrite else "a"
-    logger.debug(f"open {path} on '{mode}' mode")
+    if capture and path.suffix == CAPTURE_SUFFIX:
+        with exit_on_fail(ctx.obj["reader"]) as reader, CaptureWriter(path, overwrite) as cap:
+            sensor_name = reader.sensor.name
+            logger.debug(f"capture {sensor_name} messages to {path}")
+            for raw in reader(raw=True):
+                cap.write(sensor_name, raw)
+                cap.flush()  # so followers see complete records
+        return
+
+    if is_compressed(path):
+        file: CompressedWriter | TextIO = CompressedWriter(path, overwrite)
+    else:
+        logger.debug(f"open {path} on '{'w' if overwrite else 'a'}' mode")
+        # line buffered, so followers see complete lines
+        file = path.open("w", buffering=1) if overwrite else path.open("a", buffering=1)
 
-    with exit_on_fail(ctx.obj["reader"]) as reader, path.open(mode) as csv:
+    with exit_on_fail(ctx.obj["reader"]) as reader, file as csv:
         sensor_name = reader.sensor.name
         if not capture:
             logger.debug(f"capture {sensor_name} observations to {path}")
@@ -152,3 +269,47 @@ def csv(
                 csv.write("time,sensor,hex\n")
             for raw in reader(raw=True):
                 csv.write(f"{raw.time},{sensor_name},{raw.hex}\n")
+
+
+captures = typer.Typer(no_args_is_help=True, help="Manage capture files")
+main.add_typer(captures, name="captures")
+
+
+@captures.command()
+def merge(
+    paths: Annotated[list[Path], typer.Argument(help="captures to merge", show_default=False)],
+    output: Annotated[
+        Path,
+        typer.Option(
+            "--output",
+            "-o",
+            help=f"merged capture, binary on {CAPTURE_SUFFIX} files, compressed on .gz/.xz",
+            show_default=False,
+        ),
+    ],
+    overwrite: Annotated[
+        bool, typer.Option("--overwrite", help="overwrite output, if already exists")
+    ] = False,
+):
+    """Merge captures sorted by time and sensor, dropping duplicated messages"""
+    if output.exists() and not overwrite:
+        raise typer.BadParameter(f"{output} already exists, use --overwrite", param_hint="output")
+    if output.resolve() in {path.resolve() for path in paths}:
+        raise typer.BadParameter(f"{output} is also a capture to merge", param_hint="output")
+
+    from pms.core.merge import merge
+
+    if output.suffix == CAPTURE_SUFFIX:
+        with CaptureWriter(output, overwrite=True) as cap:
+            for sensor_name, raw in merge(paths):
+                cap.write(sensor_name, raw)
+        return
+
+    if is_compressed(output):
+        file: CompressedWriter | TextIO = CompressedWriter(output, overwrite=True)
+    else:
+        file = output.open("w")
+    with file as csv:
+        csv.write("time,sensor,hex\n")
+        for sensor_name, raw in merge(paths):
+            csv.write(f"{raw.time},{sensor_name},{raw.hex}\n")
@@ -1,4 +1,45 @@
+from typing import TYPE_CHECKING
+
 from .sensor import Sensor, Supported  # isort: skip
-from .reader import MessageReader, SensorReader, UnableToRead, exit_on_fail
+from .framer import Framer  # isort: skip
+from .reader import (
+    ActiveSensorReader,
+    MessageReader,
+    MultiMessageReader,
+    MultiSensorReader,
+    SensorReader,
+    UnableToRead,
+    exit_on_fail,
+)
+
+if TYPE_CHECKING:
+    from .async_reader import AsyncSensorReader
+    from .parallel import ParallelMessageReader
+
+__all__ = [
+    "Sensor",
+    "Supported",
+    "Framer",
+    "ActiveSensorReader",
+    "AsyncSensorReader",
+    "MessageReader",
+    "MultiMessageReader",
+    "MultiSensorReader",
+    "ParallelMessageReader",
+    "SensorReader",
+    "UnableToRead",
+    "exit_on_fail",
+]
+
+
+def __getattr__(name: str):
+    """Import asyncio/multiprocessing based readers on first use, off the CLI start up"""
+    if name == "AsyncSensorReader":
+        from .async_reader import AsyncSensorReader
+
+        return AsyncSensorReader
+    if name == "ParallelMessageReader":
+        from .parallel import ParallelMessageReader
 
-__all__ = ["Sensor", "Supported", "MessageReader", "SensorReader", "UnableToRead", "exit_on_fail"]
+        return ParallelMessageReader
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
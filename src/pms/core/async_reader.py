@@ -0,0 +1,174 @@
+"""
+Read PM sensors from an asyncio event loop
+
+NOTE:
+- Sensors are read on passive mode.
+- The serial port is read without blocking, so one event loop can read many sensors.
+- Only on POSIX systems, where the serial port has a file descriptor.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Literal, overload
+
+from loguru import logger
+
+from pms import SensorNotReady, SensorWarning
+from pms.core.reader import RawData, SerialSensor
+from pms.core.schedule import Schedule
+from pms.core.sensor import Sensor, Supported
+from pms.core.types import ObsData
+
+
+class AsyncSensorReader(SerialSensor):
+    """
+    Read sensor messages from serial port, asyncio version of `SensorReader`
+
+    The sensor is woken up after opening the serial port,
+    and put to sleep when before closing the port.
+    While the serial port is open, the sensor is read in passive mode.
+
+    >>> async with AsyncSensorReader("PMSx003", "/dev/ttyUSB0", interval=60) as reader:
+    ...     async for obs in reader():
+    ...         print(obs)
+    """
+
+    def __init__(
+        self,
+        sensor: Sensor | Supported | str = Supported.default,
+        port: str = "/dev/ttyUSB0",
+        interval: int | None = None,
+        samples: int | None = None,
+        timeout: float | None = None,
+        max_retries: int | None = None,
+        align: bool = False,
+    ) -> None:
+        """Configure serial port"""
+        super().__init__(sensor, port, interval, samples, timeout, max_retries, align)
+        self.serial.timeout = 0  # non-blocking reads
+
+    async def _readable(self, timeout: float) -> bool:
+        """Wait until there is data to read from the serial port, False on timeout"""
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+
+        def callback() -> None:
+            if not readable.done():
+                readable.set_result(None)
+
+        fd = self.serial.fileno()
+        loop.add_reader(fd, callback)
+        try:
+            await asyncio.wait_for(readable, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(fd)
+        return True
+
+    async def _read(self, header: bytes, length: int) -> bytes:
+        """
+        Read until a complete message arrives
+
+        Stop early if the sensor goes silent for more than `inter_byte_timeout`,
+        e.g. after a short error message, so a wrong answer does not wait for the full timeout.
+        """
+        buffer = self.serial.read(self.serial.in_waiting)
+        if not length:
+            return buffer
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while not (len(buffer) >= length and self.sensor.Message.frame(buffer, header, length)):
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            if buffer:
+                timeout = min(timeout, self.inter_byte_timeout)
+            if not await self._readable(timeout):
+                break
+            buffer += self.serial.read(self.serial.in_waiting)
+        return buffer
+
+    async def _cmd(self, command: str) -> bytes:
+        """Write command to sensor and return answer"""
+
+        # send command
+        cmd = self.sensor.command(command)
+        if cmd.command:
+            self.serial.write(cmd.command)
+        elif command.endswith("read"):  # pragma: no cover
+            self.serial.reset_input_buffer()
+
+        # return full buffer
+        return await self._read(cmd.answer_header, cmd.answer_length)
+
+    async def open(self) -> None:
+        """Open serial port and sensor setup"""
+        self._open_port()
+
+        # wake sensor and set passive mode
+        logger.debug(f"wake {self.sensor}")
+        buffer = await self._cmd("wake")
+        buffer += await self._cmd(self.mode)
+        self._pre_heat()
+        self._validate(buffer)
+
+    async def close(self) -> None:
+        """Put sensor to sleep and close serial port"""
+        logger.debug(f"sleep {self.sensor}")
+        await self._cmd("sleep")
+        logger.debug(f"close {self.serial.port}")
+        self.serial.close()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback) -> None:
+        await self.close()
+
+    @overload
+    def __call__(self, *, raw: Literal[False, None] = None) -> AsyncIterator[ObsData]:
+        """Observations from passive mode reading at regular intervals"""
+
+    @overload
+    def __call__(self, *, raw: Literal[True]) -> AsyncIterator[RawData]:
+        """Raw observations from passive mode reading at regular intervals"""
+
+    async def __call__(self, *, raw: bool | None = None) -> AsyncIterator[RawData | ObsData]:
+        """(raw) Observations passive mode reading at regular intervals"""
+
+        sample = 0
+        failures = 0
+        schedule = self.schedule = Schedule(self.interval, self.align, self.ready)
+        while self.serial.is_open:
+            delay = schedule.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            buffer = await self._cmd("passive_read")
+            logger.opt(lazy=True).debug("message hex: {}", lambda: buffer.hex())
+
+            try:
+                obs = self.sensor.decode(buffer)
+            except SensorNotReady as e:
+                failures += 1
+                if self.max_retries is not None and failures > self.max_retries:
+                    raise
+                logger.debug(e)
+                await asyncio.sleep(5)
+            except SensorWarning as e:
+                failures += 1
+                if self.max_retries is not None and failures > self.max_retries:
+                    raise
+                logger.debug(e)
+                self.serial.reset_input_buffer()
+            else:
+                yield RawData(obs.time, buffer) if raw else obs
+                sample += 1
+                if self.samples is not None and sample >= self.samples:
+                    break
+                schedule.advance()
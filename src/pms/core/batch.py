@@ -0,0 +1,49 @@
+"""
+Decode many sensor messages at once into NumPy structured arrays
+
+NOTE:
+- requires the optional numpy dependency
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from dataclasses import fields
+from functools import cache
+
+import numpy as np
+
+from pms.core.types import Cmd, Message, ObsData
+
+"""struct format characters as numpy type codes"""
+STRUCT_TYPES = dict(b="i1", B="u1", h="i2", H="u2", i="i4", I="u4", l="i4", L="u4", f="f4")
+
+
+@cache
+def struct_dtype(format: str) -> np.dtype:
+    """numpy dtype equivalent to a struct format, e.g. ">hHHBHLh" """
+    order, format = format[0], format[1:]
+    assert order in "<>", f"unsupported byte order {order!r}"
+    dtype: list[tuple[str, str]] = []
+    for count, code in re.findall(r"(\d*)([a-zA-Z])", format):
+        for _ in range(int(count or 1)):
+            dtype.append((f"f{len(dtype)}", f"{order}{STRUCT_TYPES[code]}"))
+    return np.dtype(dtype)
+
+
+def obs_dtype(data: ObsData) -> np.dtype:
+    """numpy dtype with one field per ObsData dataclass field"""
+    return np.dtype([(f.name, "i8" if f.type in {int, "int"} else "f8") for f in fields(data)])
+
+
+def frames(message: Message, buffers: Iterable[bytes | memoryview], command: Cmd) -> np.ndarray:
+    """Last complete message from each buffer as rows of a 2D array of bytes"""
+    header, length = command.answer_header, command.answer_length
+    empty = bytes(length)
+    rows = []
+    for buffer in buffers:
+        if len(buffer) != length:
+            buffer = message.frame(bytes(buffer), header, length) or empty
+        rows.append(buffer)
+    return np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(-1, length)
@@ -0,0 +1,230 @@
+"""
+Binary capture files for raw sensor messages
+
+NOTE:
+- A capture file starts with MAGIC, followed by one record per message:
+  a fixed size RECORD header (time, sensor name, message length) and the message itself.
+- The sidecar index (capture path + ".idx") holds (sensor name, time, record offset) entries,
+  for the first record of each sensor on every BLOCK_SIZE bytes of the capture file.
+- Records are expected in time order, as they are written while reading the sensor.
+- A missing index is rebuilt on read.
+- A torn record at the end of the capture, left by an interrupted write,
+  is truncated before appending, together with the index entries after it.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from bisect import bisect_left
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from pms.core.reader import RawData
+
+MAGIC = b"PMSCAP\x00\x01"
+
+"""file extension for binary capture files"""
+SUFFIX = ".pmscap"
+
+"""record header: time, sensor name, message length"""
+RECORD = struct.Struct("<q16sH")
+
+"""index entry: sensor name, time, record offset"""
+INDEX = struct.Struct("<16sqQ")
+
+"""bytes of capture file between index entries of the same sensor"""
+BLOCK_SIZE = 1 << 16
+
+
+class Record(NamedTuple):
+    """capture record with offset on the capture file"""
+
+    offset: int
+    sensor: str
+    time: int
+    data: bytes | memoryview
+
+
+def is_capture(path: Path) -> bool:
+    """True if path is a binary capture file"""
+    if not path.is_file():
+        return False
+    with path.open("rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def index_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.idx")
+
+
+class CaptureWriter:
+    """
+    Append raw messages to a binary capture file, and keep its index up to date
+
+    >>> with CaptureWriter(Path("pypms.pmscap")) as capture:
+    ...     for raw in reader(raw=True):
+    ...         capture.write(reader.sensor.name, raw)
+    """
+
+    def __init__(self, path: Path, overwrite: bool = False) -> None:
+        self.path = path
+        self.overwrite = overwrite
+        self.block: dict[str, int] = {}  # last indexed block for each sensor
+
+    def open(self) -> None:
+        logger.debug(f"open {self.path} on '{'wb' if self.overwrite else 'ab'}' mode")
+        if not self.overwrite and self.path.exists() and self.path.stat().st_size > 0:
+            if not is_capture(self.path):
+                raise ValueError(f"{self.path} is not a capture file")
+            self._truncate()
+        self.file: BinaryIO = self.path.open("wb") if self.overwrite else self.path.open("ab")
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+            index_path(self.path).unlink(missing_ok=True)
+        elif not index_path(self.path).exists():
+            Index.build(self.path)
+        self.index: BinaryIO = index_path(self.path).open("ab")
+        self.block.clear()
+
+    def _truncate(self) -> None:
+        """Drop a torn record at the end of the capture, and the index entries after it"""
+        idx = index_path(self.path)
+        index = idx.read_bytes() if idx.exists() else b""
+        index = index[: len(index) - len(index) % INDEX.size]  # torn index entry
+        size = self.path.stat().st_size
+
+        # only the records after the last indexed one need to be checked,
+        # unless the last indexed record is the torn one
+        offsets = sorted({offset for _, _, offset in INDEX.iter_unpack(index) if offset < size})
+        with self.path.open("rb") as file:
+            for end in reversed([len(MAGIC)] + offsets):
+                start = end
+                try:
+                    for record in records(file, start):
+                        end = record.offset + RECORD.size + len(record.data)
+                except UnicodeDecodeError:  # not a record header
+                    pass
+                if end > start or start == len(MAGIC):
+                    break
+
+        if end < size:
+            logger.warning(f"truncate {size - end} bytes of torn record at the end of {self.path}")
+            os.truncate(self.path, end)
+        entries = b"".join(
+            INDEX.pack(*entry) for entry in INDEX.iter_unpack(index) if entry[2] < end
+        )
+        if idx.exists() and len(entries) < idx.stat().st_size:
+            idx.write_bytes(entries)
+
+    def close(self) -> None:
+        logger.debug(f"close {self.path}")
+        self.file.close()
+        self.index.close()
+
+    def __enter__(self) -> CaptureWriter:
+        self.open()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.close()
+
+    def write(self, sensor: str, raw: RawData) -> None:
+        """Append one message"""
+        offset = self.file.tell()
+        name = sensor.encode()
+        self.file.write(RECORD.pack(raw.time, name, len(raw.data)))
+        self.file.write(raw.data)
+        block = offset // BLOCK_SIZE
+        if self.block.get(sensor) != block:
+            self.block[sensor] = block
+            self.index.write(INDEX.pack(name, raw.time, offset))
+
+    def flush(self) -> None:
+        """Flush record and index, so concurrent readers see complete records"""
+        self.file.flush()
+        self.index.flush()
+
+
+def records(file: BinaryIO, start: int = len(MAGIC), stop: int | None = None) -> Iterator[Record]:
+    """Records on capture file between the `start` and `stop` offsets"""
+    file.seek(start)
+    offset = start
+    while stop is None or offset < stop:
+        header = file.read(RECORD.size)
+        if len(header) < RECORD.size:  # end of file or partial record
+            return
+        time, name, length = RECORD.unpack(header)
+        data = file.read(length)
+        if len(data) < length:
+            return
+        yield Record(offset, name.rstrip(b"\0").decode(), time, data)
+        offset += RECORD.size + length
+
+
+def mapped_records(
+    buffer: memoryview, start: int = len(MAGIC), stop: int | None = None
+) -> Iterator[Record]:
+    """
+    Records on a memory mapped capture file between the `start` and `stop` offsets
+
+    The record data is a memoryview into the mapping, no message is copied.
+    """
+    size = len(buffer)
+    stop = size if stop is None else min(stop, size)
+    offset = start
+    while offset < stop and offset + RECORD.size <= size:
+        time, name, length = RECORD.unpack_from(buffer, offset)
+        end = offset + RECORD.size + length
+        if end > size:  # partial record
+            return
+        yield Record(offset, name.rstrip(b"\0").decode(), time, buffer[offset + RECORD.size : end])
+        offset = end
+
+
+class Index:
+    """Time and offset of indexed records, for each sensor on a capture file"""
+
+    def __init__(self, entries: dict[str, tuple[list[int], list[int]]]) -> None:
+        self.entries = entries
+
+    @classmethod
+    def load(cls, path: Path) -> Index:
+        """Read the sidecar index, rebuild it if missing"""
+        idx = index_path(path)
+        if not idx.exists():
+            cls.build(path)
+
+        entries: dict[str, tuple[list[int], list[int]]] = {}
+        for name, time, offset in INDEX.iter_unpack(idx.read_bytes()):
+            times, offsets = entries.setdefault(name.rstrip(b"\0").decode(), ([], []))
+            times.append(time)
+            offsets.append(offset)
+        return cls(entries)
+
+    @staticmethod
+    def build(path: Path) -> None:
+        """Write the sidecar index from the records on the capture file"""
+        logger.debug(f"index {path}")
+        block: dict[str, int] = {}
+        with path.open("rb") as file, index_path(path).open("wb") as index:
+            for record in records(file):
+                if block.get(record.sensor) != (n := record.offset // BLOCK_SIZE):
+                    block[record.sensor] = n
+                    entry = INDEX.pack(record.sensor.encode(), record.time, record.offset)
+                    index.write(entry)
+
+    def span(self, sensor: str, start: int | None, end: int | None) -> tuple[int, int | None]:
+        """Offsets to read for sensor records on the [start, end) time range"""
+        if sensor not in self.entries:
+            return 0, 0
+        times, offsets = self.entries[sensor]
+        first = 0 if start is None else max(bisect_left(times, start) - 1, 0)
+        last = len(times) if end is None else bisect_left(times, end)
+        if first >= last:
+            return 0, 0
+        return offsets[first], (offsets[last] if last < len(offsets) else None)
@@ -0,0 +1,113 @@
+"""
+Compressed CSV files
+
+NOTE:
+- Files ending on .gz or .xz are compressed with gzip or lzma (xz) from the standard library.
+- Lines are compressed on blocks, each block is a complete gzip member/xz stream
+  appended to the file, so it can be decompressed even if the writer is killed
+  and only the last (unwritten) block is lost.
+- Blocks are written every BLOCK_LINES lines or BLOCK_TIME seconds,
+  which also keeps the number of writes low on flash storage.
+- Concatenated gzip members/xz streams are decompressed as a single file.
+"""
+
+from __future__ import annotations
+
+import gzip
+import lzma
+import time
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+from loguru import logger
+
+"""compression modules, by file extension"""
+COMPRESSION = {".gz": gzip, ".xz": lzma}
+
+"""lines on each compressed block"""
+BLOCK_LINES = 1000
+
+"""seconds before a compressed block is written, regardless of its lines"""
+BLOCK_TIME = 300
+
+
+def is_compressed(path: Path) -> bool:
+    """True if path has a compressed file extension"""
+    return path.suffix in COMPRESSION
+
+
+def open_text(path: Path) -> TextIO:
+    """Open a text file for reading, decompressing .gz and .xz files on the fly"""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt")
+    if path.suffix == ".xz":
+        return lzma.open(path, "rt")
+    return path.open()
+
+
+def open_binary(path: Path) -> BinaryIO:
+    """Open a file for reading bytes, decompressing .gz and .xz files on the fly"""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    if path.suffix == ".xz":
+        return lzma.open(path, "rb")  # type: ignore[return-value]
+    return path.open("rb")
+
+
+class CompressedWriter:
+    """
+    Append lines to a compressed file, one compressed block at the time
+
+    >>> with CompressedWriter(Path("pypms.csv.gz")) as csv:
+    ...     for raw in reader(raw=True):
+    ...         csv.write(f"{raw.time},{reader.sensor.name},{raw.hex}\\n")
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        overwrite: bool = False,
+        block_lines: int = BLOCK_LINES,
+        block_time: float = BLOCK_TIME,
+    ) -> None:
+        self.path = path
+        self.overwrite = overwrite
+        self.block_lines = block_lines
+        self.block_time = block_time
+        self.compress = COMPRESSION[path.suffix].compress
+        self.lines: list[str] = []
+        self.since = 0.0  # time of the first line on the block
+
+    def open(self) -> None:
+        logger.debug(f"open {self.path} on '{'wb' if self.overwrite else 'ab'}' mode")
+        self.file: BinaryIO = self.path.open("wb") if self.overwrite else self.path.open("ab")
+        self.lines.clear()
+
+    def close(self) -> None:
+        logger.debug(f"close {self.path}")
+        self.flush()
+        self.file.close()
+
+    def __enter__(self) -> CompressedWriter:
+        self.open()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.close()
+
+    def write(self, line: str) -> None:
+        """Add one line to the block, write the block when full or old enough"""
+        if not self.lines:
+            self.since = time.monotonic()
+        self.lines.append(line)
+        if len(self.lines) >= self.block_lines or time.monotonic() - self.since >= self.block_time:
+            self.flush()
+
+    def flush(self) -> None:
+        """Compress and write the lines on the block"""
+        if not self.lines:
+            return
+        self.file.write(self.compress("".join(self.lines).encode()))
+        self.file.flush()
+        logger.debug(f"wrote {len(self.lines)} lines to {self.path}")
+        self.lines.clear()
@@ -0,0 +1,76 @@
+"""
+Extract sensor messages from a serial byte stream
+
+NOTE:
+- Bytes are kept on a reusable buffer until a complete message arrives.
+- Messages are searched by the expected answer header and length,
+  on a failed validation the search resumes on the byte after the (false) header.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+from pms.core.sensor import Sensor, Supported
+
+
+class Framer:
+    """
+    Incremental framer for sensor messages
+
+    Accepts arbitrary chunks from the serial stream, keeps partial messages across chunks
+    and yields every valid message, e.g.
+
+    >>> framer = Framer("PMSx003")
+    >>> for message in framer.feed(serial.read(serial.in_waiting)):
+    ...     obs = framer.sensor.decode(message)
+    """
+
+    def __init__(
+        self, sensor: Sensor | Supported | str = Supported.default, command: str = "passive_read"
+    ) -> None:
+        self.sensor = sensor if isinstance(sensor, Sensor) else Sensor[sensor]
+        self.command = command
+        cmd = self.sensor.command(command)
+        self.header = cmd.answer_header
+        self.length = cmd.answer_length
+        self.buffer = bytearray()
+        self._synced = False  # buffer starts with header
+
+    def __len__(self) -> int:
+        """bytes waiting for a complete message"""
+        return len(self.buffer)
+
+    def reset(self) -> None:
+        """Discard partial messages"""
+        self.buffer.clear()
+        self._synced = False
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        """Add chunk to the buffer and return the complete messages"""
+        self.buffer += chunk
+        return self._messages()
+
+    def _messages(self) -> Iterator[bytes]:
+        while self.buffer:
+            if not self._synced:
+                start = self.buffer.find(self.header)
+                if start < 0:
+                    # keep what could be the start of a header
+                    del self.buffer[: max(len(self.buffer) - len(self.header) + 1, 0)]
+                    return
+                del self.buffer[:start]
+                self._synced = True
+
+            length = self.sensor.Message.frame_length(self.buffer, self.length)
+            if not length:  # wait for the rest of the message
+                return
+
+            message = bytes(self.buffer[:length])
+            if self.sensor.check(message, self.command):
+                del self.buffer[:length]
+                self._synced = False
+                yield message
+            else:  # false header, search again from the next byte
+                del self.buffer[:1]
+                self._synced = False
@@ -0,0 +1,101 @@
+"""
+Merge capture files
+
+NOTE:
+- Messages from all captures are sorted by (time, sensor) with an external merge sort:
+  captures are read on runs of RUN_SIZE messages, each run is sorted and spilled
+  to a temporary binary capture, and the runs are merged with `heapq.merge`.
+  Only one run is kept in memory, so captures can be larger than the available memory.
+- At most FAN_IN runs are merged at once, to keep the number of open files bounded.
+- Messages with the same (time, sensor) are kept only once, the first one read wins.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack
+from operator import itemgetter
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import NamedTuple
+
+from loguru import logger
+
+from pms.core.capture import MAGIC, RECORD, records
+from pms.core.reader import MultiMessageReader, RawData
+
+"""messages sorted in memory at the time"""
+RUN_SIZE = 100_000
+
+"""runs merged at the time"""
+FAN_IN = 64
+
+
+class Message(NamedTuple):
+    time: int
+    sensor: str
+    data: bytes
+
+
+"""sort key"""
+KEY = itemgetter(0, 1)
+
+
+def _spill(messages: Iterable[Message], path: Path) -> Path:
+    """Write sorted messages to a temporary capture, without index"""
+    with path.open("wb") as file:
+        file.write(MAGIC)
+        for message in messages:
+            file.write(RECORD.pack(message.time, message.sensor.encode(), len(message.data)))
+            file.write(message.data)
+    return path
+
+
+def _replay(path: Path, stack: ExitStack) -> Iterator[Message]:
+    """Messages from a temporary capture, the file is closed with the stack"""
+    file = stack.enter_context(path.open("rb"))
+    return (Message(record.time, record.sensor, bytes(record.data)) for record in records(file))
+
+
+def _merge(runs: list[Path], path: Path) -> Path:
+    """Merge sorted runs into a single sorted run"""
+    with ExitStack() as stack:
+        _spill(heapq.merge(*(_replay(run, stack) for run in runs), key=KEY), path)
+    for run in runs:
+        run.unlink()
+    return path
+
+
+def merge(
+    paths: Iterable[Path], run_size: int = RUN_SIZE, fan_in: int = FAN_IN
+) -> Iterator[tuple[str, RawData]]:
+    """(sensor name, raw message) from all captures, sorted by (time, sensor) without duplicates"""
+    with TemporaryDirectory(prefix="pypms-") as tmp:
+        runs: list[Path] = []
+        run: list[Message] = []
+        for path in paths:
+            logger.debug(f"read {path}")
+            with MultiMessageReader(path) as reader:
+                for sensor, raw in reader(raw=True):
+                    run.append(Message(raw.time, sensor.name, bytes(raw.data)))
+                    if len(run) >= run_size:
+                        runs.append(_spill(sorted(run, key=KEY), Path(tmp, f"{len(runs)}")))
+                        run.clear()
+        run.sort(key=KEY)
+
+        # merge the oldest runs until there are few enough to merge at once,
+        # runs are kept on read order, as ties are resolved by run order
+        while len(runs) >= fan_in:
+            runs = [_merge(runs[:fan_in], Path(tmp, f"{len(runs)}.merged")), *runs[fan_in:]]
+
+        with ExitStack() as stack:
+            messages = heapq.merge(*(_replay(r, stack) for r in runs), iter(run), key=KEY)
+            last, duplicates = None, 0
+            for message in messages:
+                if KEY(message) == last:
+                    duplicates += 1
+                    continue
+                last = KEY(message)
+                yield message.sensor, RawData(message.time, message.data)
+        logger.debug(f"dropped {duplicates} duplicated messages")
@@ -0,0 +1,200 @@
+"""
+Decode large capture files on many processes
+
+NOTE:
+- Capture files are split into chunks at line (CSV) or record (binary) boundaries,
+  binary captures are split on the offsets from their index.
+- Compressed CSV captures can not be split on byte offsets, and are decoded as a single chunk.
+- Chunks are decoded on a process pool and the observations are yielded on capture order,
+  which is time order as captures are written while reading the sensors.
+- Only a few chunks per worker are decoded ahead, to keep memory use bounded.
+- Partitioned captures (`pms.core.partition`) are decoded one partition file after the other,
+  on date order, so observations from a single sensor are yielded on time order.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from loguru import logger
+
+from pms.core.capture import Index, is_capture, records
+from pms.core.compression import is_compressed, open_binary
+from pms.core.partition import partitions
+from pms.core.sensor import Sensor
+from pms.core.types import ObsData
+
+"""approximate chunk size in bytes"""
+CHUNK_SIZE = 1 << 20
+
+
+def _csv_chunk(path: Path, start: int, stop: int) -> Iterator[tuple[str, int, bytes]]:
+    """(sensor, time, message) from the lines starting between the start and stop offsets"""
+    with open_binary(path) as file:
+        if start > 0:  # move to the start of the next line
+            file.seek(start - 1)
+            file.readline()
+        offset = file.tell()
+        for line in file:
+            if offset >= stop:
+                break
+            offset += len(line)
+            if not line.strip():
+                continue
+            time, sensor, hex = line.split(b",")
+            if time == b"time":  # header
+                continue
+            yield sensor.decode(), int(time), bytes.fromhex(hex.decode())
+
+
+def _capture_chunk(path: Path, start: int, stop: int) -> Iterator[tuple[str, int, bytes]]:
+    """(sensor, time, message) from the records between the start and stop offsets"""
+    with path.open("rb") as file:
+        for record in records(file, start, stop):
+            yield record.sensor, record.time, bytes(record.data)
+
+
+def decode_chunk(
+    path: Path,
+    start: int,
+    stop: int,
+    sensors: tuple[str, ...],
+    time_range: tuple[int | None, int | None],
+) -> list[tuple[str, ObsData]]:
+    """
+    Decode the messages from the selected sensors and time range on a chunk of the capture
+
+    Returns the sensor name with each observation, as Sensor members can not be pickled.
+    """
+    chunk = _capture_chunk if is_capture(path) else _csv_chunk
+    begin, end = time_range
+    selected = {name: Sensor[name] for name in sensors}
+    obs: list[tuple[str, ObsData]] = []
+    for name, time, message in chunk(path, start, stop):
+        sensor = selected.get(name)
+        if sensor is None:
+            continue
+        if (begin is not None and time < begin) or (end is not None and time >= end):
+            continue
+        obs.append((name, sensor.decode(message, time=time)))
+    return obs
+
+
+class ParallelMessageReader:
+    """
+    Replay messages from many sensors, decoding chunks of the capture file on many processes
+
+    Yields `(sensor, obs)` tuples on capture order, as `MultiMessageReader`.
+    If `path` is a directory, every partition with the selected sensors and time range
+    is split into chunks.
+
+    >>> with ParallelMessageReader(Path("captured_data.csv"), workers=8) as reader:
+    ...     for sensor, obs in reader():
+    ...         print(sensor, obs)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        sensors: Iterable[Sensor] | None = None,
+        samples: int | None = None,
+        start: int | None = None,
+        end: int | None = None,
+        workers: int | None = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        self.path = path
+        self.sensors = tuple(Sensor if sensors is None else sensors)
+        self.samples = samples
+        self.start = start
+        self.end = end
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._pool: ProcessPoolExecutor | None = None
+
+    def open(self) -> None:
+        logger.debug(f"open {self.path} with {self.workers or 'all'} workers")
+        self._pool = ProcessPoolExecutor(self.workers)
+
+    def close(self) -> None:
+        logger.debug(f"close {self.path}")
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> ParallelMessageReader:
+        self.open()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.close()
+
+    def files(self) -> list[Path]:
+        """Capture files to decode, the partitions on date order if `path` is a directory"""
+        if not self.path.is_dir():
+            return [self.path]
+        names = (sensor.name for sensor in self.sensors)
+        return partitions(self.path, names, self.start, self.end)
+
+    def chunks(self, path: Path | None = None) -> list[tuple[int, int]]:
+        """Start and stop offsets of each chunk of a capture file, `path` by default"""
+        if path is None:
+            path = self.path
+        size = path.stat().st_size
+        if is_compressed(path):  # offsets on the decompressed file are unknown
+            return [(0, sys.maxsize)]
+        if not is_capture(path):
+            return [
+                (start, min(start + self.chunk_size, size))
+                for start in range(0, size, self.chunk_size)
+            ]
+
+        # only the spans with records from the selected sensors and time range
+        index = Index.load(path)
+        spans = [index.span(sensor.name, self.start, self.end) for sensor in self.sensors]
+        spans = [(start, stop) for start, stop in spans if start != stop]
+        if not spans:
+            return []
+        first = min(start for start, _ in spans)
+        stops = [stop for _, stop in spans if stop is not None]
+        last = max(stops) if len(stops) == len(spans) else size
+
+        # split on indexed records, which are always at a record boundary
+        indexed = {offset for _, offsets in index.entries.values() for offset in offsets}
+        starts: list[int] = []
+        for offset in sorted(offset for offset in indexed if first <= offset < last):
+            if not starts or offset - starts[-1] >= self.chunk_size:
+                starts.append(offset)
+        return list(zip(starts, starts[1:] + [last]))
+
+    def __call__(self) -> Iterator[tuple[Sensor, ObsData]]:
+        """Decoded observations, with the sensor which captured them"""
+        if self._pool is None:
+            return
+
+        names = tuple(sensor.name for sensor in self.sensors)
+        time_range = self.start, self.end
+        pending: deque[Future[list[tuple[str, ObsData]]]] = deque()
+        chunks = ((path, start, stop) for path in self.files() for start, stop in self.chunks(path))
+        ahead = 2 * (self.workers or os.cpu_count() or 1)
+        sample = 0
+        while True:
+            # keep a few chunks per worker in flight
+            for path, start, stop in chunks:
+                pending.append(
+                    self._pool.submit(decode_chunk, path, start, stop, names, time_range)
+                )
+                if len(pending) >= ahead:
+                    break
+            if not pending:
+                return
+            for name, obs in pending.popleft().result():
+                yield Sensor[name], obs
+                sample += 1
+                if self.samples and sample >= self.samples:
+                    return
@@ -0,0 +1,151 @@
+"""
+Partitioned capture files
+
+NOTE:
+- Messages are captured on one file per sensor and day,
+  under a `sensor=<name>/date=<YYYY-MM-DD>/` directory tree.
+- Days are on UTC, so partitions do not depend on the local time zone.
+- Partition files can be CSV, compressed CSV (.gz/.xz) or binary captures (.pmscap),
+  all partitions under a tree are expected to be on the same format.
+- Plain CSV and binary partitions are flushed after each message,
+  compressed partitions are written on blocks.
+- Readers select the partitions for the requested sensors and time range by their path,
+  without opening the other partitions.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol, TextIO
+
+from loguru import logger
+
+from pms.core.capture import SUFFIX, CaptureWriter
+from pms.core.compression import CompressedWriter, is_compressed
+
+if TYPE_CHECKING:
+    from pms.core.reader import RawData
+
+"""partition file name, unless given"""
+NAME = "pypms.csv"
+
+
+def day(time: int) -> date:
+    """UTC day of a timestamp"""
+    return datetime.fromtimestamp(time, timezone.utc).date()
+
+
+def partition(root: Path, sensor: str, time: int) -> Path:
+    """Partition directory for sensor messages at time"""
+    return root / f"sensor={sensor}" / f"date={day(time):%F}"
+
+
+def partitions(
+    root: Path, sensors: Iterable[str], start: int | None = None, end: int | None = None
+) -> list[Path]:
+    """Partition files with sensor messages on the [start, end) time range, on date order"""
+    first = None if start is None else day(start)
+    last = None if end is None else day(end - 1)
+    found: list[tuple[date, str, Path]] = []
+    for sensor in sensors:
+        for path in root.glob(f"sensor={sensor}/date=*/*"):
+            if path.name.endswith(".idx"):  # binary capture index
+                continue
+            try:
+                partition_day = datetime.strptime(path.parent.name, "date=%Y-%m-%d").date()
+            except ValueError:
+                logger.debug(f"skip {path}, not a partition")
+                continue
+            if first is not None and partition_day < first:
+                continue
+            if last is None or partition_day <= last:
+                found.append((partition_day, sensor, path))
+    return [path for *_, path in sorted(found)]
+
+
+class Writer(Protocol):
+    def write(self, sensor: str, raw: RawData) -> None: ...
+
+    def flush(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class CSVWriter:
+    """Append raw messages to a (compressed) CSV capture file"""
+
+    def __init__(self, path: Path, overwrite: bool = False) -> None:
+        self.file: CompressedWriter | TextIO
+        if is_compressed(path):
+            self.file = CompressedWriter(path, overwrite)
+            self.file.open()
+        else:
+            self.file = path.open("w", buffering=1) if overwrite else path.open("a", buffering=1)
+        if path.stat().st_size == 0:  # add header to new files
+            self.file.write("time,sensor,hex\n")
+
+    def write(self, sensor: str, raw: RawData) -> None:
+        self.file.write(f"{raw.time},{sensor},{raw.hex}\n")
+
+    def flush(self) -> None:
+        """Nothing to flush, lines are written as they come or on compressed blocks"""
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class PartitionWriter:
+    """
+    Append raw messages to the sensor/day partition under `root`
+
+    >>> with PartitionWriter(Path("captures"), "pypms.csv.gz") as capture:
+    ...     for raw in reader(raw=True):
+    ...         capture.write(reader.sensor.name, raw)
+    """
+
+    def __init__(self, root: Path, name: str = NAME, overwrite: bool = False) -> None:
+        self.root = root
+        self.name = name
+        self.overwrite = overwrite
+        self.writers: dict[str, tuple[Path, Writer]] = {}  # open partition for each sensor
+
+    def open(self) -> None:
+        logger.debug(f"open partitions under {self.root}")
+        self.writers.clear()
+
+    def close(self) -> None:
+        logger.debug(f"close partitions under {self.root}")
+        for _, writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+
+    def __enter__(self) -> PartitionWriter:
+        self.open()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.close()
+
+    def write(self, sensor: str, raw: RawData) -> None:
+        """Append one message, moving to a new partition when the day changes"""
+        path = partition(self.root, sensor, raw.time) / self.name
+        if sensor not in self.writers or self.writers[sensor][0] != path:
+            self._roll(sensor, path)
+        writer = self.writers[sensor][1]
+        writer.write(sensor, raw)
+        writer.flush()
+
+    def _roll(self, sensor: str, path: Path) -> None:
+        if sensor in self.writers:
+            self.writers.pop(sensor)[1].close()
+        logger.debug(f"capture {sensor} messages to {path}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        writer: Writer
+        if path.suffix == SUFFIX:
+            writer = CaptureWriter(path, self.overwrite)
+            writer.open()
+        else:
+            writer = CSVWriter(path, self.overwrite)
+        self.writers[sensor] = path, writer
@@ -2,29 +2,54 @@
 Read PM sensors
 
 NOTE:
-- Sensors are read on passive mode.
+- Sensors are read on passive mode, unless read with ActiveSensorReader.
 - Tested on PMS3003, PMS7003, PMSA003, SDS011 and MCU680
 """
 
 from __future__ import annotations
 
+import atexit
+import heapq
+import os
 import sys
 import time
 from abc import abstractmethod
-from collections.abc import Iterator
-from contextlib import contextmanager
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from csv import DictReader
+from io import SEEK_CUR
+from itertools import groupby, islice
+from mmap import ACCESS_READ, mmap
 from pathlib import Path
-from typing import Literal, NamedTuple, overload
+from threading import Lock, Timer, current_thread
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    ClassVar,
+    Literal,
+    NamedTuple,
+    TextIO,
+    TypeVar,
+    overload,
+)
 
 from loguru import logger
 from serial import Serial
-from typer import progressbar
 
 from pms import SensorNotReady, SensorWarning
-from pms.core import Sensor, Supported
+from pms.core import Framer, Sensor, Supported
+from pms.core.capture import MAGIC, RECORD, Index, is_capture, mapped_records, records
+from pms.core.compression import is_compressed, open_text
+from pms.core.partition import partitions
+from pms.core.schedule import ReplayClock, Schedule
 from pms.core.types import ObsData
 
+if TYPE_CHECKING:
+    import numpy as np
+
+T = TypeVar("T")
+
 """translation table for raw.hexdump(n)"""
 HEXDUMP_TABLE = bytes.maketrans(
     bytes(range(0x20)) + bytes(range(0x7E, 0x100)), b"." * (0x20 + 0x100 - 0x7E)
@@ -39,7 +64,7 @@ class RawData(NamedTuple):
     """raw messages with timestamp"""
 
     time: int
-    data: bytes
+    data: bytes | memoryview
 
     @property
     def hex(self) -> str:
@@ -48,7 +73,7 @@ class RawData(NamedTuple):
     def hexdump(self, line: int) -> str:
         offset = line * len(self.data)
         hex = self.data.hex(" ")
-        dump = self.data.translate(HEXDUMP_TABLE).decode()
+        dump = bytes(self.data).translate(HEXDUMP_TABLE).decode()
         return f"{offset:08x}: {hex}  {dump}"
 
 
@@ -76,19 +101,18 @@ class Reader:
         self.close()
 
 
-class SensorReader(Reader):
+class SerialSensor:
     """
-    Read sensor messages from serial port
-
-    The sensor is woken up after opening the serial port,
-    and put to sleep when before closing the port.
-    While the serial port is open, the sensor is read in passive mode.
+    Sensor on a serial port, the setup shared by `SensorReader` and `AsyncSensorReader`
 
-    PMS3003 sensors do not accept serial commands,
-    such as wake/sleep or passive mode read.
-    Valid messages are extracted from the serial buffer.
+    Configure the serial port, delay the first sample until the sensor has pre-heated
+    and validate the sensor answers after opening the port.
+    The serial I/O is left to the readers.
     """
 
+    mode: ClassVar[str] = "passive_mode"
+    inter_byte_timeout: ClassVar[float] = 0.1  # max silence within an answer
+
     def __init__(
         self,
         sensor: Sensor | Supported | str = Supported.default,
@@ -97,22 +121,88 @@ class SensorReader(Reader):
         samples: int | None = None,
         timeout: float | None = None,
         max_retries: int | None = None,
+        align: bool = False,
     ) -> None:
         """Configure serial port"""
         self.sensor = sensor if isinstance(sensor, Sensor) else Sensor[sensor]
         self.pre_heat = self.sensor.pre_heat
+        self.ready = 0.0  # monotonic time when the sensor has pre-heated
         self.serial = Serial()
         self.serial.port = port
         self.serial.baudrate = self.sensor.baud
-        self.serial.timeout = timeout or 5  # max time to wake up sensor
+        self.timeout = timeout or 5  # max time to wake up sensor
         self.max_retries = max_retries
         self.interval = interval
         self.samples = samples
+        self.align = align
+        self.schedule = Schedule(interval, align)
         logger.debug(
             f"capture {samples if samples else '?'} {sensor} obs "
             f"from {port} every {interval if interval else '?'} secs"
         )
 
+    def _open_port(self) -> None:
+        if not self.serial.is_open:
+            logger.debug(f"open {self.serial.port}")
+            self.serial.open()
+            self.serial.reset_input_buffer()
+
+    def _pre_heat(self) -> None:
+        """Delay the first sample until the sensor has pre-heated, without blocking"""
+        if not self.pre_heat:
+            return
+
+        logger.info(f"pre-heating {self.sensor} sensor, first sample in {self.pre_heat} sec")
+        self.ready = time.monotonic() + self.pre_heat
+
+        # only pre-heat the first time
+        self.pre_heat = 0
+
+    def _validate(self, buffer: bytes) -> None:
+        """Check the sensor answers to wake and passive/active mode commands"""
+        logger.debug(f"buffer length: {len(buffer)}")
+
+        # check if the sensor answered
+        if len(buffer) == 0:
+            logger.error("Sensor did not respond, check UART pin connections")
+            raise UnableToRead("Sensor did not respond")
+
+        # check against sensor type derived from buffer
+        if not self.sensor.check(buffer, self.mode):
+            logger.error(f"Sensor is not {self.sensor.name}")
+            raise UnableToRead("Sensor failed validation")
+
+
+class SensorReader(SerialSensor, Reader):
+    """
+    Read sensor messages from serial port
+
+    The sensor is woken up after opening the serial port,
+    and put to sleep when before closing the port.
+    While the serial port is open, the sensor is read in passive mode.
+
+    PMS3003 sensors do not accept serial commands,
+    such as wake/sleep or passive mode read.
+    Valid messages are extracted from the serial buffer.
+    """
+
+    def __init__(
+        self,
+        sensor: Sensor | Supported | str = Supported.default,
+        port: str = "/dev/ttyUSB0",
+        interval: int | None = None,
+        samples: int | None = None,
+        timeout: float | None = None,
+        max_retries: int | None = None,
+        align: bool = False,
+        idle_timeout: float | None = None,
+    ) -> None:
+        """Configure serial port"""
+        super().__init__(sensor, port, interval, samples, timeout, max_retries, align)
+        self.idle_timeout = idle_timeout
+        self._idle: Timer | None = None  # pending sleep after close
+        self._lock = Lock()
+
     def _cmd(self, command: str) -> bytes:
         """Write command to sensor and return answer"""
 
@@ -125,46 +215,105 @@ class SensorReader(Reader):
             self.serial.reset_input_buffer()
 
         # return full buffer
-        return self.serial.read(max(cmd.answer_length, self.serial.in_waiting))
-
-    def _pre_heat(self):
-        if not self.pre_heat:
-            return
-
-        logger.info(f"pre-heating {self.sensor} sensor {self.pre_heat} sec")
-        with progressbar(range(self.pre_heat), label="pre-heating") as progress:
-            for _ in progress:
-                time.sleep(1)
-
-        # only pre-heat the firs time
-        self.pre_heat = 0
+        return self._read(cmd.answer_header, cmd.answer_length)
+
+    def _read(self, header: bytes, length: int) -> bytes:
+        """
+        Read until a complete message arrives or the timeout is over
+
+        Reads on the serial port time out after `inter_byte_timeout`,
+        so stop early if the sensor goes silent, e.g. after a short error message,
+        and a wrong answer does not wait for the full timeout.
+        """
+        if not length:
+            return self.serial.read(self.serial.in_waiting)
+
+        buffer = b""
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            chunk = self.serial.read(max(length - len(buffer), self.serial.in_waiting, 1))
+            if not chunk:
+                if buffer:  # the sensor went silent
+                    break
+                continue  # wait for the answer
+            buffer += chunk
+            if len(buffer) >= length and self.sensor.Message.frame(buffer, header, length):
+                break
+        return buffer
 
     def open(self) -> None:
-        """Open serial port and sensor setup"""
+        """Open serial port and sensor setup, or resume an idle session"""
+        with self._lock:
+            if self._resume():
+                return
+            self._open()
+
+    def _resume(self) -> bool:
+        """Cancel the pending sleep, True if the sensor is still awake"""
+        if self._idle is None:
+            return False
+
+        self._cancel_idle()
         if not self.serial.is_open:
-            logger.debug(f"open {self.serial.port}")
-            self.serial.open()
-            self.serial.reset_input_buffer()
+            return False
+
+        logger.debug(f"resume {self.sensor} session")
+        self.serial.reset_input_buffer()  # discard messages sent while idle
+        return True
 
-        # wake sensor and set passive mode
+    def _open(self) -> None:
+        # set once, every change reconfigures an open port
+        self.serial.timeout = self.inter_byte_timeout
+        self._open_port()
+
+        # wake sensor and set passive/active mode
         logger.debug(f"wake {self.sensor}")
         buffer = self._cmd("wake")
+        buffer += self._cmd(self.mode)
         self._pre_heat()
-        buffer += self._cmd("passive_mode")
-        logger.debug(f"buffer length: {len(buffer)}")
-
-        # check if the sensor answered
-        if len(buffer) == 0:
-            logger.error("Sensor did not respond, check UART pin connections")
-            raise UnableToRead("Sensor did not respond")
-
-        # check against sensor type derived from buffer
-        if not self.sensor.check(buffer, "passive_mode"):
-            logger.error(f"Sensor is not {self.sensor.name}")
-            raise UnableToRead("Sensor failed validation")
+        self._validate(buffer)
 
     def close(self) -> None:
-        """Put sensor to sleep and close serial port"""
+        """
+        Put sensor to sleep and close serial port
+
+        With an `idle_timeout`, the sensor stays awake and the serial port open
+        until the timeout is over, so the next `open` can resume the session
+        without waking and validating the sensor again.
+        Closing an idle session, or exiting the interpreter, puts the sensor to sleep right away.
+        """
+        with self._lock:
+            if self._idle is not None:  # already idle, sleep now
+                self._cancel_idle()
+                if self.serial.is_open:
+                    self._close()
+                return
+            if not self.idle_timeout:
+                self._close()
+                return
+
+            logger.debug(f"idle {self.sensor} session, sleep in {self.idle_timeout} sec")
+            self._idle = Timer(self.idle_timeout, self._close_idle)
+            self._idle.daemon = True
+            self._idle.start()
+            atexit.register(self.close)  # daemon timers do not run at exit
+
+    def _cancel_idle(self) -> None:
+        assert self._idle is not None
+        self._idle.cancel()
+        self._idle = None
+        atexit.unregister(self.close)
+
+    def _close_idle(self) -> None:
+        with self._lock:
+            if self._idle is not current_thread():  # resumed meanwhile
+                return
+            self._idle = None
+            atexit.unregister(self.close)
+            if self.serial.is_open:
+                self._close()
+
+    def _close(self) -> None:
         logger.debug(f"sleep {self.sensor}")
         self._cmd("sleep")
         logger.debug(f"close {self.serial.port}")
@@ -183,9 +332,15 @@ class SensorReader(Reader):
 
         sample = 0
         failures = 0
+        schedule = self.schedule = Schedule(self.interval, self.align, self.ready)
         while self.serial.is_open:
             try:
+                delay = schedule.delay()
+                if delay > 0:
+                    time.sleep(delay)
+
                 buffer = self._cmd("passive_read")
+                logger.opt(lazy=True).debug("message hex: {}", lambda: buffer.hex())
 
                 try:
                     obs = self.sensor.decode(buffer)
@@ -206,30 +361,467 @@ class SensorReader(Reader):
                     sample += 1
                     if self.samples is not None and sample >= self.samples:
                         break
-                    if self.interval:
-                        delay = self.interval - (time.time() - obs.time)
-                        if delay > 0:
-                            time.sleep(delay)
+                    schedule.advance()
+            except KeyboardInterrupt:
+                print()
+                break
+
+
+class ActiveSensorReader(SensorReader):
+    """
+    Read sensor messages from serial port on active mode
+
+    The sensor is woken up after opening the serial port,
+    and put to sleep when before closing the port.
+    While the serial port is open, the sensor pushes new messages on its own
+    (about once every second) and every valid message is read from the serial stream,
+    without sending a read command for each sample.
+    Only the newest message is decoded, older messages are dropped.
+
+    Only sensors where active mode messages match the passive mode messages are supported.
+    """
+
+    mode = "active_mode"
+
+    def __init__(
+        self,
+        sensor: Sensor | Supported | str = Supported.default,
+        port: str = "/dev/ttyUSB0",
+        interval: int | None = None,
+        samples: int | None = None,
+        timeout: float | None = None,
+        max_retries: int | None = None,
+        align: bool = False,
+        idle_timeout: float | None = None,
+    ) -> None:
+        """Configure serial port"""
+        super().__init__(sensor, port, interval, samples, timeout, max_retries, align, idle_timeout)
+        if not self.sensor.active_mode:
+            raise UnableToRead(f"{self.sensor} does not support active mode")
+        self.framer = Framer(self.sensor)
+
+    def open(self) -> None:
+        """Open serial port and sensor setup"""
+        self.framer.reset()
+        super().open()
+
+    def _cmd(self, command: str) -> bytes:
+        """Write command to sensor and return answer"""
+        buffer = super()._cmd(command)
+        if command == self.mode:
+            # messages pushed by the sensor while setting active mode
+            self.framer.feed(buffer)
+        return buffer
+
+    @overload
+    def __call__(self, *, raw: Literal[False, None] = None) -> Iterator[ObsData]:
+        """Observations from active mode reading at regular intervals"""
+
+    @overload
+    def __call__(self, *, raw: Literal[True]) -> Iterator[RawData]:
+        """Raw observations from active mode reading at regular intervals"""
+
+    def __call__(self, *, raw: bool | None = None) -> Iterator[RawData | ObsData]:
+        """(raw) Observations from active mode reading at regular intervals
+
+        Messages which piled up while the consumer was busy are dropped and
+        only the newest message is decoded, so an observation is never older than
+        the last message read from the serial port.
+        """
+
+        sample = 0
+        failures = 0
+        latest: bytes | None = None  # newest message read
+        schedule = self.schedule = Schedule(self.interval, self.align, self.ready)
+        while self.serial.is_open:
+            try:
+                chunk = self.serial.read(max(1, self.serial.in_waiting))
+                messages = list(self.framer.feed(chunk))
+                if messages:
+                    if len(messages) > 1:
+                        logger.debug(f"dropped {len(messages) - 1} old messages")
+                    latest = messages[-1]
+                if latest is None or self.serial.in_waiting:  # read the backlog first
+                    continue
+                message, latest = latest, None
+                if schedule.delay() > 0:  # skip messages until next deadline
+                    continue
+
+                try:
+                    obs = self.sensor.decode(message)
+                except SensorWarning as e:
+                    failures += 1
+                    if self.max_retries is not None and failures > self.max_retries:
+                        raise
+                    logger.debug(e)
+                    continue
+
+                yield RawData(obs.time, message) if raw else obs
+                sample += 1
+                if self.samples is not None and sample >= self.samples:
+                    return
+                schedule.advance()
             except KeyboardInterrupt:
                 print()
                 break
 
 
+class MultiSensorReader:
+    """
+    Read many sensors in parallel on shared sampling ticks
+
+    On every tick, one sample is read from each sensor on its own thread,
+    so the time to read all sensors does not grow with the number of sensors.
+    The readers are opened in parallel too, and pre-heat at the same time.
+    The interval and samples are taken from MultiSensorReader,
+    the interval and samples of the individual readers are cleared.
+    Active mode readers drain the messages pushed between ticks,
+    so every tick reads the newest message from each sensor.
+
+    >>> pms = SensorReader("PMSx003", "/dev/ttyUSB0")
+    >>> bme = SensorReader("MCU680", "/dev/ttyUSB1")
+    >>> with MultiSensorReader(pms, bme, interval=60) as reader:
+    ...     for sensor, obs in reader():
+    ...         print(sensor, obs)
+    """
+
+    def __init__(
+        self,
+        *readers: SensorReader,
+        interval: int | None = None,
+        samples: int | None = None,
+        align: bool = False,
+    ) -> None:
+        if not readers:
+            raise ValueError("MultiSensorReader needs at least one reader")
+        for reader in readers:  # paced and counted by MultiSensorReader
+            reader.interval = reader.samples = None
+        self.readers = readers
+        self.interval = interval
+        self.samples = samples
+        self.align = align
+        self.schedule = Schedule(interval, align)
+        self._pool: ThreadPoolExecutor | None = None
+
+    def _map(self, fn: Callable[[SensorReader], T]) -> list[T]:
+        """Call fn on every reader in parallel"""
+        assert self._pool is not None, "MultiSensorReader is closed"
+        return list(self._pool.map(fn, self.readers))
+
+    def open(self) -> None:
+        """Open all readers in parallel"""
+        self._pool = ThreadPoolExecutor(len(self.readers), thread_name_prefix="pms")
+        try:
+            self._map(lambda reader: reader.open())
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Close all open readers in parallel"""
+        if self._pool is None:
+            return
+
+        def close(reader: SensorReader) -> None:
+            if reader.serial.is_open:
+                reader.close()
+
+        try:
+            self._map(close)
+        finally:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.close()
+
+    @overload
+    def __call__(self, *, raw: Literal[False, None] = None) -> Iterator[tuple[Sensor, ObsData]]:
+        """Observations from all sensors on every tick"""
+
+    @overload
+    def __call__(self, *, raw: Literal[True]) -> Iterator[tuple[Sensor, RawData]]:
+        """Raw observations from all sensors on every tick"""
+
+    def __call__(self, *, raw: bool | None = None) -> Iterator[tuple[Sensor, RawData | ObsData]]:
+        """(raw) Observations from all sensors, in reader order, on every tick"""
+
+        # one sample from each reader per tick, readers keep their state (e.g. failures)
+        samples: dict[SensorReader, Iterator[RawData | ObsData]] = {
+            reader: reader(raw=True) if raw else reader() for reader in self.readers
+        }
+
+        def read(reader: SensorReader) -> RawData | ObsData | None:
+            return next(samples[reader], None)
+
+        sample = 0
+        ready = max(reader.ready for reader in self.readers)
+        schedule = self.schedule = Schedule(self.interval, self.align, ready)
+        try:
+            while self._pool is not None:
+                try:
+                    delay = schedule.delay()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                    tick = self._map(read)
+                    if any(obs is None for obs in tick):  # a reader was closed
+                        break
+                    for reader, obs in zip(self.readers, tick):
+                        assert obs is not None
+                        yield reader.sensor, obs
+                    sample += 1
+                    if self.samples is not None and sample >= self.samples:
+                        break
+                    schedule.advance()
+                except KeyboardInterrupt:
+                    print()
+                    break
+        finally:
+            for reader_samples in samples.values():
+                if isinstance(reader_samples, Generator):
+                    reader_samples.close()
+
+
 class MessageReader(Reader):
-    def __init__(self, path: Path, sensor: Sensor, samples: int | None = None) -> None:
+    """
+    Replay messages from a capture file
+
+    Capture files can be CSV (`time,sensor,hex`) or binary (`pms.core.capture`).
+    CSV captures ending on .gz or .xz are decompressed while reading.
+    If `path` is a directory, only the `sensor=<name>/date=<YYYY-MM-DD>/` partitions
+    (`pms.core.partition`) for `sensor` between the `start` and `end` dates are read.
+    Only messages from `sensor` between the `start` and `end` timestamps are replayed.
+    On binary captures, the index is used to read only the requested time range.
+
+    With `memory_map`, binary captures are memory mapped and raw messages are
+    memoryviews into the mapping, only valid while the reader is open.
+
+    With `follow`, messages appended to the capture file (e.g. by `pms csv --capture`)
+    are replayed as they are written, until the `end` timestamp (if any).
+    The file is polled for new messages, backing off from `poll_min` to `poll_max` seconds
+    while idle, and re-opened from the start when rotated or truncated.
+
+    With `speed`, messages are replayed at their recorded pace, `speed` times faster
+    (e.g. 1, 10 or 1000), and `lag`/`max_lag` tell how far behind the consumer fell (secs).
+    """
+
+    poll_min: ClassVar[float] = 0.1
+    poll_max: ClassVar[float] = 5
+
+    def __init__(
+        self,
+        path: Path,
+        sensor: Sensor,
+        samples: int | None = None,
+        start: int | None = None,
+        end: int | None = None,
+        memory_map: bool = False,
+        follow: bool = False,
+        speed: float | None = None,
+    ) -> None:
         self.path = path
         self.sensor = sensor
         self.samples = samples
+        self.start = start
+        self.end = end
+        self.memory_map = memory_map
+        self.follow = follow
+        self.speed = speed
+        self.mapping: mmap | None = None
+        self.clock: ReplayClock | None = None
 
     def open(self) -> None:
         logger.debug(f"open {self.path}")
-        self.csv = self.path.open()
-        reader = DictReader(self.csv)
-        self.data = (row for row in reader if row["sensor"] == self.sensor.name)
+        self.file: BinaryIO | TextIO | None = None
+        if self.path.is_dir():
+            if self.follow:
+                raise ValueError(f"can not follow partitioned captures {self.path}")
+            self.data = self._partitions()
+        elif self.follow:
+            if is_compressed(self.path):
+                raise ValueError(f"can not follow compressed file {self.path}")
+            tail = self.path.open("rb")
+            self.file = tail
+            self.data = self._follow(tail)
+        elif is_capture(self.path):
+            capture = self.path.open("rb")
+            self.file = capture
+            if self.memory_map:
+                self.mapping = mmap(capture.fileno(), 0, access=ACCESS_READ)
+            self.data = self._capture(capture, self.path)
+        else:
+            csv = open_text(self.path)
+            self.file = csv
+            self.data = self._csv(csv)
+        if self.speed:
+            self.clock = ReplayClock(self.speed)
+            self.data = self._paced(self.data, self.clock)
 
     def close(self) -> None:
         logger.debug(f"close {self.path}")
-        self.csv.close()
+        if self.clock is not None:
+            logger.info(f"replay {self.speed}x fell behind by up to {self.max_lag:.3f} sec")
+        if hasattr(self, "data"):  # release the memoryview into the mapping
+            del self.data
+        if self.mapping is not None:
+            try:
+                self.mapping.close()
+            except BufferError:  # raw messages still in use, unmap when released
+                logger.debug(f"{self.path} memory map still in use")
+            self.mapping = None
+        if self.file is not None:
+            self.file.close()
+
+    def _sensors(self) -> dict[str, Sensor]:
+        """Sensors to replay, by name"""
+        return {self.sensor.name: self.sensor}
+
+    def _in_range(self, time: int) -> bool:
+        if self.start is not None and time < self.start:
+            return False
+        return self.end is None or time < self.end
+
+    def _csv(self, file: TextIO) -> Iterator[tuple[Sensor, RawData]]:
+        sensors = self._sensors()
+        for row in DictReader(file):
+            sensor, time = sensors.get(row["sensor"]), int(row["time"])
+            if sensor is not None and self._in_range(time):
+                yield sensor, RawData(time, bytes.fromhex(row["hex"]))
+
+    def _capture(self, file: BinaryIO, path: Path) -> Iterator[tuple[Sensor, RawData]]:
+        sensors = self._sensors()
+        index = Index.load(path)
+        spans = [index.span(name, self.start, self.end) for name in sensors]
+        spans = [(start, stop) for start, stop in spans if start != stop]
+        if not spans:
+            return
+        start = min(start for start, _ in spans)
+        stops = [stop for _, stop in spans if stop is not None]
+        stop = max(stops) if len(stops) == len(spans) else None
+        if self.mapping is None:
+            found = records(file, start, stop)
+        else:
+            found = mapped_records(memoryview(self.mapping), start, stop)
+        for record in found:
+            sensor = sensors.get(record.sensor)
+            if sensor is not None and self._in_range(record.time):
+                yield sensor, RawData(record.time, record.data)
+
+    def _partitions(self) -> Iterator[tuple[Sensor, RawData]]:
+        """Messages from the partitions with the selected sensors and time range, on time order
+
+        Partitions from the same day are merged by (time, sensor),
+        so messages from many sensors are replayed as they were captured.
+        """
+        paths = partitions(self.path, self._sensors(), self.start, self.end)
+        for _, day in groupby(paths, key=lambda path: path.parent.name):
+            with ExitStack() as stack:
+                messages = (self._partition(path, stack) for path in day)
+                yield from heapq.merge(*messages, key=lambda msg: (msg[1].time, msg[0].name))
+
+    def _partition(self, path: Path, stack: ExitStack) -> Iterator[tuple[Sensor, RawData]]:
+        """Messages from a partition, the file is closed with the stack"""
+        logger.debug(f"open partition {path}")
+        if is_capture(path):
+            return self._capture(stack.enter_context(path.open("rb")), path)
+        return self._csv(stack.enter_context(open_text(path)))
+
+    @property
+    def lag(self) -> float:
+        """Seconds the last replayed message was released after its due time"""
+        return self.clock.lag if self.clock else 0.0
+
+    @property
+    def max_lag(self) -> float:
+        """Seconds the replay fell behind at most"""
+        return self.clock.max_lag if self.clock else 0.0
+
+    @staticmethod
+    def _paced(
+        messages: Iterator[tuple[Sensor, RawData]], clock: ReplayClock
+    ) -> Iterator[tuple[Sensor, RawData]]:
+        """Release messages when due on the replay clock"""
+        for sensor, message in messages:
+            time.sleep(clock.delay(message.time))
+            yield sensor, message
+
+    @staticmethod
+    def _tail(file: BinaryIO, binary: bool) -> Iterator[tuple[str, RawData]]:
+        """Complete messages from the current position on, leave partial messages unread"""
+        if binary:
+            offset = max(file.tell(), len(MAGIC))
+            for record in records(file, offset):
+                offset = record.offset + RECORD.size + len(record.data)
+                yield record.sensor, RawData(record.time, record.data)
+            file.seek(offset)
+            return
+
+        while line := file.readline():
+            if not line.endswith(b"\n"):  # partial line
+                file.seek(-len(line), SEEK_CUR)
+                return
+            if not line.strip():
+                continue
+            time, sensor, hex = line.decode().rstrip().split(",")
+            if time != "time":  # not header
+                yield sensor, RawData(int(time), bytes.fromhex(hex))
+
+    @staticmethod
+    def _format(file: BinaryIO) -> bool | None:
+        """True for binary captures, False for CSV, None until enough bytes were written"""
+        head = file.read(len(MAGIC))
+        file.seek(0)
+        if len(head) < len(MAGIC) and MAGIC.startswith(head):
+            return None
+        return head == MAGIC
+
+    def _follow(self, file: BinaryIO) -> Iterator[tuple[Sensor, RawData]]:
+        """Messages already on the capture file and the ones appended to it"""
+        sensors = self._sensors()
+        inode = os.fstat(file.fileno()).st_ino
+        binary: bool | None = None  # format is known once the first bytes are written
+        delay = self.poll_min
+        while True:
+            found = False
+            if binary is None:
+                binary = self._format(file)
+            tail = () if binary is None else self._tail(file, binary)
+            for name, raw in tail:
+                found = True
+                sensor = sensors.get(name)
+                if sensor is None:
+                    continue
+                if self.end is not None and raw.time >= self.end:
+                    del sensors[name]  # done with this sensor
+                    if not sensors:
+                        return
+                elif self._in_range(raw.time):
+                    yield sensor, raw
+            if found:
+                delay = self.poll_min
+                continue
+
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:  # rotated, new file not created yet
+                stat = None
+            if stat is not None and (stat.st_ino != inode or stat.st_size < file.tell()):
+                logger.debug(f"re-open rotated/truncated {self.path}")
+                file.close()
+                file = self.path.open("rb")
+                self.file = file
+                inode = os.fstat(file.fileno()).st_ino
+                binary = None
+                delay = self.poll_min
+                continue
+
+            time.sleep(delay)
+            delay = min(delay * 2, self.poll_max)
 
     @overload
     def __call__(self, *, raw: Literal[False, None] = None) -> Iterator[ObsData]:
@@ -245,14 +837,107 @@ class MessageReader(Reader):
         if not hasattr(self, "data"):
             return
 
-        for row in self.data:
-            time, message = int(row["time"]), bytes.fromhex(row["hex"])
-            yield RawData(time, message) if raw else self.sensor.decode(message, time=time)
+        for _, message in self.data:
+            yield message if raw else self.sensor.decode(bytes(message.data), time=message.time)
             if self.samples:
                 self.samples -= 1
                 if self.samples <= 0:
                     break
 
+    def batches(self, size: int = 10_000) -> Iterator[np.ndarray]:
+        """Replay observations from pre-recorded messages, `size` messages at the time
+
+        Observations are decoded with `Sensor.decode_many` into NumPy structured arrays,
+        messages which can not be decoded are left out.
+        """
+
+        if not hasattr(self, "data"):
+            return
+
+        messages: Iterator[RawData] = (message for _, message in self.data)
+        if self.samples:
+            messages = islice(messages, self.samples)
+        while batch := list(islice(messages, size)):
+            yield self.sensor.decode_many(
+                (message.data for message in batch), (message.time for message in batch)
+            )
+
+
+class MultiMessageReader(MessageReader):
+    """
+    Replay messages from many sensors on a single pass over a capture file
+
+    Each message is decoded by the sensor which captured it,
+    and observations are yielded as `(sensor, obs)` tuples on capture order.
+    Only messages from `sensors` are replayed, all known sensors by default.
+
+    >>> with MultiMessageReader(Path("captured_data.csv")) as reader:
+    ...     for sensor, obs in reader():
+    ...         print(sensor, obs)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        sensors: Iterable[Sensor] | None = None,
+        samples: int | None = None,
+        start: int | None = None,
+        end: int | None = None,
+        memory_map: bool = False,
+        follow: bool = False,
+        speed: float | None = None,
+    ) -> None:
+        self.sensors = tuple(Sensor if sensors is None else sensors)
+        super().__init__(path, self.sensors[0], samples, start, end, memory_map, follow, speed)
+
+    def _sensors(self) -> dict[str, Sensor]:
+        return {sensor.name: sensor for sensor in self.sensors}
+
+    @overload  # type: ignore[override]
+    def __call__(self, *, raw: Literal[False, None] = None) -> Iterator[tuple[Sensor, ObsData]]:
+        """Replay observations from pre-recorded messages"""
+
+    @overload
+    def __call__(self, *, raw: Literal[True]) -> Iterator[tuple[Sensor, RawData]]:
+        """Replay raw observations from pre-recorded messages"""
+
+    def __call__(self, *, raw: bool | None = None) -> Iterator[tuple[Sensor, RawData | ObsData]]:
+        """Replay (raw) observations from pre-recorded messages, with their sensor"""
+
+        if not hasattr(self, "data"):
+            return
+
+        for sample, (sensor, message) in enumerate(self.data, start=1):
+            if raw:
+                yield sensor, message
+            else:
+                yield sensor, sensor.decode(bytes(message.data), time=message.time)
+            if self.samples and sample >= self.samples:
+                break
+
+    def batches(self, size: int = 10_000) -> Iterator[tuple[Sensor, np.ndarray]]:  # type: ignore[override]
+        """Replay observations from pre-recorded messages, `size` messages at the time
+
+        Each batch is split by sensor and decoded with `Sensor.decode_many`,
+        messages which can not be decoded are left out.
+        """
+
+        if not hasattr(self, "data"):
+            return
+
+        messages = islice(self.data, self.samples) if self.samples else self.data
+        while batch := list(islice(messages, size)):
+            groups: dict[Sensor, list[RawData]] = {}
+            for sensor, message in batch:
+                groups.setdefault(sensor, []).append(message)
+            for sensor, group in groups.items():
+                yield (
+                    sensor,
+                    sensor.decode_many(
+                        (message.data for message in group), (message.time for message in group)
+                    ),
+                )
+
 
 @contextmanager
 def exit_on_fail(reader: Reader):
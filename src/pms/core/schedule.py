@@ -0,0 +1,103 @@
+"""
+Sampling schedule for sensor readers
+
+NOTE:
+- Deadlines are kept on the monotonic clock, so the schedule does not drift
+  with the time it takes to read the sensor, and does not follow wall clock jumps.
+- Aligned schedules keep the deadlines on multiples of the interval on the wall clock,
+  e.g. every minute at :00 for a 60 sec interval.
+- Deadlines which already passed are skipped and counted as missed.
+- The first deadline can be delayed, e.g. until the sensor has pre-heated.
+- Replayed messages are paced by their recorded time, relative to the first message.
+"""
+
+from __future__ import annotations
+
+import time
+
+from loguru import logger
+
+
+class Schedule:
+    """
+    Deadlines for sampling at regular intervals
+
+    >>> schedule = Schedule(60, align=True)
+    >>> while True:
+    ...     time.sleep(schedule.delay())
+    ...     read_sensor()
+    ...     schedule.advance()
+    """
+
+    def __init__(
+        self, interval: float | None = None, align: bool = False, start: float | None = None
+    ) -> None:
+        """
+        interval: seconds between deadlines
+        align: deadlines on multiples of the interval on the wall clock
+        start: earliest first deadline on the monotonic clock, e.g. after sensor pre-heat
+        """
+        self.interval = interval or 0
+        self.align = align and self.interval > 0
+        self.missed = 0
+        self.deadline = max(time.monotonic(), start or 0)
+        if self.align:  # wait for the next interval boundary
+            self.deadline += -self._wall(self.deadline) % self.interval
+
+    @staticmethod
+    def _wall(deadline: float) -> float:
+        """Wall clock time at deadline"""
+        return time.time() + deadline - time.monotonic()
+
+    def _offset(self, deadline: float) -> float:
+        """Seconds from deadline to the closest interval boundary on the wall clock"""
+        offset = -self._wall(deadline) % self.interval
+        return offset if offset <= self.interval / 2 else offset - self.interval
+
+    def delay(self) -> float:
+        """Seconds to wait until the next deadline"""
+        return max(self.deadline - time.monotonic(), 0)
+
+    def advance(self) -> None:
+        """Move to the next deadline, skipping the ones already passed"""
+        now = time.monotonic()
+        if not self.interval:
+            self.deadline = now
+            return
+
+        self.deadline += self.interval
+        if self.align:  # follow wall clock adjustments
+            self.deadline += self._offset(self.deadline)
+        if self.deadline < now:
+            missed = int((now - self.deadline) // self.interval) + 1
+            self.deadline += missed * self.interval
+            self.missed += missed
+            logger.warning(f"missed {missed} sampling deadline(s), {self.missed} in total")
+
+
+class ReplayClock:
+    """
+    Pace replayed messages by their recorded time, `speed` times faster than real time
+
+    >>> clock = ReplayClock(speed=10)
+    >>> for raw in messages:
+    ...     time.sleep(clock.delay(raw.time))
+    ...     publish(raw)
+    """
+
+    def __init__(self, speed: float = 1) -> None:
+        self.speed = speed
+        self.origin: tuple[int, float] | None = None  # recorded and monotonic time of 1st message
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    def delay(self, recorded: int) -> float:
+        """Seconds to wait until a message recorded at `recorded` is due, and update the lag"""
+        now = time.monotonic()
+        if self.origin is None:
+            self.origin = recorded, now
+        first, start = self.origin
+        deadline = start + (recorded - first) / self.speed
+        self.lag = max(now - deadline, 0)
+        self.max_lag = max(self.max_lag, self.lag)
+        return max(deadline - now, 0)
@@ -4,15 +4,20 @@ Access supported sensors from a single object
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from enum import Enum
 from importlib import metadata
 from time import time as seconds_since_epoch
+from typing import TYPE_CHECKING
 
 from loguru import logger
 
 from pms import InconsistentObservation, SensorWarmingUp, WrongMessageChecksum, WrongMessageFormat
 from pms.core.types import Cmd, Commands, Message, ObsData
 
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class Sensor(Enum):
     """Sensor modules
@@ -59,6 +64,13 @@ class Sensor(Enum):
             return self.value.PREHEAT
         return 0
 
+    @property
+    def active_mode(self) -> bool:
+        """sensor pushes passive_read messages on active mode"""
+        if hasattr(self.value, "ACTIVE_MODE"):
+            return self.value.ACTIVE_MODE
+        return self.Commands.active_mode.answer_length > 0
+
     def command(self, cmd: str) -> Cmd:
         """Serial command for sensor"""
         return getattr(self.Commands, cmd)
@@ -84,6 +96,30 @@ class Sensor(Enum):
         data = self.Message.decode(buffer, self.Commands.passive_read)
         return self.Data(time, *data)  # type: ignore[operator]
 
+    def decode_many(
+        self, buffers: Iterable[bytes | memoryview], times: Iterable[int]
+    ) -> np.ndarray:
+        """Extract observations from many serial buffers at once
+
+        Returns a NumPy structured array with one field per observation data field.
+        Buffers which would raise a SensorWarning on `decode` are left out.
+        """
+        import numpy as np
+
+        from pms.core.batch import frames, obs_dtype
+
+        command = self.Commands.passive_read
+        msg = frames(self.Message, buffers, command)
+        valid, data = self.Message.decode_many(msg, command)
+
+        obs = np.empty(len(msg), dtype=obs_dtype(self.Data))
+        obs["time"] = np.fromiter(times, dtype=np.int64, count=len(msg))
+        names = obs.dtype.names or ()
+        for name, record in zip(names[1:], data.dtype.names or ()):
+            obs[name] = data[record]
+        valid &= self.Data._post_init_many(obs)  # type: ignore[attr-defined]
+        return obs[valid]
+
 
 class Supported(str, Enum):
     """Supported sensor names"""
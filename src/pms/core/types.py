@@ -3,7 +3,10 @@ from __future__ import annotations
 from abc import abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
-from typing import NamedTuple, Protocol
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class Cmd(NamedTuple):
@@ -31,6 +34,18 @@ class Message(Protocol):
     @abstractmethod
     def decode(cls, message: bytes, command: Cmd) -> tuple[int | float, ...]: ...
 
+    @classmethod
+    @abstractmethod
+    def frame(cls, message: bytes, header: bytes, length: int) -> bytes: ...
+
+    @classmethod
+    @abstractmethod
+    def frame_length(cls, buffer: bytes | bytearray, length: int) -> int: ...
+
+    @classmethod
+    @abstractmethod
+    def decode_many(cls, frames: np.ndarray, command: Cmd) -> tuple[np.ndarray, np.ndarray]: ...
+
 
 @dataclass
 class ObsData(Protocol):
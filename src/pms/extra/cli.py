@@ -1,12 +1,16 @@
 import json
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
 from dataclasses import fields
+from enum import Enum
+from functools import partial
+from itertools import islice
+from pathlib import Path
 from typing import Annotated, TypeAlias
 
 import typer
 from loguru import logger
 
-from pms.core import exit_on_fail
+from pms.core import MessageReader, exit_on_fail
 from pms.core.types import ObsData
 
 DB_HOST: TypeAlias = Annotated[str, typer.Option("--db-host", help="database server")]
@@ -18,6 +22,23 @@ DB_PASS: TypeAlias = Annotated[
     str, typer.Option("--db-pass", envvar="DB_PASS", help="server password")
 ]
 DB_NAME: TypeAlias = Annotated[str, typer.Option("--db-name", help="database name")]
+DB_MULTI_FIELD: TypeAlias = Annotated[
+    bool,
+    typer.Option(
+        "--multi-field", help="one point per observation, on a measurement named after the sensor"
+    ),
+]
+DB_GZIP: TypeAlias = Annotated[
+    bool, typer.Option("--db-gzip", help="gzip compress the points written to the server")
+]
+OUTBOX: TypeAlias = Annotated[
+    Path | None,
+    typer.Option(help="store observations on this directory while the server is unreachable"),
+]
+OUTBOX_RATE: TypeAlias = Annotated[
+    float | None,
+    typer.Option(min=0, help="replay at most N stored observations per second"),
+]
 
 
 def influxdb(
@@ -30,21 +51,81 @@ def influxdb(
     jtag: Annotated[str, typer.Option("--tags", help="measurement tags")] = json.dumps(
         {"location": "test"}
     ),
+    batch_size: Annotated[
+        int,
+        typer.Option("--batch-size", min=1, help="points per write, on the background if > 1"),
+    ] = 1,
+    flush_interval: Annotated[
+        float, typer.Option("--flush-interval", min=0, help="seconds before writing a batch")
+    ] = 10,
+    concurrency: Annotated[
+        int, typer.Option("--concurrency", min=1, help="batches written at the same time")
+    ] = 1,
+    multi_field: DB_MULTI_FIELD = False,
+    gzip: DB_GZIP = False,
+    outbox: OUTBOX = None,
+    outbox_rate: OUTBOX_RATE = None,
 ):
     """Read sensor and push PM measurements to an InfluxDB server"""
     try:
-        from .influxdb import publisher
+        from .influxdb import BackgroundPublisher, outbox_publisher, publisher
+        from .outbox import BATCH_SIZE
     except ModuleNotFoundError as e:  # pragma: no cover
         logger.debug(e)
         typer.echo(missing_extras(ctx.command_path, "influxdb"))
         raise typer.Abort() from e
 
-    pub = publisher(host=host, port=port, username=user, password=word, db_name=name)
     tags = json.loads(jtag)
+    measurement = ctx.obj["reader"].sensor.name if multi_field else None
+    if outbox:  # stored observations are written on the background, on --batch-size batches
+        stored = outbox_publisher(
+            host=host,
+            port=port,
+            username=user,
+            password=word,
+            db_name=name,
+            measurement=measurement,
+            gzip=gzip,
+            path=outbox,
+            batch_size=batch_size if batch_size > 1 else BATCH_SIZE,
+            flush_interval=flush_interval if batch_size > 1 else 0,
+            max_rate=outbox_rate,
+        )
+        with exit_on_fail(ctx.obj["reader"]) as reader, stored:
+            for obs in reader():
+                stored(time=obs.time, tags=tags, data=dict(db_measurements(obs)))
+        return
 
-    with exit_on_fail(ctx.obj["reader"]) as reader:
+    if batch_size == 1:
+        pub = publisher(
+            host=host,
+            port=port,
+            username=user,
+            password=word,
+            db_name=name,
+            measurement=measurement,
+            gzip=gzip,
+        )
+        with exit_on_fail(ctx.obj["reader"]) as reader:
+            for obs in reader():
+                pub(time=obs.time, tags=tags, data=dict(db_measurements(obs)))
+        return
+
+    background = BackgroundPublisher(
+        host=host,
+        port=port,
+        username=user,
+        password=word,
+        db_name=name,
+        measurement=measurement,
+        gzip=gzip,
+        batch_size=batch_size,
+        flush_interval=flush_interval,
+        concurrency=concurrency,
+    )
+    with exit_on_fail(ctx.obj["reader"]) as reader, background:
         for obs in reader():
-            pub(time=obs.time, tags=tags, data=dict(db_measurements(obs)))
+            background(time=obs.time, tags=tags, data=dict(db_measurements(obs)))
 
 
 def db_measurements(obs: ObsData) -> Iterator[tuple[str, int | float]]:
@@ -66,6 +147,15 @@ MQTT_PASS: TypeAlias = Annotated[
 ]
 
 
+class Payload(str, Enum):
+    homie = "homie"
+    json = "json"
+    compact = "compact"
+
+    def __str__(self) -> str:
+        return self.value
+
+
 def mqtt(
     ctx: typer.Context,
     topic: Annotated[str, typer.Option("--topic", "-t", help="mqtt root/topic")] = "homie/test",
@@ -73,21 +163,77 @@ def mqtt(
     port: MQTT_PORT = 1883,
     user: MQTT_USER = None,
     word: MQTT_PASS = None,
+    payload: Annotated[
+        Payload,
+        typer.Option("--payload", help="one message per measurement (homie), or per observation"),
+    ] = Payload.homie,
+    qos: Annotated[int, typer.Option("--qos", min=0, max=2, help="quality of service")] = 1,
+    retain: Annotated[
+        bool, typer.Option("--retain/--no-retain", help="retain the last message on the server")
+    ] = True,
+    outbox: OUTBOX = None,
+    outbox_rate: OUTBOX_RATE = None,
 ):
     """Read sensor and push PM measurements to a MQTT server"""
     try:
-        from .mqtt import publisher
+        from .mqtt import outbox_publisher, publisher
     except ModuleNotFoundError as e:  # pragma: no cover
         logger.debug(e)
         typer.echo(missing_extras(ctx.command_path, "mqtt"))
         raise typer.Abort() from e
 
-    publish = publisher(topic=topic, host=host, port=port, username=user, password=word)
+    if outbox:
+        stored = outbox_publisher(
+            topic=topic,
+            host=host,
+            port=port,
+            username=user,
+            password=word,
+            path=outbox,
+            qos=qos,
+            retain=retain,
+            max_rate=outbox_rate,
+        )
+        with exit_on_fail(ctx.obj["reader"]) as reader, stored:
+            sensor_name = reader.sensor.name
+            stored(data=dict(mqtt_payload(next(reader()), payload, sensor_name=sensor_name)))
+            for obs in reader():
+                stored(data=dict(mqtt_payload(obs, payload)))
+        return
+
+    publish = publisher(
+        topic=topic, host=host, port=port, username=user, password=word, qos=qos, retain=retain
+    )
 
     with exit_on_fail(ctx.obj["reader"]) as reader:
-        publish(dict(mqtt_messages(next(reader()), sensor_name=ctx.obj["reader"].sensor.name)))
+        sensor_name = reader.sensor.name
+        publish(dict(mqtt_payload(next(reader()), payload, sensor_name=sensor_name)))
         for obs in reader():
-            publish(dict(mqtt_messages(obs)))
+            publish(dict(mqtt_payload(obs, payload)))
+
+
+def mqtt_payload(
+    obs: ObsData, payload: Payload, *, sensor_name: str | None = None
+) -> Iterator[tuple[str, str | int | float]]:
+    """(sub-topic, payload) pairs for an observation
+
+    homie: one message per measurement, and Homie metadata on the first observation
+    json: a single `{"time": ..., measurement: value}` message on `json`
+    compact: a single `time,value,...` message on `compact`,
+             and the field names on `compact/$fields` (always retained) on the first observation
+    """
+    if payload == "homie":
+        yield from mqtt_messages(obs, sensor_name=sensor_name)
+        return
+
+    data = dict(db_measurements(obs))
+    if payload == "json":
+        yield "json", json.dumps({"time": obs.time, **data})
+        return
+
+    if sensor_name is not None:
+        yield "compact/$fields", ",".join(["time", *data])
+    yield "compact", ",".join(map(str, [obs.time, *data.values()]))
 
 
 def mqtt_messages(
@@ -143,6 +289,90 @@ def bridge(
     )
 
 
+class Sink(str, Enum):
+    influxdb = "influxdb"
+    mqtt = "mqtt"
+    sqlite = "sqlite"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+def backfill(
+    ctx: typer.Context,
+    captures: Annotated[list[Path], typer.Argument(help="captured messages", show_default=False)],
+    sink: Annotated[
+        Sink, typer.Option("--sink", help="where to push the measurements")
+    ] = Sink.sqlite,
+    batch_size: Annotated[
+        int, typer.Option("--batch-size", "-b", min=1, help="measurements per write")
+    ] = 5000,
+    db_host: DB_HOST = "influxdb",
+    db_port: DB_PORT = 8086,
+    db_user: DB_USER = "root",
+    db_pass: DB_PASS = "root",
+    db_name: DB_NAME = "homie",
+    jtag: Annotated[str, typer.Option("--tags", help="measurement tags")] = json.dumps(
+        {"location": "test"}
+    ),
+    multi_field: DB_MULTI_FIELD = False,
+    db_gzip: DB_GZIP = False,
+    mqtt_topic: Annotated[str, typer.Option("--mqtt-topic", help="mqtt root/topic")] = "homie/test",
+    mqtt_host: MQTT_HOST = "test.mosquitto.org",
+    mqtt_port: MQTT_PORT = 1883,
+    mqtt_user: MQTT_USER = None,
+    mqtt_pass: MQTT_PASS = None,
+    sqlite_db: Annotated[Path, typer.Option("--sqlite-db", help="database file")] = Path(
+        "pypms.sqlite"
+    ),
+):
+    """Decode captured messages and push PM measurements to InfluxDB, MQTT or SQLite in batches"""
+    sensor = ctx.obj["reader"].sensor
+    pub: Callable[[list[tuple[int, dict[str, int | float]]]], None]
+    try:
+        if sink == "influxdb":
+            from .influxdb import batch_publisher as influxdb_publisher
+
+            tags = json.loads(jtag)
+            influxdb_pub = influxdb_publisher(
+                host=db_host,
+                port=db_port,
+                username=db_user,
+                password=db_pass,
+                db_name=db_name,
+                measurement=sensor.name if multi_field else None,
+                gzip=db_gzip,
+            )
+            pub = partial(influxdb_pub, tags=tags)
+        elif sink == "mqtt":
+            from .mqtt import batch_publisher as mqtt_publisher
+
+            pub = mqtt_publisher(
+                topic=mqtt_topic,
+                host=mqtt_host,
+                port=mqtt_port,
+                username=mqtt_user,
+                password=mqtt_pass,
+            )
+        else:
+            from .sqlite import batch_publisher as sqlite_publisher
+
+            pub = sqlite_publisher(path=sqlite_db, table=sensor.name)
+    except ModuleNotFoundError as e:  # pragma: no cover
+        logger.debug(e)
+        typer.echo(missing_extras(ctx.command_path, str(sink)))
+        raise typer.Abort() from e
+
+    for path in captures:
+        total = 0
+        with exit_on_fail(MessageReader(path, sensor, ctx.obj["reader"].samples)) as reader:
+            measurements = ((obs.time, dict(db_measurements(obs))) for obs in reader())
+            while batch := list(islice(measurements, batch_size)):
+                pub(data=batch)
+                total += len(batch)
+        logger.debug(f"pushed {total} {sensor} observations from {path} to {sink}")
+
+
 def missing_extras(sub_cmd: str, *extras: str, package: str = "pypms") -> str:  # pragma: no cover
     from functools import partial
     from textwrap import dedent
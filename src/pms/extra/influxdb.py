@@ -1,8 +1,16 @@
 from __future__ import annotations
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import BoundedSemaphore, Lock, Thread
 from typing import Protocol
 
-from influxdb import InfluxDBClient as Client
+from loguru import logger
+
+from pms.extra.line_protocol import Client
+from pms.extra.outbox import Outbox
 
 
 class Publisher(Protocol):
@@ -11,21 +19,263 @@ class Publisher(Protocol):
     ) -> None: ...
 
 
-def publisher(*, host: str, port: int, username: str, password: str, db_name: str) -> Publisher:
-    """returns a function to publish to `db_name` at `host`"""
-    c = Client(host, port, username, password, None)
+class BatchPublisher(Protocol):
+    def __call__(
+        self, *, tags: dict[str, str], data: list[tuple[int, dict[str, int | float]]]
+    ) -> None: ...
+
+
+def client(
+    *, host: str, port: int, username: str, password: str, db_name: str, gzip: bool = False
+) -> Client:
+    """returns a client connected to `db_name` at `host`, create the DB if missing
+
+    With `gzip`, points are written on gzip compressed requests.
+    """
+    c = Client(host, port, username, password, None, gzip=gzip)
     if db_name not in {x["name"] for x in c.get_list_database()}:
         c.create_database(db_name)
     c.switch_database(db_name)
+    return c
+
+
+def points(
+    tags: dict[str, str], time: int, data: dict[str, int | float], measurement: str | None = None
+) -> list[dict]:
+    """one point per measurement, or a single multi-field point on `measurement`"""
+    if measurement is not None:
+        return [{"measurement": measurement, "tags": tags, "time": time, "fields": data}]
+    return [
+        {"measurement": k, "tags": tags, "time": time, "fields": {"value": v}}
+        for k, v in data.items()
+    ]
+
+
+def publisher(
+    *,
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    db_name: str,
+    measurement: str | None = None,
+    gzip: bool = False,
+) -> Publisher:
+    """returns a function to publish to `db_name` at `host`
+
+    With `measurement` (e.g. the sensor name), each observation is published
+    as a single point with one field per measurement.
+    """
+    c = client(
+        host=host, port=port, username=username, password=password, db_name=db_name, gzip=gzip
+    )
 
     def pub(*, time: int, tags: dict[str, str], data: dict[str, int | float]) -> None:
         """publisg to DB"""
+        c.write_points(points(tags, time, data, measurement), time_precision="s")
+
+    return pub
+
+
+def batch_publisher(
+    *,
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    db_name: str,
+    measurement: str | None = None,
+    gzip: bool = False,
+) -> BatchPublisher:
+    """returns a function to publish many observations to `db_name` at `host` on one request"""
+    c = client(
+        host=host, port=port, username=username, password=password, db_name=db_name, gzip=gzip
+    )
+
+    def pub(*, tags: dict[str, str], data: list[tuple[int, dict[str, int | float]]]) -> None:
+        """publish (time, measurements) pairs to DB"""
+        c.write_points(
+            [point for time, values in data for point in points(tags, time, values, measurement)],
+            time_precision="s",
+        )
+
+    return pub
+
+
+def outbox_publisher(
+    *,
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    db_name: str,
+    measurement: str | None = None,
+    gzip: bool = False,
+    path: Path,
+    batch_size: int = 500,
+    flush_interval: float = 0,
+    max_rate: float | None = None,
+) -> Outbox:
+    """returns an outbox to publish to `db_name` at `host`, see `pms.extra.outbox`
+
+    Observations are stored on `path` and published from a background thread,
+    on batches of `batch_size` (or after `flush_interval` seconds)
+    at most `max_rate` observations per second.
+    """
+    c: Client | None = None  # connect on the first publish, the server might be down
+
+    def send(items: list[dict]) -> None:
+        nonlocal c
+        if c is None:
+            c = client(
+                host=host,
+                port=port,
+                username=username,
+                password=password,
+                db_name=db_name,
+                gzip=gzip,
+            )
         c.write_points(
             [
-                {"measurement": k, "tags": tags, "time": time, "fields": {"value": v}}
-                for k, v in data.items()
+                point
+                for item in items
+                for point in points(item["tags"], item["time"], item["data"], measurement)
             ],
             time_precision="s",
         )
 
-    return pub
+    return Outbox(
+        path, send, batch_size=batch_size, flush_interval=flush_interval, max_rate=max_rate
+    )
+
+
+class BackgroundPublisher:
+    """
+    Publish to `db_name` at `host` from background threads, in batches
+
+    Points are queued and written when `batch_size` points are queued,
+    or `flush_interval` seconds after the first point on the batch was queued.
+    At most `concurrency` batches are written at the same time.
+    Points which do not fit on the queue (`max_queue` points) are dropped,
+    so a slow server never delays reading the sensor.
+    With `measurement`, each observation is a single multi-field point, as on `publisher`.
+
+    >>> with BackgroundPublisher(host="influxdb", ..., batch_size=500) as pub:
+    ...     for obs in reader():
+    ...         pub(time=obs.time, tags=tags, data=dict(db_measurements(obs)))
+    ...     print(pub.queue_depth, pub.sent, pub.dropped, pub.max_flush_latency)
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        db_name: str,
+        measurement: str | None = None,
+        gzip: bool = False,
+        batch_size: int = 5000,
+        flush_interval: float = 10,
+        max_queue: int = 100_000,
+        concurrency: int = 2,
+    ) -> None:
+        self.client = client(
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            db_name=db_name,
+            gzip=gzip,
+        )
+        self.measurement = measurement
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: Queue[dict | None] = Queue(max_queue)
+        self._slots = BoundedSemaphore(concurrency)
+        self._pool = ThreadPoolExecutor(concurrency, thread_name_prefix="influxdb")
+        self._lock = Lock()
+
+        # counters
+        self.sent = 0  # points written
+        self.batches = 0  # batches written
+        self.dropped = 0  # points dropped, queue full
+        self.failed = 0  # points on failed writes
+        self.flush_latency = 0.0  # seconds to write the last batch
+        self.max_flush_latency = 0.0
+
+        self._thread = Thread(target=self._collect, name="influxdb-batch", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """points waiting on the queue"""
+        return self.queue.qsize()
+
+    def __call__(self, *, time: int, tags: dict[str, str], data: dict[str, int | float]) -> None:
+        """queue points for publishing, never blocks"""
+        for point in points(tags, time, data, self.measurement):
+            try:
+                self.queue.put_nowait(point)
+            except Full:
+                with self._lock:
+                    self.dropped += 1
+                logger.warning(f"publish queue full, {self.dropped} points dropped so far")
+
+    def close(self) -> None:
+        """write the queued points and wait for all writes to finish"""
+        self.queue.put(None)
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+        logger.debug(
+            f"sent {self.sent} points on {self.batches} batches, "
+            f"{self.dropped} dropped, {self.failed} failed, "
+            f"max flush latency {self.max_flush_latency:.3f} sec"
+        )
+
+    def __enter__(self) -> BackgroundPublisher:
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.close()
+
+    def _collect(self) -> None:
+        """group queued points into batches, until the None sentinel"""
+        done = False
+        while not done:
+            point = self.queue.get()
+            if point is None:
+                return
+            batch = [point]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    point = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except Empty:  # flush interval
+                    break
+                if point is None:
+                    done = True
+                    break
+                batch.append(point)
+            self._slots.acquire()  # bounded concurrency
+            self._pool.submit(self._write, batch)
+
+    def _write(self, batch: list[dict]) -> None:
+        start = time.monotonic()
+        try:
+            self.client.write_points(batch, time_precision="s")
+        except Exception as e:
+            logger.error(f"failed to write {len(batch)} points: {e}")
+            with self._lock:
+                self.failed += len(batch)
+        else:
+            with self._lock:
+                self.sent += len(batch)
+                self.batches += 1
+        finally:
+            latency = time.monotonic() - start
+            with self._lock:
+                self.flush_latency = latency
+                self.max_flush_latency = max(self.max_flush_latency, latency)
+            self._slots.release()
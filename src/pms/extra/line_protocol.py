@@ -0,0 +1,156 @@
+"""
+InfluxDB 1.x line protocol client, on the standard library
+
+NOTE:
+- Only the InfluxDBClient (influxdb-python) methods used by `pms.extra.influxdb` are provided.
+- Points are encoded as line protocol, integers as `<value>i` as influxdb-python does,
+  so points written by either client end on the same series.
+- Each thread keeps its own persistent (keep-alive) connection,
+  which is re-opened once if the server closed it, reset it or did not answer on time.
+- With `gzip`, request bodies are gzip compressed.
+"""
+
+from __future__ import annotations
+
+import gzip as gz
+import json
+import math
+from base64 import b64encode
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from threading import local
+from urllib.parse import urlencode
+
+from loguru import logger
+
+
+class InfluxDBError(Exception):
+    """request rejected by the server"""
+
+
+def _escape(text: str, special: str) -> str:
+    for char in "\\" + special:
+        text = text.replace(char, f"\\{char}")
+    return text
+
+
+def _value(value: bool | int | float | str) -> str | None:
+    """field value on line protocol, None for values which can not be written"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return f"{value}i"
+    if isinstance(value, float):
+        return repr(value) if math.isfinite(value) else None
+    return f'"{_escape(str(value), chr(34))}"'
+
+
+def line(point: dict) -> str | None:
+    """a point as a line protocol line, None if the point has no fields to write"""
+    key = _escape(point["measurement"], ", ")
+    for tag, value in sorted(point.get("tags", {}).items()):
+        key += f",{_escape(tag, ',= ')}={_escape(str(value), ',= ')}"
+    fields = ",".join(
+        f"{_escape(name, ',= ')}={value}"
+        for name, value in ((name, _value(value)) for name, value in point["fields"].items())
+        if value is not None
+    )
+    if not fields:
+        return None
+    if point.get("time") is None:
+        return f"{key} {fields}"
+    return f"{key} {fields} {point['time']}"
+
+
+class Client:
+    """
+    Write points to an InfluxDB 1.x server over HTTP
+
+    >>> c = Client("influxdb", 8086, "root", "root", "homie", gzip=True)
+    >>> c.write_points([{"measurement": "pm25", "tags": {}, "time": 0, "fields": {"value": 1}}])
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8086,
+        username: str = "root",
+        password: str = "root",
+        database: str | None = None,
+        *,
+        ssl: bool = False,
+        gzip: bool = False,
+        timeout: float = 10,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.database = database
+        self.ssl = ssl
+        self.gzip = gzip
+        self.timeout = timeout
+        credentials = b64encode(f"{username}:{password}".encode()).decode()
+        self.headers = {"Authorization": f"Basic {credentials}"}
+        self._local = local()  # connection for each thread
+
+    @property
+    def connection(self) -> HTTPConnection:
+        """persistent connection for the current thread"""
+        if getattr(self._local, "connection", None) is None:
+            cls = HTTPSConnection if self.ssl else HTTPConnection
+            self._local.connection = cls(self.host, self.port, timeout=self.timeout)
+        return self._local.connection
+
+    def close(self) -> None:
+        """close the connection for the current thread"""
+        if getattr(self._local, "connection", None) is not None:
+            self._local.connection.close()
+            self._local.connection = None
+
+    def request(self, method: str, path: str, params: dict[str, str], body: bytes = b"") -> bytes:
+        """send a request, re-open the connection once if it failed (closed, reset or timed out)"""
+        headers = dict(self.headers)
+        if body and self.gzip:
+            body = gz.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        url = f"{path}?{urlencode(params)}"
+        for retry in (True, False):
+            try:
+                self.connection.request(method, url, body, headers)
+                response = self.connection.getresponse()
+                data = response.read()
+            except (HTTPException, OSError) as e:  # OSError covers ConnectionError and TimeoutError
+                self.close()
+                if not retry:
+                    raise
+                logger.debug(f"re-connect to {self.host}:{self.port} after {e!r}")
+                continue
+            if response.status >= 300:
+                raise InfluxDBError(f"{response.status} {response.reason}: {data.decode()}")
+            return data
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def get_list_database(self) -> list[dict[str, str]]:
+        data = json.loads(self.request("GET", "/query", {"q": "SHOW DATABASES"}))
+        return [
+            {"name": values[0]}
+            for result in data["results"]
+            for series in result.get("series", [])
+            for values in series.get("values", [])
+        ]
+
+    def create_database(self, dbname: str) -> None:
+        self.request("POST", "/query", {"q": f'CREATE DATABASE "{_escape(dbname, chr(34))}"'})
+
+    def switch_database(self, database: str) -> None:
+        self.database = database
+
+    def write_points(
+        self, points: list[dict], time_precision: str | None = None, database: str | None = None
+    ) -> bool:
+        lines = [text for text in map(line, points) if text is not None]
+        if not lines:
+            return True
+        params = {"db": database or self.database or ""}
+        if time_precision is not None:
+            params["precision"] = time_precision
+        self.request("POST", "/write", params, "\n".join(lines).encode())
+        return True
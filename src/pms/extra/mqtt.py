@@ -1,21 +1,30 @@
 from __future__ import annotations
 
+import json
 from collections.abc import Callable
+from pathlib import Path
+from time import monotonic, sleep
 from time import time as seconds_since_epoch
 from typing import NamedTuple, Protocol
 
 from loguru import logger
 from paho.mqtt.client import Client
 
+from pms.extra.outbox import Outbox
+
 
 class Publisher(Protocol):
     def __call__(self, data: dict[str, int | float | str]) -> None: ...
 
 
-def publisher(
+class BatchPublisher(Protocol):
+    def __call__(self, data: list[tuple[int, dict[str, int | float]]]) -> None: ...
+
+
+def client(
     *, topic: str, host: str, port: int, username: str | None, password: str | None
-) -> Publisher:
-    """returns function to publish to `topic` at `host`"""
+) -> Client:
+    """returns a client connected to `host`, which announces `topic` as online"""
     c = Client(client_id=topic)
     c.enable_logger()
     if username:  # pragma: no cover
@@ -27,14 +36,110 @@ def publisher(
     c.will_set(f"{topic}/$online", "false", 1, True)
     c.connect(host, port)
     c.loop_start()
+    return c
+
+
+def _retain(topic: str, retain: bool) -> bool:
+    """metadata (`$` sub-topics) is only published once, so it is always retained"""
+    return retain or topic.rsplit("/", 1)[-1].startswith("$")
+
+
+def publisher(
+    *,
+    topic: str,
+    host: str,
+    port: int,
+    username: str | None,
+    password: str | None,
+    qos: int = 1,
+    retain: bool = True,
+) -> Publisher:
+    """returns function to publish to `topic` at `host`, one message per `data` item
+
+    Metadata items (e.g. `compact/$fields`) are retained, regardless of `retain`.
+    """
+    c = client(topic=topic, host=host, port=port, username=username, password=password)
 
     def pub(data: dict[str, int | float | str]) -> None:
         for k, v in data.items():
-            c.publish(f"{topic}/{k}", v, 1, True)
+            c.publish(f"{topic}/{k}", v, qos, _retain(k, retain))
+
+    return pub
+
+
+def batch_publisher(
+    *, topic: str, host: str, port: int, username: str | None, password: str | None
+) -> BatchPublisher:
+    """returns function to publish many observations to `topic`/backfill at `host`
+
+    Each batch is published as a single JSON message, a list of `{"time": ..., field: value}`
+    objects, and delivered (QoS 1) before the function returns.
+    Batches are published on their own connection, which does not announce `topic` as online
+    and does not take over the client id from a live `publisher` on the same `topic`.
+    """
+
+    def pub(data: list[tuple[int, dict[str, int | float]]]) -> None:
+        payload = json.dumps([{"time": time, **values} for time, values in data])
+        c = Client(client_id=f"{topic}/backfill")
+        c.enable_logger()
+        if username:  # pragma: no cover
+            c.username_pw_set(username, password)
+        c.connect(host, port)
+        c.loop_start()
+        try:
+            c.publish(f"{topic}/backfill", payload, 1, False).wait_for_publish()
+        finally:
+            c.disconnect()
+            c.loop_stop()
 
     return pub
 
 
+def outbox_publisher(
+    *,
+    topic: str,
+    host: str,
+    port: int,
+    username: str | None,
+    password: str | None,
+    path: Path,
+    qos: int = 1,
+    retain: bool = True,
+    batch_size: int = 500,
+    max_rate: float | None = None,
+    timeout: float = 10,
+) -> Outbox:
+    """returns an outbox to publish to `topic` at `host`, see `pms.extra.outbox`
+
+    Observations are stored on `path` and published from a background thread,
+    on batches of `batch_size` at most `max_rate` observations per second.
+    Messages are only published while connected, and each batch is delivered
+    before the next one, so at most one batch is queued in memory.
+    """
+    c: Client | None = None  # connect on the first publish, the server might be down
+
+    def send(items: list[dict]) -> None:
+        nonlocal c
+        if c is None:
+            c = client(topic=topic, host=host, port=port, username=username, password=password)
+            deadline = monotonic() + timeout
+            while not c.is_connected() and monotonic() < deadline:
+                sleep(0.1)
+        if not c.is_connected():
+            raise ConnectionError(f"not connected to {host}:{port}")
+        messages = [
+            c.publish(f"{topic}/{k}", v, qos, _retain(k, retain))
+            for item in items
+            for k, v in item["data"].items()
+        ]
+        for message in messages:
+            message.wait_for_publish(timeout)
+            if not message.is_published():
+                raise ConnectionError(f"message not delivered to {host}:{port}")
+
+    return Outbox(path, send, batch_size=batch_size, max_rate=max_rate)
+
+
 class Data(NamedTuple):
     time: int
     location: str
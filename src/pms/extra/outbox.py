@@ -0,0 +1,235 @@
+"""
+Durable on-disk outbox for the extra sinks
+
+NOTE:
+- Observations are appended to JSON lines segment files under the outbox directory,
+  and published from a background thread, so a slow or unreachable sink never blocks
+  the caller, and unpublished observations survive long outages and restarts.
+- Only the batch being published is kept in memory, the backlog is only limited by disk space.
+- Stored observations are published in order, in batches of `batch_size`,
+  at most `max_rate` observations per second. A batch is published once full,
+  or `flush_interval` seconds after its first observation was stored.
+- The replay position is kept on a `cursor` file, and published segments are deleted.
+  Observations are published at least once, a batch can be published again
+  if the process is stopped before its position was saved.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Any, NamedTuple, TextIO
+
+from loguru import logger
+
+"""bytes written on a segment before starting a new one"""
+SEGMENT_SIZE = 16 * 1024 * 1024
+
+"""observations published at the time, at most"""
+BATCH_SIZE = 500
+
+
+class Cursor(NamedTuple):
+    segment: int
+    offset: int
+
+
+class Outbox:
+    """
+    Store observations on `path`, and publish them with `send` from a background thread
+
+    `send` publishes a batch of observations, and raises if they could not be published.
+    Observations are keyword arguments, and must be JSON serializable.
+
+    >>> with Outbox(Path("outbox"), send, max_rate=100) as pub:
+    ...     for obs in reader():
+    ...         pub(time=obs.time, tags=tags, data=dict(db_measurements(obs)))
+    ...     print(pub.pending, pub.stored, pub.replayed)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        send: Callable[[list[dict[str, Any]]], None],
+        *,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = 0,
+        max_rate: float | None = None,
+        retry: float = 30,
+        segment_size: int = SEGMENT_SIZE,
+    ) -> None:
+        self.path = path
+        self.send = send
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_rate = max_rate
+        self.retry = retry
+        self.segment_size = segment_size
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
+        self._file: TextIO | None = None  # segment open for append, started on each run
+        self._cursor = self._load()
+        self._retry_at = 0.0  # monotonic time for the next replay attempt
+        self._since = 0.0  # monotonic time the oldest pending observation was stored
+
+        # counters
+        self.pending = sum(1 for _ in self._lines(self._cursor))  # stored, not yet published
+        self.stored = 0  # observations stored on this run
+        self.replayed = 0  # stored observations published on this run
+        if self.pending:
+            logger.info(f"{self.pending} observations on {self.path} from previous runs")
+
+        self._thread = Thread(target=self._replay, name="outbox", daemon=True)
+        self._thread.start()
+        if self.pending:
+            self._wake.set()
+
+    def __call__(self, **item: Any) -> None:
+        """store an observation, it is published from the background thread"""
+        with self._lock:
+            self._append(item)
+        self._wake.set()
+
+    def close(self, timeout: float = 10) -> None:
+        """stop replaying, observations not yet published stay on the outbox
+
+        Pending observations are published for up to `timeout` seconds, unless `send` fails,
+        so the latest observations are not held back until the next run.
+        """
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        deadline = time.monotonic() + timeout
+        while self.pending and self._retry_at <= time.monotonic() < deadline:
+            self._publish()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        logger.debug(
+            f"stored {self.stored} and replayed {self.replayed} observations, "
+            f"{self.pending} pending on {self.path}"
+        )
+
+    def __enter__(self) -> Outbox:
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.close()
+
+    def _segments(self) -> list[int]:
+        return sorted(int(path.stem) for path in self.path.glob("*.jsonl"))
+
+    def _segment(self, segment: int) -> Path:
+        return self.path / f"{segment:08d}.jsonl"
+
+    def _load(self) -> Cursor:
+        """replay position from previous runs"""
+        try:
+            segment, offset = map(int, (self.path / "cursor").read_text().split())
+        except (FileNotFoundError, ValueError):
+            segments = self._segments()
+            return Cursor(segments[0] if segments else 0, 0)
+        return Cursor(segment, offset)
+
+    def _save(self, cursor: Cursor) -> None:
+        """replace the cursor file, so it is never left half written"""
+        tmp = self.path / "cursor.tmp"
+        tmp.write_text(f"{cursor.segment} {cursor.offset}\n")
+        os.replace(tmp, self.path / "cursor")
+        for segment in self._segments():  # delete published segments
+            if segment >= cursor.segment:
+                break
+            self._segment(segment).unlink()
+        self._cursor = cursor
+
+    def _append(self, item: dict[str, Any]) -> None:
+        if self._file is None or self._file.tell() >= self.segment_size:
+            if self._file is not None:
+                self._file.close()
+            segments = self._segments()
+            segment = max(segments[-1] + 1 if segments else 0, self._cursor.segment)
+            logger.debug(f"store observations on {self._segment(segment)}")
+            self._file = self._segment(segment).open("a")
+        self._file.write(json.dumps(item) + "\n")
+        self._file.flush()
+        if not self.pending:
+            self._since = time.monotonic()
+        self.pending += 1
+        self.stored += 1
+
+    def _lines(self, cursor: Cursor) -> Iterator[tuple[str, Cursor]]:
+        """stored lines after `cursor`, with the position after each line"""
+        for segment in self._segments():
+            if segment < cursor.segment:
+                continue
+            with self._segment(segment).open() as file:
+                if segment == cursor.segment:
+                    file.seek(cursor.offset)
+                while line := file.readline():
+                    if not line.endswith("\n"):  # stopped while writing
+                        logger.warning(f"skip incomplete line on {self._segment(segment)}")
+                        break
+                    yield line, Cursor(segment, file.tell())
+
+    def _batch(self) -> tuple[list[dict[str, Any]], Cursor]:
+        """next batch of stored observations, and the position after it"""
+        batch: list[dict[str, Any]] = []
+        cursor = self._cursor
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            for line, cursor in self._lines(self._cursor):
+                batch.append(json.loads(line))
+                if len(batch) >= self.batch_size:
+                    break
+        return batch, cursor
+
+    def _due(self) -> float | None:
+        """seconds before the next batch is due, None while there is nothing to publish"""
+        if not self.pending:
+            return None
+        due = self._retry_at
+        if self.pending < self.batch_size:  # wait for a full batch
+            due = max(due, self._since + self.flush_interval)
+        return max(due - time.monotonic(), 0)
+
+    def _publish(self) -> int | None:
+        """publish the next batch, returns the observations published or None if `send` failed"""
+        batch, cursor = self._batch()
+        if not batch:  # only incomplete lines left
+            with self._lock:
+                self._save(cursor)
+                self.pending = 0
+            return 0
+        try:
+            self.send(batch)
+        except Exception as e:
+            logger.warning(f"{self.pending} observations on {self.path}, {e}")
+            self._retry_at = time.monotonic() + self.retry
+            return None
+        with self._lock:
+            self._save(cursor)
+            self.pending -= len(batch)
+            self.replayed += len(batch)
+        logger.debug(f"replayed {len(batch)} observations, {self.pending} pending")
+        return len(batch)
+
+    def _replay(self) -> None:
+        """publish stored observations on the background, until closed"""
+        while not self._stop.is_set():
+            delay = self._due()
+            if delay != 0:  # wait for new observations, a full batch or the next retry
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+            start = time.monotonic()
+            published = self._publish()
+            if published and self.max_rate:
+                self._stop.wait(published / self.max_rate - (time.monotonic() - start))
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from contextlib import closing
+from pathlib import Path
+from sqlite3 import connect
+from typing import Protocol
+
+
+class BatchPublisher(Protocol):
+    def __call__(self, data: list[tuple[int, dict[str, int | float]]]) -> None: ...
+
+
+def batch_publisher(*, path: Path, table: str) -> BatchPublisher:
+    """returns a function to insert many observations into `table` at `path`
+
+    The table is created on the first batch, with one column per measurement.
+    Observations already on the table (same time) are ignored.
+    """
+    db = connect(path)
+
+    def pub(data: list[tuple[int, dict[str, int | float]]]) -> None:
+        if not data:
+            return
+        names = ["time", *data[0][1]]
+        columns = ", ".join(f'"{name}"' for name in names)
+        with db, closing(db.cursor()) as cur:
+            cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{table}" (
+                time INTEGER NOT NULL,
+                {", ".join(f'"{name}" REAL' for name in names[1:])},
+                UNIQUE (time)
+            )
+            """)
+            cur.executemany(
+                f"""
+                INSERT OR IGNORE INTO "{table}"
+                    ({columns})
+                VALUES
+                    ({", ".join(f":{name}" for name in names)})
+                """,
+                ({"time": time, **values} for time, values in data),
+            )
+
+    return pub
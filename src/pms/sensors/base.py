@@ -1,17 +1,20 @@
 from __future__ import annotations
 
+import struct
 import warnings
 from abc import abstractmethod
 from dataclasses import asdict, dataclass
-from typing import ClassVar, Literal
-
-from loguru import logger
+from functools import cache
+from typing import TYPE_CHECKING, ClassVar, Literal
 
 from pms import WrongMessageFormat
 from pms.core.types import Cmd, Commands
 from pms.core.types import Message as MessageProtocol
 from pms.core.types import ObsData as ObsDataProtocol
 
+if TYPE_CHECKING:
+    import numpy as np
+
 __all__ = ["Cmd", "Commands", "Message", "ObsData"]
 
 
@@ -21,7 +24,6 @@ class Message(MessageProtocol):
     data_records: ClassVar[slice]
 
     def __init__(self, message: bytes) -> None:
-        logger.debug(f"message hex: {message.hex()}")
         self.message = message
 
     @classmethod
@@ -38,9 +40,7 @@ class Message(MessageProtocol):
             msg = cls._validate(message[start : start + length], header, length)
 
         # data: unpacked payload
-        payload = cls._unpack(msg.payload)
-        logger.debug(f"message payload: {payload}")
-        return payload
+        return cls._unpack(msg.payload)
 
     @classmethod
     def decode(cls, message: bytes, command: Cmd) -> tuple[float, ...]:
@@ -48,6 +48,40 @@ class Message(MessageProtocol):
         length = command.answer_length
         return cls.unpack(message, header, length)[cls.data_records]
 
+    @classmethod
+    def frame(cls, message: bytes, header: bytes, length: int) -> bytes:
+        """Last complete message on buffer, empty if none was found"""
+        if len(message) == length:
+            return message
+        start = message.rfind(header, 0, len(header) - length)
+        if start < 0:  # No match found
+            return b""
+        return message[start : start + length]
+
+    @classmethod
+    def frame_length(cls, buffer: bytes | bytearray, length: int) -> int:
+        """Length of the message at the start of the buffer, 0 if the message is incomplete"""
+        return length if len(buffer) >= length else 0
+
+    @classmethod
+    def decode_many(cls, frames: np.ndarray, command: Cmd) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Validate and unpack many messages at once
+
+        frames: 2D array of bytes, one message per row
+        returns: mask of valid messages and structured array with the unpacked data records
+        """
+        from pms.core.batch import struct_dtype
+
+        header = command.answer_header
+        valid, payload = cls._validate_many(frames)
+        valid &= (frames[:, : len(header)] == list(header)).all(axis=1)
+
+        dtype = struct_dtype(cls._unpack_format(payload.shape[1]))
+        data = payload.copy().view(dtype).reshape(-1)
+        names = list(dtype.names or ())[cls.data_records]
+        return valid, data[names]
+
     @property
     @abstractmethod
     def header(self) -> bytes:
@@ -68,11 +102,28 @@ class Message(MessageProtocol):
     def _validate(cls, message: bytes, header: bytes, length: int) -> Message:
         pass
 
+    @classmethod
+    @abstractmethod
+    def _validate_many(cls, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """vectorized `_validate`, returns mask of valid messages and payload"""
+        pass
+
     @staticmethod
     @abstractmethod
-    def _unpack(message: bytes) -> tuple[float, ...]:
+    def _unpack_format(length: int) -> str:
+        """struct format for a payload of `length` bytes"""
         pass
 
+    @classmethod
+    def _unpack(cls, message: bytes) -> tuple[float, ...]:
+        return _struct(cls._unpack_format(len(message))).unpack(message)
+
+
+@cache
+def _struct(format: str) -> struct.Struct:
+    """compiled struct format"""
+    return struct.Struct(format)
+
 
 @dataclass
 class ObsData(ObsDataProtocol):
@@ -115,6 +166,13 @@ class ObsData(ObsDataProtocol):
     def __str__(self) -> str:
         return self.__format__("pm")
 
+    @classmethod
+    def _post_init_many(cls, data: np.ndarray) -> np.ndarray:
+        """vectorized `__post_init__`, returns mask of consistent observations"""
+        import numpy as np
+
+        return np.ones(data.shape, dtype=bool)
+
 
 def metadata(long_name: str, units: str, topic: str):
     """For fields(metadata=metadata(...))"""
@@ -3,14 +3,19 @@ Bosh Sensortec sensors on MCU bridge modules
 - messages are 7-20b long
 """
 
-import struct
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from functools import cache
+from typing import TYPE_CHECKING, Literal
 
 from pms import SensorWarmingUp, WrongMessageChecksum, WrongMessageFormat
 
 from .. import base
 
+if TYPE_CHECKING:
+    import numpy as np
+
 ALIASES = ("BME680",)
 
 commands = base.Commands(
@@ -40,13 +45,18 @@ class Message(base.Message):
         return self.message[-1]
 
     @classmethod
-    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+    @cache
+    def _check_signature(cls, header: bytes, length: int) -> None:
         # consistency check: bug in message singnature
         assert len(header) == 4, f"wrong header length {len(header)}"
         assert header[:2] == b"ZZ", f"wrong header start {header!r}"
         len_payload = header[-1]
         assert length == len_payload + 5, f"wrong payload length {length}"
 
+    @classmethod
+    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+        cls._check_signature(header, length)
+
         # validate message: recoverable errors (throw away observation)
         msg = cls(message)
         if msg.header != header:
@@ -60,9 +70,16 @@ class Message(base.Message):
             raise SensorWarmingUp("message empty: warming up sensor")
         return msg
 
+    @classmethod
+    def _validate_many(cls, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        header, payload = frames[:, :4], frames[:, 4:-1]
+        valid = frames[:, -1] == (header.sum(axis=1) + payload.sum(axis=1)) % 0x100
+        valid &= payload.any(axis=1)
+        return valid, payload
+
     @staticmethod
-    def _unpack(message: bytes) -> tuple[int, ...]:
-        return struct.unpack(">hHHBHLh", message)
+    def _unpack_format(length: int) -> str:
+        return ">hHHBHLh"
 
 
 @dataclass(frozen=False)
@@ -109,6 +126,16 @@ class ObsData(base.ObsData):
         self.IAQ &= 0x0FFF
         self.gas /= 1000
 
+    @classmethod
+    def _post_init_many(cls, data: np.ndarray) -> np.ndarray:
+        data["temp"] /= 100
+        data["rhum"] /= 100
+        data["pres"] = (data["pres"].astype("i8") << 8 | data["IAQ_acc"]) / 100
+        data["IAQ_acc"] = data["IAQ"] >> 4
+        data["IAQ"] &= 0x0FFF
+        data["gas"] /= 1000
+        return super()._post_init_many(data)
+
     def __format__(self, spec: Literal["atm", "bme", "bsec", "csv", "header"] | str) -> str:
         match spec:
             case "atm":
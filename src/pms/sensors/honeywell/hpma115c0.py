@@ -10,6 +10,8 @@ from typing import Literal
 from .. import base
 from . import hpma115s0
 
+ACTIVE_MODE = hpma115s0.ACTIVE_MODE
+
 commands = hpma115s0.commands._replace(
     passive_read=base.Cmd(  # Read Particle Measuring Results
         b"\x68\x01\x04\x93", b"\x40\x0d\x04", 16
@@ -4,14 +4,21 @@ Honeywell HPMA115S0 sensors
 - active mode messages are 32b long
 """
 
-import struct
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from functools import cache
+from typing import TYPE_CHECKING, Literal
 
 from pms import SensorWarmingUp, WrongMessageChecksum, WrongMessageFormat
 
 from .. import base
 
+if TYPE_CHECKING:
+    import numpy as np
+
+ACTIVE_MODE = False  # active mode messages are not supported
+
 commands = base.Commands(
     passive_read=base.Cmd(  # Read Particle Measuring Results
         b"\x68\x01\x04\x93", b"\x40\x05\x04", 8
@@ -50,12 +57,17 @@ class Message(base.Message):
         return super().decode(message, command)
 
     @classmethod
-    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+    @cache
+    def _check_signature(cls, header: bytes, length: int) -> None:
         # consistency check: bug in message singnature
         assert len(header) == 3, f"wrong header length {len(header)}"
         assert header[:1] == b"\x40", f"wrong header start {header!r}"
         assert length in [8, 16], f"wrong payload length {length}"
 
+    @classmethod
+    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+        cls._check_signature(header, length)
+
         # validate message: recoverable errors (throw away observation)
         msg = cls(message)
         if msg.header != header:
@@ -69,9 +81,17 @@ class Message(base.Message):
             raise SensorWarmingUp("message empty: warming up sensor")
         return msg
 
+    @classmethod
+    def _validate_many(cls, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        header, payload = frames[:, :3], frames[:, 3:-1]
+        checksum = (0x10000 - header.sum(axis=1) - payload.sum(axis=1)) % 0x100
+        valid = frames[:, -1] == checksum
+        valid &= payload.any(axis=1)
+        return valid, payload
+
     @staticmethod
-    def _unpack(message: bytes) -> tuple[int, ...]:
-        return struct.unpack(f">{len(message) // 2}H", message)
+    def _unpack_format(length: int) -> str:
+        return f">{length // 2}H"
 
 
 @dataclass(frozen=False)
@@ -3,14 +3,19 @@ NovaFitness SDS011, SDS018 and SDS021 sensors
 - messages are 10b long
 """
 
-import struct
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from functools import cache
+from typing import TYPE_CHECKING, Literal
 
 from pms import SensorWarmingUp, WrongMessageChecksum, WrongMessageFormat
 
 from .. import base
 
+if TYPE_CHECKING:
+    import numpy as np
+
 ALIASES = ("SDS011", "SDS018", "SDS021")
 
 
@@ -65,12 +70,17 @@ class Message(base.Message):
         return self.message[-1]
 
     @classmethod
-    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+    @cache
+    def _check_signature(cls, header: bytes, length: int) -> None:
         # consistency check: bug in message singnature
         assert len(header) == 2, f"wrong header length {len(header)}"
         assert header[:1] == b"\xaa", f"wrong header start {header!r}"
         assert length == 10, f"wrong payload length {length} != 10"
 
+    @classmethod
+    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+        cls._check_signature(header, length)
+
         # validate message: recoverable errors (throw away observation)
         msg = cls(message)
         if msg.header != header:
@@ -86,9 +96,17 @@ class Message(base.Message):
             raise SensorWarmingUp("message empty: warming up sensor")
         return msg
 
+    @classmethod
+    def _validate_many(cls, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        payload = frames[:, 2:-2]
+        valid = frames[:, -1] == 0xAB
+        valid &= frames[:, -2] == payload.sum(axis=1) % 0x100
+        valid &= payload[:, :-2].any(axis=1)
+        return valid, payload
+
     @staticmethod
-    def _unpack(message: bytes) -> tuple[int, ...]:
-        return struct.unpack(f"<{len(message) // 2}H", message)
+    def _unpack_format(length: int) -> str:
+        return f"<{length // 2}H"
 
 
 @dataclass(frozen=False)
@@ -114,6 +132,12 @@ class ObsData(base.ObsData):
         self.pm25 /= 10
         self.pm10 /= 10
 
+    @classmethod
+    def _post_init_many(cls, data: np.ndarray) -> np.ndarray:
+        data["pm25"] /= 10
+        data["pm10"] /= 10
+        return super()._post_init_many(data)
+
     def __format__(self, spec: Literal["pm", "csv", "header"] | str) -> str:
         match spec:
             case "pm":
@@ -4,14 +4,19 @@ Plantower PMS3003 sensors
 - messages are 24b long
 """
 
-import struct
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from functools import cache
+from typing import TYPE_CHECKING, Literal
 
 from pms import SensorWarmingUp, WrongMessageChecksum, WrongMessageFormat
 
 from .. import base
 
+if TYPE_CHECKING:
+    import numpy as np
+
 ALIASES = ("G3",)
 
 
@@ -39,16 +44,21 @@ class Message(base.Message):
 
     @property
     def checksum(self) -> int:
-        return self._unpack(self.message[-2:])[0]
+        return int.from_bytes(self.message[-2:], "big")
 
     @classmethod
-    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+    @cache
+    def _check_signature(cls, header: bytes, length: int) -> None:
         # consistency check: bug in message singnature
         assert len(header) == 4, f"wrong header length {len(header)}"
         assert header[:2] == b"BM", f"wrong header start {header!r}"
         len_payload = cls._unpack(header[-2:])[0]
         assert length == 4 + len_payload, f"wrong payload length {length} != {4 + len_payload}"
 
+    @classmethod
+    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+        cls._check_signature(header, length)
+
         # validate message: recoverable errors (throw away observation)
         msg = cls(message)
         if msg.header != header:
@@ -62,9 +72,17 @@ class Message(base.Message):
             raise SensorWarmingUp("message empty: warming up sensor")
         return msg
 
+    @classmethod
+    def _validate_many(cls, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        header, payload = frames[:, :4], frames[:, 4:-2]
+        checksum = frames[:, -2].astype("u2") << 8 | frames[:, -1]
+        valid = checksum == header.sum(axis=1) + payload.sum(axis=1)
+        valid &= payload.any(axis=1)
+        return valid, payload
+
     @staticmethod
-    def _unpack(message: bytes) -> tuple[int, ...]:
-        return struct.unpack(f">{len(message) // 2}H", message)
+    def _unpack_format(length: int) -> str:
+        return f">{length // 2}H"
 
 
 @dataclass(frozen=False)
@@ -4,12 +4,17 @@ Plantower PMS5003S sensors
 - 6 size bins (as PMS5003) and HCHO concentration
 """
 
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 from .. import base
 from . import pms3003, pmsx003
 
+if TYPE_CHECKING:
+    import numpy as np
+
 commands = pmsx003.commands
 
 
@@ -44,6 +49,12 @@ class ObsData(pmsx003.ObsData):
         super().__post_init__()
         self.HCHO /= 1000
 
+    @classmethod
+    def _post_init_many(cls, data: np.ndarray) -> np.ndarray:
+        valid = super()._post_init_many(data)
+        data["HCHO"] /= 1000
+        return valid
+
     def __format__(
         self, spec: Literal["pm", "raw", "cf", "num", "hcho", "csv", "header"] | str
     ) -> str:
@@ -4,13 +4,17 @@ Plantower PMS5003ST sensors
 - 6 size bins (as PMS5003). HCHO concentration, temperature and relative humidity
 """
 
-import struct
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 from .. import base
 from . import pms3003, pms5003s, pmsx003
 
+if TYPE_CHECKING:
+    import numpy as np
+
 commands = base.Commands(
     passive_read=base.Cmd(pmsx003.commands.passive_read.command, b"\x42\x4d\x00\x24", 40),
     passive_mode=pmsx003.commands.passive_mode,
@@ -26,12 +30,12 @@ class Message(pms3003.Message):
     data_records = slice(15)
 
     @staticmethod
-    def _unpack(message: bytes) -> tuple[int, ...]:
-        if len(message) == 34:
+    def _unpack_format(length: int) -> str:
+        if length == 34:
             # 14th record is signed (temp)
-            return struct.unpack(">13Hh3H", message)
+            return ">13Hh3H"
         else:
-            return pms3003.Message._unpack(message)
+            return pms3003.Message._unpack_format(length)
 
 
 @dataclass(frozen=False)
@@ -65,6 +69,13 @@ class ObsData(pms5003s.ObsData):
         self.temp /= 10
         self.rhum /= 10
 
+    @classmethod
+    def _post_init_many(cls, data: np.ndarray) -> np.ndarray:
+        valid = super()._post_init_many(data)
+        data["temp"] /= 10
+        data["rhum"] /= 10
+        return valid
+
     def __format__(
         self, spec: Literal["pm", "raw", "cf", "num", "hcho", "atm", "csv", "header"] | str
     ) -> str:
@@ -4,15 +4,19 @@ Plantower PMS5003T sensors
 - only 4 size bins
 """
 
-import struct
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 from pms import InconsistentObservation
 
 from .. import base
 from . import pms3003, pmsx003
 
+if TYPE_CHECKING:
+    import numpy as np
+
 commands = pmsx003.commands
 
 
@@ -22,12 +26,12 @@ class Message(pms3003.Message):
     data_records = slice(12)
 
     @staticmethod
-    def _unpack(message: bytes) -> tuple[int, ...]:
-        if len(message) == 26:
+    def _unpack_format(length: int) -> str:
+        if length == 26:
             # 11th record is signed (temp)
-            return struct.unpack(">10Hh2H", message)
+            return ">10Hh2H"
         else:
-            return pms3003.Message._unpack(message)
+            return pms3003.Message._unpack_format(length)
 
 
 @dataclass(frozen=False)
@@ -72,6 +76,14 @@ class ObsData(pms3003.ObsData):
                 f"inconsistent obs: PM10={self.pm10} and N0.3={self.n0_3}"
             )
 
+    @classmethod
+    def _post_init_many(cls, data: np.ndarray) -> np.ndarray:
+        for name in ("n0_3", "n0_5", "n1_0", "n2_5"):
+            data[name] /= 100
+        data["temp"] /= 10
+        data["rhum"] /= 10
+        return ~((data["n0_3"] == 0) & (data["pm10"] > 0))
+
     def __format__(
         self, spec: Literal["pm", "raw", "cf", "num", "atm", "csv", "header"] | str
     ) -> str:
@@ -3,14 +3,19 @@ Plantower PMS1003, PMS5003, PMS7003 and PMSA003 sensors
 - messages are 32b long
 """
 
+from __future__ import annotations
+
 from dataclasses import dataclass
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 from pms import InconsistentObservation
 
 from .. import base
 from . import pms3003
 
+if TYPE_CHECKING:
+    import numpy as np
+
 ALIASES = ("PMS1003", "G1", "PMS5003", "G5", "PMS7003", "G7", "PMSA003", "G10")
 
 PREHEAT = 10  # 10 seconds
@@ -65,6 +70,12 @@ class ObsData(pms3003.ObsData):
                 f"inconsistent obs: PM10={self.pm10} and N0.3={self.n0_3}"
             )
 
+    @classmethod
+    def _post_init_many(cls, data: np.ndarray) -> np.ndarray:
+        for name in ("n0_3", "n0_5", "n1_0", "n2_5", "n5_0", "n10_0"):
+            data[name] /= 100
+        return ~((data["n0_3"] == 0) & (data["pm10"] > 0))
+
     def __format__(self, spec: Literal["pm", "raw", "cf", "num", "csv", "header"] | str) -> str:
         match spec:
             case "csv":
@@ -6,14 +6,19 @@ Sensirion SPS30 sensors
 - empty read messages are 7b long
 """
 
-import struct
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from functools import cache
+from typing import TYPE_CHECKING, Literal
 
 from pms import SensorWarmingUp, WrongMessageChecksum, WrongMessageFormat
 
 from .. import base
 
+if TYPE_CHECKING:
+    import numpy as np
+
 BAUD = 115_200
 
 commands = base.Commands(
@@ -42,7 +47,21 @@ class Message(base.Message):
         if message.endswith(b"\x7e\x00\x03\x00\x00\xfc\x7e"):
             raise SensorWarmingUp("short message: no data")
 
-        # byte de-stuffing
+        return super().unpack(cls._destuff(message), header, length)
+
+    @classmethod
+    def frame(cls, message: bytes, header: bytes, length: int) -> bytes:
+        return super().frame(cls._destuff(message), header, length)
+
+    @classmethod
+    def frame_length(cls, buffer: bytes | bytearray, length: int) -> int:
+        # stuffed messages are longer than `length`, read until the tail
+        tail = buffer.find(b"\x7e", 1)
+        return tail + 1 if tail > 0 else 0
+
+    @staticmethod
+    def _destuff(message: bytes) -> bytes:
+        """byte de-stuffing"""
         for k, v in {
             b"\x7d\x5e": b"\x7e",
             b"\x7d\x5d": b"\x7d",
@@ -51,7 +70,7 @@ class Message(base.Message):
         }.items():
             if k in message:
                 message = message.replace(k, v)
-        return super().unpack(message, header, length)
+        return message
 
     @property
     def header(self) -> bytes:
@@ -70,7 +89,8 @@ class Message(base.Message):
         return self.message[-1]
 
     @classmethod
-    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+    @cache
+    def _check_signature(cls, header: bytes, length: int) -> None:
         # consistency check: bug in message singnature
         assert len(header) == 5, f"wrong header length {len(header)}"
         assert header[:2] == b"\x7e\x00", f"wrong header start {header!r}"
@@ -78,6 +98,10 @@ class Message(base.Message):
         len_payload = header[-1]
         assert length == len_payload + 7, f"wrong payload length {length} != {len_payload + 7}"
 
+    @classmethod
+    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+        cls._check_signature(header, length)
+
         # validate message: recoverable errors (throw away observation)
         msg = cls(message)
         if msg.header != header:
@@ -93,9 +117,18 @@ class Message(base.Message):
             raise SensorWarmingUp("message empty: warming up sensor")
         return msg
 
+    @classmethod
+    def _validate_many(cls, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        header, payload = frames[:, :5], frames[:, 5:-2]
+        checksum = 0xFF - (header[:, 1:].sum(axis=1) + payload.sum(axis=1)) % 0x100
+        valid = frames[:, -1] == 0x7E
+        valid &= frames[:, -2] == checksum
+        valid &= payload.any(axis=1)
+        return valid, payload
+
     @staticmethod
-    def _unpack(message: bytes) -> tuple[float, ...]:
-        return struct.unpack(f">{len(message) // 4}f", message)
+    def _unpack_format(length: int) -> str:
+        return f">{length // 4}f"
 
 
 @dataclass(frozen=False)
@@ -4,14 +4,19 @@ Winsen MH-Z19B sensors
 - messages are 9b long
 """
 
-import struct
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from functools import cache
+from typing import TYPE_CHECKING, Literal
 
 from pms import SensorWarmingUp, WrongMessageChecksum, WrongMessageFormat
 
 from .. import base
 
+if TYPE_CHECKING:
+    import numpy as np
+
 PREHEAT = 180  # 3 minutes
 
 commands = base.Commands(
@@ -43,10 +48,15 @@ class Message(base.Message):
         return 0x100 - sum(self.message[1:-1]) % 0x100
 
     @classmethod
-    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+    @cache
+    def _check_signature(cls, header: bytes, length: int) -> None:
         # consistency check: bug in message singnature
         assert len(header) == 2, f"wrong header length {len(header)}"
 
+    @classmethod
+    def _validate(cls, message: bytes, header: bytes, length: int) -> base.Message:
+        cls._check_signature(header, length)
+
         # validate message: recoverable errors (throw away observation)
         msg = cls(message)
         if msg.header != header:
@@ -60,9 +70,16 @@ class Message(base.Message):
             raise SensorWarmingUp("message empty: warming up sensor")
         return msg
 
+    @classmethod
+    def _validate_many(cls, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        payload = frames[:, 2:-1]
+        valid = frames[:, -1] == 0x100 - frames[:, 1:-1].sum(axis=1) % 0x100
+        valid &= payload.any(axis=1)
+        return valid, payload
+
     @staticmethod
-    def _unpack(message: bytes) -> tuple[int, ...]:
-        return struct.unpack(f">{len(message) // 2}H", message)
+    def _unpack_format(length: int) -> str:
+        return f">{length // 2}H"
 
 
 @dataclass(frozen=False)
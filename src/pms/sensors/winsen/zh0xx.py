@@ -12,6 +12,8 @@ from . import mhz19b
 
 ALIASES = ("ZH03B", "ZH06I")
 
+ACTIVE_MODE = False  # active mode messages are not supported
+
 commands = base.Commands(
     passive_read=base.Cmd(b"\xff\x01\x86\x00\x00\x00\x00\x00\x79", b"\xff\x86", 9),
     passive_mode=base.Cmd(b"\xff\x01\x78\x41\x00\x00\x00\x00\x46", b"", 0),
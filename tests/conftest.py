@@ -13,12 +13,44 @@ import pytest
 from loguru import logger
 
 from pms.core import Sensor
+from pms.core.capture import CaptureWriter
+from pms.core.compression import CompressedWriter
+from pms.core.partition import PartitionWriter
 from pms.core.reader import RawData
 from pms.core.types import ObsData
 
 CAPTURED_DATA = Path("tests/captured_data/data.csv")
 
 
+def write_captured_data(writer: CaptureWriter | PartitionWriter) -> None:
+    """write every message from CAPTURED_DATA to a capture or partition writer"""
+    with CAPTURED_DATA.open() as csv:
+        for row in DictReader(csv):
+            writer.write(row["sensor"], RawData(int(row["time"]), bytes.fromhex(row["hex"])))
+
+
+@pytest.fixture(params=["csv", "csv.gz", "csv.xz", "pmscap"])
+def captured_path(
+    request: pytest.FixtureRequest, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """CAPTURED_DATA as plain/compressed csv and binary capture, with many index entries"""
+    if request.param == "csv":
+        return CAPTURED_DATA
+
+    monkeypatch.setattr("pms.core.capture.BLOCK_SIZE", 128)  # many index entries
+    if request.param != "pmscap":
+        path = tmp_path / f"data.{request.param}"
+        with CompressedWriter(path, block_lines=16) as csv:
+            for line in CAPTURED_DATA.open():
+                csv.write(line)
+        return path
+
+    path = tmp_path / "data.pmscap"
+    with CaptureWriter(path) as writer:
+        write_captured_data(writer)
+    return path
+
+
 @contextmanager
 def captured_data_reader(db_str: str = ":memory:", *, data: Path | None = None):
     db = connect(db_str)
@@ -76,7 +108,7 @@ class CapturedData(Enum):
 
     @property
     def raw_message(self) -> Iterator[bytes]:
-        return (msg.data for msg in self.value)
+        return (bytes(msg.data) for msg in self.value)
 
     @property
     def message_timestamp(self) -> Iterator[int]:
@@ -89,7 +121,7 @@ class CapturedData(Enum):
     @property
     def obs(self) -> Iterator[ObsData]:
         sensor = Sensor[self.name]
-        return (sensor.decode(msg.data, time=msg.time) for msg in self.value)
+        return (sensor.decode(bytes(msg.data), time=msg.time) for msg in self.value)
 
     @property
     def msg_hex(self) -> Iterator[str]:
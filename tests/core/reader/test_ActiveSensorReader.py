@@ -0,0 +1,191 @@
+import struct
+
+import pytest
+
+from pms import SensorWarmingUp
+from pms.core.reader import ActiveSensorReader, RawData, UnableToRead
+from pms.core.sensor import Sensor
+
+MESSAGE = (
+    b"BM\x00\x1c"  # expected header
+    + b".........................."  # payload (to total 32 bytes)
+    + b"\x05W"  # checksum = sum(header) + sum(payload)
+)
+
+EMPTY_MESSAGE = (
+    b"BM\x00\x1c"  # expected header
+    + b"\0" * 26  # payload (to total 32 bytes)
+    + b"\x00\xab"  # checksum
+)
+
+
+def pushed(n: int) -> bytes:
+    """PMSx003 message pushed at second n, with n on every field"""
+    message = b"BM\x00\x1c" + struct.pack(">13H", *[n] * 13)
+    return message + struct.pack(">H", sum(message))
+
+
+class PushingSerial:
+    """sensor pushing one message every second on active mode, on a fake clock"""
+
+    is_open = True
+
+    def __init__(self, warm_up: int = 0):
+        self.clock = 0
+        self.warm_up = warm_up  # seconds pushing empty messages
+        self.buffer = bytearray()
+        self.push(1)
+
+    def push(self, seconds: int):
+        for _ in range(seconds):
+            self.clock += 1
+            self.buffer += pushed(0 if self.clock <= self.warm_up else self.clock)
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.buffer)
+
+    def read(self, size: int = 1) -> bytes:
+        if not self.buffer:  # wait for the next message
+            self.push(1)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+
+@pytest.fixture
+def mock_sensor(mock_serial):
+    mock_serial.stub(
+        name="wake",
+        receive_bytes=b"BM\xe4\x00\x01\x01t",
+        send_bytes=MESSAGE,
+    )
+
+    mock_serial.stub(
+        name="active_mode",
+        receive_bytes=b"BM\xe1\x00\x01\x01q",
+        send_bytes=MESSAGE + b"garbage" + MESSAGE + MESSAGE[:10] + MESSAGE[10:],
+    )
+
+    mock_serial.stub(
+        name="sleep",
+        receive_bytes=b"BM\xe4\x00\x00\x01s",
+        send_bytes=(
+            b"BM\x00\x04"  # expected header
+            + b".."  # payload (to total 8 bytes)
+            + b"\x00\xef"  # checksum
+        ),
+    )
+
+    return mock_serial
+
+
+@pytest.fixture()
+def reader(monkeypatch, mock_sensor) -> ActiveSensorReader:
+    reader = ActiveSensorReader(
+        "PMSx003",  # match with stubs
+        mock_sensor.port,
+        samples=1,  # newest message pushed after active_mode
+        interval=None,
+        max_retries=None,
+        timeout=0.01,  # low to avoid hanging on failure
+    )
+
+    # https://github.com/pyserial/pyserial/issues/625
+    monkeypatch.setattr(reader.serial, "flush", lambda: None)
+
+    reader.pre_heat = 0  # disable any preheat
+
+    return reader
+
+
+@pytest.fixture()
+def pushing(monkeypatch, reader: ActiveSensorReader) -> PushingSerial:
+    """replace the open serial port with a sensor pushing messages on a fake clock"""
+    serial = PushingSerial()
+    monkeypatch.setattr(reader, "serial", serial)
+    monkeypatch.setattr("pms.core.sensor.seconds_since_epoch", lambda: serial.clock)
+    monkeypatch.setattr("pms.core.schedule.time.monotonic", lambda: serial.clock)
+    return serial
+
+
+def test_reader(reader: ActiveSensorReader, mock_serial):
+    with reader:
+        obs = tuple(reader())
+
+    # check active mode was set
+    assert mock_serial.stubs["wake"].called
+    assert mock_serial.stubs["active_mode"].calls == 1
+
+    # check only the newest pushed message was read
+    assert len(obs) == 1
+    assert all(o.pm10 == 11822 for o in obs)  # type:ignore
+
+    # check sleep happened
+    assert mock_serial.stubs["sleep"].called
+
+
+def test_reader_raw(reader: ActiveSensorReader):
+    with reader:
+        raw = tuple(reader(raw=True))
+
+    assert len(raw) == 1
+    assert all(isinstance(r, RawData) and r.data == MESSAGE for r in raw)
+
+
+def test_reader_backlog(reader: ActiveSensorReader, pushing: PushingSerial):
+    reader.samples = 4
+
+    obs = []
+    for o in reader():
+        obs.append(o)
+        pushing.push(60)  # slow consumer, messages pile up
+
+    # check messages pushed while the consumer was busy were dropped
+    assert [o.time for o in obs] == [1, 61, 121, 181]
+    assert [o.pm10 for o in obs] == [1, 61, 121, 181]  # type:ignore
+
+
+def test_reader_interval(reader: ActiveSensorReader, pushing: PushingSerial):
+    reader.samples = 3
+    reader.interval = 2  # skip every other message
+
+    obs = tuple(reader())
+
+    assert [o.time for o in obs] == [1, 3, 5]
+    assert [o.pm10 for o in obs] == [1, 3, 5]  # type:ignore
+
+
+def test_reader_closed(reader: ActiveSensorReader):
+    obs = tuple(reader())
+    assert len(obs) == 0
+
+
+def test_reader_warm_up(reader: ActiveSensorReader, pushing: PushingSerial):
+    pushing.warm_up = 3
+    pushing.buffer[:] = pushed(0)  # 1st message while warming up
+
+    obs = tuple(reader())
+
+    assert [o.time for o in obs] == [4]
+
+
+def test_reader_warm_up_exhaust_retries(reader: ActiveSensorReader, mock_serial):
+    mock_serial.stub(
+        name="active_mode",
+        receive_bytes=b"BM\xe1\x00\x01\x01q",
+        send_bytes=MESSAGE + EMPTY_MESSAGE,
+    )
+    reader.max_retries = 0
+
+    with reader:
+        with pytest.raises(SensorWarmingUp):
+            next(reader())
+
+
+@pytest.mark.parametrize("sensor", ["HPMA115S0", "HPMA115C0", "SPS30", "MHZ19B", "ZH0xx"])
+def test_reader_not_supported(sensor: str):
+    with pytest.raises(UnableToRead) as e:
+        ActiveSensorReader(Sensor[sensor])
+
+    assert "does not support active mode" in str(e.value)
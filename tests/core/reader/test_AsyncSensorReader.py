@@ -0,0 +1,247 @@
+import asyncio
+import time
+
+import pytest
+
+from pms import SensorWarmingUp, SensorWarning
+from pms.core.async_reader import AsyncSensorReader
+from pms.core.reader import UnableToRead
+from pms.core.sensor import Sensor
+
+
+@pytest.fixture
+def mock_sleep(monkeypatch):
+    async def sleep(seconds):
+        sleep.slept_for += seconds
+
+    sleep.slept_for = 0
+
+    monkeypatch.setattr("pms.core.async_reader.asyncio.sleep", sleep)
+    return sleep
+
+
+@pytest.fixture
+def mock_sensor(mock_serial):
+    mock_serial.stub(
+        name="wake",
+        receive_bytes=b"BM\xe4\x00\x01\x01t",
+        send_bytes=b"BM\x00\x1c" + b"." * 26 + b"\x05W",
+    )
+    mock_serial.stub(
+        name="passive_mode",
+        receive_bytes=b"BM\xe1\x00\x00\x01p",
+        send_bytes=b"BM\x00\x04" + b".." + b"\x00\xef",
+    )
+    mock_serial.stub(
+        name="passive_read",
+        receive_bytes=b"BM\xe2\x00\x00\x01q",
+        send_bytes=b"BM\x00\x1c" + b"." * 26 + b"\x05W",
+    )
+    mock_serial.stub(
+        name="sleep",
+        receive_bytes=b"BM\xe4\x00\x00\x01s",
+        send_bytes=b"BM\x00\x04" + b".." + b"\x00\xef",
+    )
+    return mock_serial
+
+
+@pytest.fixture
+def mock_sensor_warm_up(mock_serial):
+    def passive_read(n):
+        if n == 1:  # "warming up"
+            return b"BM\x00\x1c" + b"\0" * 26 + b"\x00\xab"
+        return b"BM\x00\x1c" + b"." * 26 + b"\x05W"
+
+    mock_serial.stub(
+        name="passive_read",
+        receive_bytes=b"BM\xe2\x00\x00\x01q",
+        send_fn=passive_read,
+    )
+
+
+@pytest.fixture
+def mock_sensor_temp_failure(mock_serial):
+    def passive_read(n):
+        if n == 1:  # bad checksum
+            return b"BM\x00\x1c" + b"\0" * 26 + b"\x00\xff"
+        return b"BM\x00\x1c" + b"." * 26 + b"\x05W"
+
+    mock_serial.stub(
+        name="passive_read",
+        receive_bytes=b"BM\xe2\x00\x00\x01q",
+        send_fn=passive_read,
+    )
+
+
+@pytest.fixture()
+def reader(mock_sensor) -> AsyncSensorReader:
+    reader = AsyncSensorReader(
+        "PMSx003",  # match with stubs
+        mock_sensor.port,
+        samples=1,
+        interval=None,
+        max_retries=None,
+        timeout=0.5,  # low to avoid hanging on failure
+    )
+    reader.pre_heat = 0  # disable any preheat
+    return reader
+
+
+def read(reader: AsyncSensorReader, **kwargs) -> list:
+    async def main():
+        async with reader:
+            return [obs async for obs in reader(**kwargs)]
+
+    return asyncio.run(main())
+
+
+def test_reader(reader: AsyncSensorReader, mock_serial):
+    obs = read(reader)
+
+    # check warm up happened
+    assert mock_serial.stubs["wake"].called
+    assert mock_serial.stubs["passive_mode"].called
+
+    # check data was read
+    assert len(obs) == 1
+    assert obs[0].pm10 == 11822
+
+    # check sleep happened
+    assert mock_serial.stubs["sleep"].called
+
+
+def test_reader_raw(reader: AsyncSensorReader):
+    obs = read(reader, raw=True)
+    assert len(obs) == 1
+    assert obs[0].data == b"BM\x00\x1c" + b"." * 26 + b"\x05W"
+
+
+def test_reader_sleep(reader: AsyncSensorReader, mock_sleep):
+    reader.samples = 2  # try to read twice
+    reader.interval = 5  # sleep between samples
+
+    obs = read(reader)
+
+    # check we read twice
+    assert len(obs) == 2
+
+    # check we slept between reads
+    assert 0 < mock_sleep.slept_for < 5
+
+
+def test_reader_closed(reader: AsyncSensorReader):
+    async def main():
+        return [obs async for obs in reader()]
+
+    assert asyncio.run(main()) == []
+
+
+def test_reader_preheat(reader: AsyncSensorReader, mock_sleep):
+    reader.pre_heat = 5  # override pre heat duration
+
+    async def main():
+        async with reader:
+            # check open did not wait for pre-heat
+            assert mock_sleep.slept_for == 0
+            return [obs async for obs in reader()]
+
+    obs = asyncio.run(main())
+
+    # check we waited for pre-heat before the first sample
+    assert 4 < mock_sleep.slept_for <= 5
+    assert len(obs) == 1
+
+
+def test_reader_warm_up(reader: AsyncSensorReader, mock_sleep, mock_sensor_warm_up):
+    obs = read(reader)
+
+    # check we slept for warm up
+    assert mock_sleep.slept_for == 5
+    assert len(obs) == 1
+
+
+def test_reader_warm_up_exhaust_retries(reader: AsyncSensorReader, mock_sensor_warm_up):
+    reader.max_retries = 0
+
+    with pytest.raises(SensorWarmingUp):
+        read(reader)
+
+
+def test_reader_temp_failure(reader: AsyncSensorReader, mock_serial, mock_sensor_temp_failure):
+    obs = read(reader)
+
+    # check one sample still acquired after two attempts
+    assert len(obs) == 1
+    assert mock_serial.stubs["passive_read"].calls == 2
+
+
+def test_reader_temp_failure_exhaust_retries(reader: AsyncSensorReader, mock_sensor_temp_failure):
+    reader.max_retries = 0
+
+    with pytest.raises(SensorWarning):
+        read(reader)
+
+
+def test_reader_short_answer(reader: AsyncSensorReader, mock_serial):
+    mock_serial.stub(
+        name="passive_read",
+        receive_bytes=b"BM\xe2\x00\x00\x01q",
+        send_bytes=b"BM\x00\x04..\x00\xef",  # short message
+    )
+    reader.timeout = 5
+    reader.max_retries = 0
+
+    start = time.monotonic()
+    with pytest.raises(SensorWarning):
+        read(reader)
+
+    # check we did not wait for the full timeout
+    assert time.monotonic() - start < 1
+
+
+def test_reader_sensor_mismatch(reader: AsyncSensorReader, mock_serial):
+    mock_serial.stub(
+        name="passive_mode",  # used for validation
+        receive_bytes=b"BM\xe1\x00\x00\x01p",
+        send_bytes=b"123",  # nonsense
+    )
+
+    with pytest.raises(UnableToRead) as e:
+        read(reader)
+
+    assert "failed validation" in str(e.value)
+
+
+def test_reader_sensor_no_response(reader: AsyncSensorReader):
+    reader.sensor = Sensor["PMS3003"]  # wrong sensor
+    reader.timeout = 0.01
+
+    with pytest.raises(UnableToRead) as e:
+        read(reader)
+
+    assert "did not respond" in str(e.value)
+
+
+def test_reader_does_not_block(reader: AsyncSensorReader):
+    """other tasks run while waiting for the sensor to answer"""
+    reader.sensor = Sensor["PMS3003"]  # wrong sensor, never answers
+    reader.timeout = 0.05
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        try:
+            with pytest.raises(UnableToRead):
+                async with reader:
+                    pass
+        finally:
+            task.cancel()
+
+    asyncio.run(main())
+    assert ticks > 10
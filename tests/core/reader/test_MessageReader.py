@@ -1,7 +1,13 @@
+import gzip
+from csv import DictReader
+from pathlib import Path
+
 import pytest
 
-from pms.core.reader import MessageReader
+from pms.core.capture import CaptureWriter
+from pms.core.reader import MessageReader, RawData
 from pms.core.sensor import Sensor
+from pms.core.types import ObsData
 from tests.conftest import CAPTURED_DATA
 
 
@@ -20,3 +26,140 @@ def test_reader(reader: MessageReader):
 def test_closed(reader: MessageReader):
     values = tuple(reader())
     assert len(values) == 0
+
+
+def test_close_twice(reader: MessageReader):
+    with reader:
+        pass
+    reader.close()
+    assert len(tuple(reader())) == 0
+
+
+def test_batches(reader: MessageReader):
+    pytest.importorskip("numpy")
+    with reader:
+        batches = tuple(reader.batches(size=4))
+
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    with reader:
+        obs = tuple(reader())
+    assert [o.time for o in obs] == [t for batch in batches for t in batch["time"]]
+
+
+def test_batches_closed(reader: MessageReader):
+    assert len(tuple(reader.batches())) == 0
+
+
+@pytest.fixture(params=["csv", "pmscap"])
+def capture(request: pytest.FixtureRequest, tmp_path: Path) -> bytes:
+    """capture file contents"""
+    if request.param == "csv":
+        return CAPTURED_DATA.read_bytes()
+
+    path = tmp_path / "full.pmscap"
+    with CAPTURED_DATA.open() as csv, CaptureWriter(path) as writer:
+        for row in DictReader(csv):
+            writer.write(row["sensor"], RawData(int(row["time"]), bytes.fromhex(row["hex"])))
+    return path.read_bytes()
+
+
+@pytest.fixture
+def expected(reader: MessageReader) -> list[ObsData]:
+    with reader:
+        return list(reader())
+
+
+def test_follow(
+    capture: bytes, expected: list[ObsData], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    path = tmp_path / "data"
+    size = len(capture)  # PMS3003 messages are on the 2nd tenth of the capture
+    cuts = [size // 10 + 7, size // 10 + 7, size // 6, size]
+    path.write_bytes(capture[: cuts[0]])  # ends on a partial line/record
+
+    delays: list[float] = []
+
+    def sleep(delay: float):
+        """append to the capture file on every poll"""
+        delays.append(delay)
+        with path.open("ab") as file:
+            file.write(capture[cuts[len(delays) - 1] : cuts[len(delays)]])
+
+    monkeypatch.setattr("pms.core.reader.time.sleep", sleep)
+    with MessageReader(path, Sensor["PMS3003"], samples=len(expected), follow=True) as reader:
+        assert list(reader()) == expected
+
+    assert delays[:2] == [0.1, 0.2]  # back off while idle
+
+
+def test_follow_new_file(
+    capture: bytes, expected: list[ObsData], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    path = tmp_path / "data"
+    path.touch()  # format is not known until the first bytes are written
+    cuts = [0, 3, len(capture)]  # a partial binary capture header first
+
+    delays: list[float] = []
+
+    def sleep(delay: float):
+        delays.append(delay)
+        with path.open("ab") as file:
+            file.write(capture[cuts[len(delays) - 1] : cuts[len(delays)]])
+
+    monkeypatch.setattr("pms.core.reader.time.sleep", sleep)
+    with MessageReader(path, Sensor["PMS3003"], samples=len(expected), follow=True) as reader:
+        assert list(reader()) == expected
+
+
+def test_follow_rotate(expected: list[ObsData], tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "data.csv"
+    header, *lines = CAPTURED_DATA.read_text().splitlines(keepends=True)
+    half = 15  # half way through PMS3003 messages
+    path.write_text(header + "".join(lines[: half - 2]))
+
+    def sleep(delay: float):
+        """rotate the capture file, after a last write on the old file"""
+        assert not path.with_suffix(".old").exists()
+        path.rename(path.with_suffix(".old"))
+        with path.with_suffix(".old").open("a") as file:
+            file.write("".join(lines[half - 2 : half]))
+        path.write_text(header + "".join(lines[half:]))
+
+    monkeypatch.setattr("pms.core.reader.time.sleep", sleep)
+    with MessageReader(path, Sensor["PMS3003"], samples=len(expected), follow=True) as reader:
+        assert list(reader()) == expected
+
+
+def test_follow_end(expected: list[ObsData]):
+    end = expected[-1].time
+    with MessageReader(CAPTURED_DATA, Sensor["PMS3003"], end=end, follow=True) as reader:
+        assert list(reader()) == [obs for obs in expected if obs.time < end]
+
+
+def test_follow_compressed(tmp_path: Path):
+    path = tmp_path / "data.csv.gz"
+    path.write_bytes(gzip.compress(CAPTURED_DATA.read_bytes()))
+    with pytest.raises(ValueError):
+        MessageReader(path, Sensor["PMS3003"], follow=True).open()
+
+
+def test_speed(expected: list[ObsData], monkeypatch: pytest.MonkeyPatch):
+    now = 0.0
+
+    def sleep(delay: float):
+        nonlocal now
+        now += delay
+
+    monkeypatch.setattr("pms.core.reader.time.sleep", sleep)
+    monkeypatch.setattr("pms.core.schedule.time.monotonic", lambda: now)
+    with MessageReader(CAPTURED_DATA, Sensor["PMS3003"], speed=10) as reader:
+        for obs in reader():
+            assert now == pytest.approx((obs.time - expected[0].time) / 10)
+        assert list(reader()) == []
+    assert reader.max_lag == 0
+
+    with MessageReader(CAPTURED_DATA, Sensor["PMS3003"], speed=10) as reader:
+        for obs in reader():
+            now += 100  # slow consumer
+        assert reader.lag > 0
+    assert reader.max_lag >= reader.lag
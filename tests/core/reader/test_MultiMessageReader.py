@@ -0,0 +1,50 @@
+from csv import DictReader
+from pathlib import Path
+
+import pytest
+
+from pms.core.reader import MessageReader, MultiMessageReader, RawData
+from pms.core.sensor import Sensor
+from tests.conftest import CAPTURED_DATA
+
+
+def test_reader(captured_path: Path):
+    with MultiMessageReader(captured_path) as reader:
+        obs = list(reader())
+
+    for sensor in Sensor:
+        with MessageReader(captured_path, sensor) as single:
+            assert [o for s, o in obs if s is sensor] == list(single())
+
+    # all sensors on a single pass, on capture order
+    with CAPTURED_DATA.open() as csv:
+        assert [s.name for s, _ in obs] == [row["sensor"] for row in DictReader(csv)]
+
+
+def test_reader_sensors(captured_path: Path):
+    sensors = Sensor["PMSx003"], Sensor["MCU680"]
+    with MultiMessageReader(captured_path, sensors) as reader:
+        raw = list(reader(raw=True))
+
+    assert {sensor for sensor, _ in raw} == set(sensors)
+    assert all(isinstance(message, RawData) for _, message in raw)
+
+
+def test_reader_samples(captured_path: Path):
+    with MultiMessageReader(captured_path, samples=3) as reader:
+        assert len(list(reader())) == 3
+
+
+def test_closed(captured_path: Path):
+    assert list(MultiMessageReader(captured_path)()) == []
+
+
+def test_batches(captured_path: Path):
+    pytest.importorskip("numpy")
+    with MultiMessageReader(captured_path) as reader:
+        batches = list(reader.batches(size=4))
+
+    for sensor in Sensor:
+        with MessageReader(captured_path, sensor) as single:
+            times = [obs.time for obs in single()]
+        assert [t for s, b in batches if s is sensor for t in b["time"]] == times
@@ -0,0 +1,209 @@
+import time
+
+import pytest
+from mock_serial import MockSerial
+
+from pms.core.reader import ActiveSensorReader, MultiSensorReader, SensorReader, UnableToRead
+from pms.core.sensor import Sensor
+
+from .test_ActiveSensorReader import PushingSerial
+
+PASSIVE_READ = b"BM\x00\x1c" + b"." * 26 + b"\x05W"
+
+
+def stub_sensor(mock: MockSerial) -> MockSerial:
+    mock.stub(name="wake", receive_bytes=b"BM\xe4\x00\x01\x01t", send_bytes=PASSIVE_READ)
+    mock.stub(
+        name="passive_mode",
+        receive_bytes=b"BM\xe1\x00\x00\x01p",
+        send_bytes=b"BM\x00\x04..\x00\xef",
+    )
+    mock.stub(name="passive_read", receive_bytes=b"BM\xe2\x00\x00\x01q", send_bytes=PASSIVE_READ)
+    mock.stub(
+        name="sleep",
+        receive_bytes=b"BM\xe4\x00\x00\x01s",
+        send_bytes=b"BM\x00\x04..\x00\xef",
+    )
+    return mock
+
+
+@pytest.fixture
+def mock_serials(mock_serial):
+    other = MockSerial()
+    other.open()
+    yield stub_sensor(mock_serial), stub_sensor(other)
+    other.close()
+
+
+@pytest.fixture
+def readers(monkeypatch, mock_serials) -> tuple[SensorReader, ...]:
+    readers = tuple(SensorReader("PMSx003", mock.port, timeout=0.01) for mock in mock_serials)
+    for reader in readers:
+        # https://github.com/pyserial/pyserial/issues/625
+        monkeypatch.setattr(reader.serial, "flush", lambda: None)
+        reader.pre_heat = 0  # disable any preheat
+    return readers
+
+
+@pytest.fixture
+def mock_sleep(monkeypatch):
+    def sleep(seconds):
+        sleep.slept_for += seconds
+
+    sleep.slept_for = 0
+
+    monkeypatch.setattr("pms.core.reader.time.sleep", sleep)
+    return sleep
+
+
+def test_reader(readers, mock_serials):
+    with MultiSensorReader(*readers, samples=2) as reader:
+        obs = tuple(reader())
+
+    # two ticks, one sample from each sensor per tick
+    assert len(obs) == 4
+    assert [sensor for sensor, _ in obs] == [Sensor["PMSx003"]] * 4
+    assert all(o.pm10 == 11822 for _, o in obs)
+
+    for mock in mock_serials:
+        assert mock.stubs["wake"].called
+        assert mock.stubs["passive_read"].calls == 2
+        assert mock.stubs["sleep"].called
+
+
+def test_reader_raw(readers):
+    with MultiSensorReader(*readers, samples=1) as reader:
+        obs = tuple(reader(raw=True))
+
+    assert [raw.data for _, raw in obs] == [PASSIVE_READ] * 2
+
+
+def test_reader_sleep(readers, mock_sleep):
+    with MultiSensorReader(*readers, samples=2, interval=5) as reader:
+        obs = tuple(reader())
+
+    assert len(obs) == 4
+
+    # check we slept once between ticks
+    assert 0 < mock_sleep.slept_for < 5
+
+
+def test_reader_preheat(readers, mock_sleep, monkeypatch):
+    # sleep moves the monotonic clock forward
+    monotonic = time.monotonic
+    monkeypatch.setattr(
+        "pms.core.reader.time.monotonic", lambda: monotonic() + mock_sleep.slept_for
+    )
+    for reader in readers:
+        reader.pre_heat = 5  # override pre heat duration
+
+    with MultiSensorReader(*readers, samples=1) as reader:
+        obs = tuple(reader())
+
+    # check both sensors pre-heated at the same time
+    assert len(obs) == 2
+    assert 4 < mock_sleep.slept_for <= 5
+
+
+def test_reader_parallel(readers, monkeypatch):
+    def slow_cmd(cmd):
+        def _cmd(command: str) -> bytes:
+            if command == "passive_read":
+                time.sleep(0.2)
+            return cmd(command)
+
+        return _cmd
+
+    for reader in readers:
+        monkeypatch.setattr(reader, "_cmd", slow_cmd(reader._cmd))
+
+    with MultiSensorReader(*readers, samples=1) as reader:
+        start = time.monotonic()
+        obs = tuple(reader())
+        elapsed = time.monotonic() - start
+
+    assert len(obs) == 2
+    assert elapsed < 0.4  # sensors were read at the same time
+
+
+def test_reader_closed(readers):
+    reader = MultiSensorReader(*readers)
+    assert tuple(reader()) == ()
+
+
+def test_reader_no_readers():
+    with pytest.raises(ValueError):
+        MultiSensorReader()
+
+
+def test_reader_open_failure(readers):
+    readers[1].sensor = Sensor["PMS3003"]  # wrong sensor
+
+    with pytest.raises(UnableToRead):
+        with MultiSensorReader(*readers):
+            pass
+
+    # the other reader was closed
+    assert not any(reader.serial.is_open for reader in readers)
+
+
+class CountingReader(SensorReader):
+    """count calls to the overridden methods"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened = self.called = 0
+
+    def open(self) -> None:
+        self.opened += 1
+        super().open()
+
+    def __call__(self, *, raw=None):
+        self.called += 1
+        return super().__call__(raw=raw)
+
+
+def test_reader_subclass(monkeypatch, mock_serials):
+    readers = tuple(
+        CountingReader("PMSx003", mock.port, interval=60, samples=1, timeout=0.01)
+        for mock in mock_serials
+    )
+    for reader in readers:
+        # https://github.com/pyserial/pyserial/issues/625
+        monkeypatch.setattr(reader.serial, "flush", lambda: None)
+        reader.pre_heat = 0  # disable any preheat
+
+    with MultiSensorReader(*readers, samples=3) as reader:
+        obs = tuple(reader())
+
+    # the individual reader interval/samples do not limit the ticks
+    assert len(obs) == 6
+    for reader in readers:
+        assert reader.opened == 1  # overridden open was called
+        assert reader.called == 1  # one generator per session, not per tick
+
+
+def test_reader_active(monkeypatch):
+    serials = PushingSerial(), PushingSerial()
+    readers = tuple(ActiveSensorReader("PMSx003", interval=60) for _ in serials)
+    for reader, serial in zip(readers, serials):
+        monkeypatch.setattr(reader, "serial", serial)
+        monkeypatch.setattr(reader, "open", lambda: None)
+        monkeypatch.setattr(reader, "close", lambda: None)
+        reader.ready = 0  # no pre-heat
+
+    def sleep(seconds):  # the sensors keep pushing messages between ticks
+        for serial in serials:
+            serial.push(int(seconds))
+
+    clock = serials[0]
+    monkeypatch.setattr("pms.core.reader.time.sleep", sleep)
+    monkeypatch.setattr("pms.core.sensor.seconds_since_epoch", lambda: clock.clock)
+    monkeypatch.setattr("pms.core.schedule.time.monotonic", lambda: clock.clock)
+
+    with MultiSensorReader(*readers, samples=3, interval=60) as reader:
+        obs = tuple(reader())
+
+    # check every tick read the newest message from each sensor
+    assert [o.time for _, o in obs] == [1, 1, 61, 61, 121, 121]
+    assert [o.pm10 for _, o in obs] == [1, 1, 61, 61, 121, 121]
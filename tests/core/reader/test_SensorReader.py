@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from _pytest.logging import LogCaptureFixture
 from loguru import logger
@@ -178,10 +180,13 @@ def test_reader_preheat(reader: SensorReader, mock_sleep):
     reader.pre_heat = 5  # override pre heat duration
 
     with reader:
-        pass
+        # check open did not wait for pre-heat
+        assert mock_sleep.slept_for == 0
+        obs = tuple(reader())
 
-    # check we slept between reads
-    assert mock_sleep.slept_for == 5
+    # check we waited for pre-heat before the first sample
+    assert 4 < mock_sleep.slept_for <= 5
+    assert len(obs) == 1
 
 
 def test_reader_warm_up(reader: SensorReader, mock_sleep, mock_sensor_warm_up):
@@ -220,6 +225,70 @@ def test_reader_temp_failure_exhaust_retries(reader: SensorReader, mock_sensor_t
             next(reader())
 
 
+def test_reader_short_answer(reader: SensorReader, mock_serial):
+    mock_serial.stub(
+        name="passive_read",
+        receive_bytes=b"BM\xe2\x00\x00\x01q",
+        send_bytes=b"BM\x00\x04..\x00\xef",  # short message
+    )
+    reader.timeout = 5
+    reader.max_retries = 0
+
+    with reader:
+        start = time.monotonic()
+        with pytest.raises(SensorWarning):
+            next(reader())
+
+    # check we did not wait for the full timeout
+    assert time.monotonic() - start < 1
+
+    # check reads on the serial port time out on silence
+    assert reader.serial.timeout == reader.inter_byte_timeout
+
+
+def test_reader_no_reconfigure(reader: SensorReader, monkeypatch):
+    reader.samples = 3
+
+    with reader:
+        reconfigure = []
+        monkeypatch.setattr(reader.serial, "_reconfigure_port", lambda: reconfigure.append(1))
+        obs = tuple(reader())
+
+    # check the serial port was not reconfigured on every read
+    assert len(obs) == 3
+    assert not reconfigure
+
+
+def is_open(reader: SensorReader) -> bool:
+    return reader.serial.is_open
+
+
+def test_reader_session(reader: SensorReader, mock_serial):
+    reader.idle_timeout = 0.1
+
+    for _ in range(3):
+        with reader:
+            obs = tuple(reader())
+        assert len(obs) == 1
+
+    # check the sensor was only woken up once and is still awake
+    assert mock_serial.stubs["wake"].calls == 1
+    assert mock_serial.stubs["passive_mode"].calls == 1
+    assert not mock_serial.stubs["sleep"].called
+    assert is_open(reader)
+
+    # check sleep happened after the idle timeout
+    time.sleep(0.3)
+    assert mock_serial.stubs["sleep"].calls == 1
+    assert not is_open(reader)
+
+    # check a new session starts
+    reader.idle_timeout = None
+    with reader:
+        pass
+    assert mock_serial.stubs["wake"].calls == 2
+
+
 def test_reader_sensor_mismatch(reader: SensorReader, mock_serial):
     mock_serial.stub(
         name="passive_mode",  # used for validation
@@ -244,6 +313,27 @@ def test_reader_sensor_no_response(reader: SensorReader):
     assert "did not respond" in str(e.value)
 
 
+def test_reader_session_close(reader: SensorReader, mock_serial, monkeypatch):
+    at_exit: list = []
+    monkeypatch.setattr("pms.core.reader.atexit.register", at_exit.append)
+    monkeypatch.setattr("pms.core.reader.atexit.unregister", at_exit.remove)
+    reader.idle_timeout = 10
+
+    with reader:
+        pass
+    assert not mock_serial.stubs["sleep"].called
+    assert at_exit == [reader.close]  # sleep at interpreter exit
+
+    # check closing an idle session sleeps right away
+    reader.close()
+    assert mock_serial.stubs["sleep"].calls == 1
+    assert not is_open(reader)
+    assert at_exit == []
+
+    reader.close()  # nothing left to close
+    assert mock_serial.stubs["sleep"].calls == 1
+
+
 def test_logging(reader: SensorReader, capfd, caplog):
     with reader:
         obs = tuple(reader())
@@ -0,0 +1,143 @@
+from pathlib import Path
+
+import pytest
+
+from pms.core import capture
+from pms.core.capture import CaptureWriter, Index, index_path, is_capture
+from pms.core.reader import MessageReader, RawData
+from pms.core.sensor import Sensor
+from tests.conftest import CAPTURED_DATA, write_captured_data
+
+
+@pytest.fixture
+def path(tmp_path: Path, monkeypatch) -> Path:
+    """binary capture with all the captured data, and a small index block"""
+    monkeypatch.setattr(capture, "BLOCK_SIZE", 128)
+    path = tmp_path / "data.pmscap"
+    with CaptureWriter(path) as writer:
+        write_captured_data(writer)
+    return path
+
+
+def replay(path: Path, sensor: Sensor, **kwargs) -> list[RawData]:
+    with MessageReader(path, sensor, **kwargs) as reader:
+        return list(reader(raw=True))
+
+
+def test_is_capture(path: Path):
+    assert is_capture(path)
+    assert not is_capture(CAPTURED_DATA)
+    assert index_path(path).exists()
+
+
+@pytest.mark.parametrize("sensor", Sensor, ids=str)
+def test_replay(path: Path, sensor: Sensor):
+    assert replay(path, sensor) == replay(CAPTURED_DATA, sensor)
+
+
+@pytest.mark.parametrize("sensor", Sensor, ids=str)
+def test_replay_time_range(path: Path, sensor: Sensor):
+    messages = replay(CAPTURED_DATA, sensor)
+    if len(messages) < 3:
+        pytest.skip(f"not enough {sensor} messages")
+
+    start, end = messages[1].time, messages[-1].time
+    assert replay(path, sensor, start=start, end=end) == messages[1:-1]
+    assert replay(CAPTURED_DATA, sensor, start=start, end=end) == messages[1:-1]
+    assert replay(path, sensor, start=end + 1) == []
+    assert replay(path, sensor, end=messages[0].time) == []
+
+
+def test_replay_seek(path: Path, monkeypatch):
+    """only the records from the indexed block before start are read"""
+    messages = replay(path, Sensor["PMSx003"])
+    offsets = []
+    records = capture.records
+
+    def spy(file, start=len(capture.MAGIC), stop=None):
+        offsets.append((start, stop))
+        return records(file, start, stop)
+
+    monkeypatch.setattr("pms.core.reader.records", spy)
+    assert replay(path, Sensor["PMSx003"], start=messages[-1].time) == messages[-1:]
+    _, indexed = Index.load(path).entries["PMSx003"]
+    assert len(indexed) > 2
+    assert offsets == [(indexed[-1], None)]
+
+
+def test_index_rebuild(path: Path):
+    index = Index.load(path).entries
+    index_path(path).unlink()
+    assert Index.load(path).entries == index
+
+
+def test_append(path: Path):
+    messages = replay(path, Sensor["PMS3003"])
+    raw = RawData(messages[-1].time + 1, messages[-1].data)
+    with CaptureWriter(path) as writer:
+        writer.write("PMS3003", raw)
+
+    assert replay(path, Sensor["PMS3003"]) == messages + [raw]
+
+
+@pytest.mark.parametrize("torn", (b"\x01\x02\x03", b"\xff" * 30), ids=("short", "garbage"))
+def test_append_torn(tmp_path: Path, torn: bytes):
+    path = tmp_path / "data.pmscap"
+    data = replay(CAPTURED_DATA, Sensor["PMSx003"])[0].data
+    messages = [RawData(1_567_201_793 + n, data) for n in range(15)]
+    with CaptureWriter(path) as writer:
+        for raw in messages[:10]:
+            writer.write("PMSx003", raw)
+    with path.open("ab") as file:  # interrupted write
+        file.write(torn)
+    with index_path(path).open("ab") as file:
+        file.write(capture.INDEX.pack(b"PMSx003", 0, path.stat().st_size - 1))
+
+    with CaptureWriter(path) as writer:
+        for raw in messages[10:]:
+            writer.write("PMSx003", raw)
+
+    assert replay(path, Sensor["PMSx003"]) == messages
+    index_path(path).unlink()
+    assert replay(path, Sensor["PMSx003"]) == messages
+
+
+def test_append_not_capture(tmp_path: Path):
+    path = tmp_path / "data.pmscap"
+    path.write_text("time,sensor,hex\n")
+    with pytest.raises(ValueError):
+        with CaptureWriter(path):
+            pass
+
+
+@pytest.mark.parametrize("sensor", Sensor, ids=str)
+def test_replay_memory_map(path: Path, sensor: Sensor):
+    with MessageReader(path, sensor, memory_map=True) as reader:
+        raw = list(reader(raw=True))
+        assert all(isinstance(message.data, memoryview) for message in raw)
+        assert [RawData(m.time, bytes(m.data)) for m in raw] == replay(path, sensor)
+
+    with MessageReader(path, sensor, memory_map=True) as reader:
+        obs = list(reader())
+    with MessageReader(path, sensor) as reader:
+        assert obs == list(reader())
+
+
+def test_replay_memory_map_batches(path: Path):
+    pytest.importorskip("numpy")
+    sensor = Sensor["PMSx003"]
+    with MessageReader(path, sensor, memory_map=True) as reader:
+        mapped = list(reader.batches(size=4))
+    with MessageReader(path, sensor) as reader:
+        batches = list(reader.batches(size=4))
+
+    assert len(mapped) == len(batches)
+    assert all((a == b).all() for a, b in zip(mapped, batches))
+
+
+def test_replay_memory_map_in_use(path: Path):
+    with MessageReader(path, Sensor["PMSx003"], memory_map=True) as reader:
+        raw = next(reader(raw=True))
+
+    # the mapping outlives the reader while the message is in use
+    assert raw.data.tobytes() == replay(path, Sensor["PMSx003"])[0].data
@@ -0,0 +1,57 @@
+import gzip
+import lzma
+from pathlib import Path
+
+import pytest
+
+from pms.core.compression import CompressedWriter, is_compressed, open_binary, open_text
+
+LINES = [f"{n},PMSx003,{n:04x}\n" for n in range(10)]
+
+
+@pytest.fixture(params=[".gz", ".xz"])
+def path(request: pytest.FixtureRequest, tmp_path: Path) -> Path:
+    return tmp_path / f"data.csv{request.param}"
+
+
+def test_is_compressed(path: Path):
+    assert is_compressed(path)
+    assert not is_compressed(path.with_suffix(""))
+
+
+def test_writer(path: Path):
+    with CompressedWriter(path, block_lines=4) as csv:
+        for n, line in enumerate(LINES, start=1):
+            csv.write(line)
+            # only complete blocks are written
+            written = open_text(path).read() if path.stat().st_size else ""
+            assert written == "".join(LINES[: n // 4 * 4])
+
+    assert open_text(path).read() == "".join(LINES)
+    assert open_binary(path).read() == "".join(LINES).encode()
+
+    # one gzip member/xz stream per block
+    compress = gzip.compress if path.suffix == ".gz" else lzma.compress
+    assert path.read_bytes().startswith(compress("".join(LINES[:4]).encode()))
+
+
+def test_writer_append(path: Path):
+    with CompressedWriter(path) as csv:
+        csv.write(LINES[0])
+    with CompressedWriter(path) as csv:
+        csv.write(LINES[1])
+    assert open_text(path).read() == "".join(LINES[:2])
+
+    with CompressedWriter(path, overwrite=True) as csv:
+        csv.write(LINES[2])
+    assert open_text(path).read() == LINES[2]
+
+
+def test_writer_block_time(path: Path, monkeypatch: pytest.MonkeyPatch):
+    clock = iter(range(0, 1000, 100))
+    monkeypatch.setattr("pms.core.compression.time.monotonic", lambda: next(clock))
+    with CompressedWriter(path, block_time=150) as csv:
+        csv.write(LINES[0])  # block starts at 0, written at 100
+        assert path.stat().st_size == 0
+        csv.write(LINES[1])  # written at 300
+        assert open_text(path).read() == "".join(LINES[:2])
@@ -0,0 +1,38 @@
+import pytest
+
+from pms.core import Framer, Sensor
+
+GARBAGE = b"\x00BM\x00\x1c~\x00\xaa\xff\x86@\x05ZZ"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64, 1024])
+def test_framer(captured_data, chunk_size: int):
+    framer = Framer(captured_data.name)
+    stream = GARBAGE + GARBAGE.join(captured_data.raw_message) + GARBAGE
+    chunks = (stream[n : n + chunk_size] for n in range(0, len(stream), chunk_size))
+
+    messages = [msg for chunk in chunks for msg in framer.feed(chunk)]
+    assert messages == list(captured_data.raw_message)
+    assert len(framer) < len(GARBAGE)
+
+
+def test_framer_partial_message():
+    framer = Framer("PMSx003")
+    message = bytes.fromhex("424d001c0005000d00160005000d001602fd00fc001d000f00060006970003c5")
+
+    assert list(framer.feed(message[:10])) == []
+    assert len(framer) == 10
+    assert list(framer.feed(message[10:] + message[:4])) == [message]
+    assert len(framer) == 4
+
+    framer.reset()
+    assert len(framer) == 0
+
+
+def test_framer_false_header():
+    framer = Framer(Sensor["PMSx003"])
+    message = bytes.fromhex("424d001c0005000d00160005000d001602fd00fc001d000f00060006970003c5")
+
+    # truncated message followed by a complete one
+    assert list(framer.feed(message[:20] + message)) == [message]
+    assert len(framer) == 0
@@ -0,0 +1,48 @@
+from csv import DictReader
+from pathlib import Path
+
+import pytest
+
+from pms.core.merge import merge
+from pms.core.reader import RawData
+from tests.conftest import CAPTURED_DATA
+
+
+@pytest.fixture
+def rows() -> list[dict[str, str]]:
+    with CAPTURED_DATA.open() as csv:
+        return list(DictReader(csv))
+
+
+def write(path: Path, rows: list[dict[str, str]]) -> Path:
+    lines = [f"{row['time']},{row['sensor']},{row['hex']}\n" for row in rows]
+    path.write_text("time,sensor,hex\n" + "".join(lines))
+    return path
+
+
+@pytest.mark.parametrize(
+    "run_size,fan_in", [pytest.param(1000, 64, id="in memory"), pytest.param(5, 2, id="spill")]
+)
+def test_merge(rows: list[dict[str, str]], tmp_path: Path, run_size: int, fan_in: int):
+    # overlapping captures, not sorted by time
+    paths = [
+        write(tmp_path / "a.csv", rows[: len(rows) * 2 // 3]),
+        write(tmp_path / "b.csv", rows[len(rows) // 3 :][::-1]),
+        write(tmp_path / "c.csv", rows[::2]),
+    ]
+    merged = list(merge(paths, run_size=run_size, fan_in=fan_in))
+
+    expected = sorted(
+        (row["sensor"], RawData(int(row["time"]), bytes.fromhex(row["hex"]))) for row in rows
+    )
+    assert sorted(merged) == expected  # no duplicates
+    assert merged == sorted(merged, key=lambda message: (message[1].time, message[0]))
+
+
+@pytest.mark.parametrize("run_size", [1, 1000])
+def test_merge_first_wins(rows: list[dict[str, str]], tmp_path: Path, run_size: int):
+    first = write(tmp_path / "first.csv", rows[:3])
+    second = write(tmp_path / "second.csv", [{**row, "hex": row["hex"][::-1]} for row in rows[:3]])
+    merged = list(merge([first, second], run_size=run_size, fan_in=2))
+    expected = sorted(rows[:3], key=lambda row: int(row["time"]))
+    assert [raw.hex for _, raw in merged] == [row["hex"] for row in expected]
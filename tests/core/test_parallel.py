@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+from pms.core.compression import is_compressed
+from pms.core.parallel import ParallelMessageReader
+from pms.core.partition import PartitionWriter, day
+from pms.core.reader import MultiMessageReader
+from pms.core.sensor import Sensor
+from tests.conftest import CAPTURED_DATA, write_captured_data
+
+
+def test_chunks(captured_path: Path):
+    reader = ParallelMessageReader(captured_path, chunk_size=256)
+    chunks = reader.chunks()
+    if is_compressed(captured_path):  # single chunk
+        assert len(chunks) == 1
+        return
+    assert len(chunks) > 1
+    assert all(start < stop for start, stop in chunks)
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+
+
+@pytest.mark.parametrize("chunk_size", (64, 256, 1 << 20))
+def test_reader(captured_path: Path, chunk_size: int):
+    with MultiMessageReader(captured_path) as reader:
+        expected = list(reader())
+
+    with ParallelMessageReader(captured_path, workers=2, chunk_size=chunk_size) as reader:
+        assert list(reader()) == expected
+
+
+def test_reader_range(captured_path: Path):
+    sensors = Sensor["PMSx003"], Sensor["MCU680"]
+    with MultiMessageReader(captured_path, sensors) as reader:
+        times = sorted({obs.time for _, obs in reader()})
+    start, end = times[1], times[-1]
+
+    with MultiMessageReader(captured_path, sensors, start=start, end=end) as reader:
+        expected = list(reader())
+    assert expected
+
+    with ParallelMessageReader(
+        captured_path, sensors, start=start, end=end, chunk_size=128
+    ) as reader:
+        assert list(reader()) == expected
+
+
+def test_reader_samples(captured_path: Path):
+    with ParallelMessageReader(captured_path, samples=3, chunk_size=128) as reader:
+        assert len(list(reader())) == 3
+
+
+def test_closed(captured_path: Path):
+    assert list(ParallelMessageReader(captured_path)()) == []
+
+
+@pytest.mark.parametrize("name", ("pypms.csv", "pypms.csv.gz", "pypms.pmscap"))
+def test_reader_partitions(tmp_path: Path, name: str):
+    with PartitionWriter(tmp_path, name) as writer:
+        write_captured_data(writer)
+
+    for sensor in Sensor:
+        with MultiMessageReader(CAPTURED_DATA, [sensor]) as reader:
+            expected = list(reader())
+
+        with ParallelMessageReader(tmp_path, [sensor], workers=2, chunk_size=128) as reader:
+            assert len(reader.files()) == len({day(obs.time) for _, obs in expected})
+            assert list(reader()) == expected
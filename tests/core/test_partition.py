@@ -0,0 +1,59 @@
+from csv import DictReader
+from pathlib import Path
+
+import pytest
+
+from pms.core.partition import PartitionWriter, day, partitions
+from pms.core.reader import MessageReader, MultiMessageReader
+from pms.core.sensor import Sensor
+from tests.conftest import CAPTURED_DATA, write_captured_data
+
+
+@pytest.fixture(params=["pypms.csv", "pypms.csv.gz", "pypms.pmscap"])
+def root(request: pytest.FixtureRequest, tmp_path: Path) -> Path:
+    with PartitionWriter(tmp_path, request.param) as writer:
+        write_captured_data(writer)
+    return tmp_path
+
+
+def test_layout(root: Path):
+    with CAPTURED_DATA.open() as csv:
+        expected = {(row["sensor"], f"{day(int(row['time'])):%F}") for row in DictReader(csv)}
+
+    found = {
+        (path.parent.parent.name, path.parent.name)
+        for path in partitions(root, {sensor for sensor, _ in expected})
+    }
+    assert found == {(f"sensor={sensor}", f"date={date}") for sensor, date in expected}
+
+
+def test_reader(root: Path):
+    def key(sensor_obs):
+        sensor, obs = sensor_obs
+        return obs.time, sensor.name
+
+    # messages from many sensors are replayed on time order
+    with MultiMessageReader(root) as reader:
+        obs = list(reader())
+    with MultiMessageReader(CAPTURED_DATA) as reader:
+        assert obs == sorted(reader(), key=key)
+
+
+def test_reader_range(root: Path):
+    sensor = Sensor["PMSx003"]
+    with MessageReader(CAPTURED_DATA, sensor) as reader:
+        times = [obs.time for obs in reader()]
+    start, end = times[2], times[-2]
+
+    with MessageReader(CAPTURED_DATA, sensor, start=start, end=end) as reader:
+        expected = list(reader())
+    with MessageReader(root, sensor, start=start, end=end) as reader:
+        assert list(reader()) == expected
+
+    # only partitions on the time range
+    assert partitions(root, [sensor.name], end=start - 86_400 * 2) == []
+
+
+def test_follow(root: Path):
+    with pytest.raises(ValueError):
+        MessageReader(root, Sensor["PMSx003"], follow=True).open()
@@ -0,0 +1,98 @@
+import pytest
+
+from pms.core.schedule import ReplayClock, Schedule
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """fake monotonic and wall clocks, wall clock 0.25 sec past a boundary"""
+
+    class Clock:
+        monotonic = 100.0
+        wall = 1_567_201_800.25
+
+        def sleep(self, seconds: float):
+            self.monotonic += seconds
+            self.wall += seconds
+
+    clock = Clock()
+    monkeypatch.setattr("pms.core.schedule.time.monotonic", lambda: clock.monotonic)
+    monkeypatch.setattr("pms.core.schedule.time.time", lambda: clock.wall)
+    return clock
+
+
+def test_no_interval(clock):
+    schedule = Schedule()
+    for _ in range(3):
+        assert schedule.delay() == 0
+        clock.sleep(1.5)  # read sensor
+        schedule.advance()
+    assert schedule.missed == 0
+
+
+def test_drift_free(clock):
+    schedule = Schedule(10)
+    deadlines = []
+    for _ in range(5):
+        clock.sleep(schedule.delay())
+        deadlines.append(clock.monotonic)
+        clock.sleep(1.3)  # read sensor
+        schedule.advance()
+
+    assert deadlines == [100, 110, 120, 130, 140]
+    assert schedule.missed == 0
+
+
+def test_align(clock):
+    schedule = Schedule(60, align=True)
+    assert schedule.delay() == pytest.approx(59.75)
+
+    deadlines = []
+    for _ in range(3):
+        clock.sleep(schedule.delay())
+        deadlines.append(clock.wall)
+        clock.sleep(1.3)  # read sensor
+        schedule.advance()
+
+    assert deadlines == pytest.approx([1_567_201_860, 1_567_201_920, 1_567_201_980])
+
+
+def test_align_wall_clock_adjustment(clock):
+    schedule = Schedule(60, align=True)
+    clock.sleep(schedule.delay())
+    clock.wall += 2  # wall clock stepped forward
+    schedule.advance()
+
+    clock.sleep(schedule.delay())
+    assert clock.wall == pytest.approx(1_567_201_920)
+    assert schedule.missed == 0
+
+
+def test_missed(clock):
+    schedule = Schedule(10)
+    clock.sleep(25)  # slow read
+    schedule.advance()
+
+    assert schedule.missed == 2
+    assert schedule.delay() == pytest.approx(5)
+
+
+@pytest.mark.parametrize("speed", (1, 10, 1000))
+def test_replay_pace(clock, speed: float):
+    replay = ReplayClock(speed)
+    start = clock.monotonic
+    for recorded in range(1000, 1100, 20):
+        clock.sleep(replay.delay(recorded))
+        assert clock.monotonic == pytest.approx(start + (recorded - 1000) / speed)
+    assert replay.max_lag == 0
+
+
+def test_replay_lag(clock):
+    replay = ReplayClock(10)
+    assert replay.delay(1000) == 0
+    clock.sleep(5)  # slow consumer, message at 1010 was due after 1 sec
+    assert replay.delay(1010) == 0
+    assert replay.lag == pytest.approx(4)
+    assert replay.delay(1060) == pytest.approx(1)  # catch up
+    assert replay.lag == 0
+    assert replay.max_lag == pytest.approx(4)
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import json
 from collections.abc import Iterator
+from contextlib import closing
+from pathlib import Path
+from sqlite3 import connect
 from typing import TYPE_CHECKING, NamedTuple
 
 if TYPE_CHECKING:
@@ -12,6 +16,7 @@ from typer.testing import CliRunner
 
 from pms.core.types import ObsData
 from pms.extra.cli import db_measurements, mqtt_messages
+from pms.extra.outbox import Outbox
 from pms.main import main
 
 runner = CliRunner()
@@ -31,15 +36,30 @@ class Message(NamedTuple):
                 yield cls(f"homie/test/{topic}", payload)
 
 
+class MessageInfo:
+    def wait_for_publish(self, timeout: float | None = None):
+        pass
+
+    def is_published(self) -> bool:
+        return True
+
+
 @pytest.fixture()
 def mock_mqtt_client(captured_data, monkeypatch: pytest.MonkeyPatch):
     class MockClient:
         _message = Message.from_obs(captured_data.obs)
+        _data_point = DataPoint.from_obs(captured_data.obs)
         on_message = None
         on_connect = None
+        qos = 1  # expected on observation messages
+        retain = True
+        compact_fields: list[str] = []
+        disconnected = 0
 
         def __init__(self, *, client_id: str):
-            assert client_id in {"homie/test", "homie/+/+/+"}
+            assert client_id in {"homie/test", "homie/test/backfill", "homie/+/+/+"}
+            self.client_id = client_id
+            self.will = False
 
         def enable_logger(self, logger: Logger | None = None):
             assert logger is None
@@ -52,6 +72,7 @@ def mock_mqtt_client(captured_data, monkeypatch: pytest.MonkeyPatch):
             assert payload == "false"
             assert qos == 1
             assert retain is True
+            self.will = True
 
         def connect(self, host, port=1883):
             assert host == "test.mosquitto.org"
@@ -59,18 +80,56 @@ def mock_mqtt_client(captured_data, monkeypatch: pytest.MonkeyPatch):
 
         def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
             logger.debug(f"{topic} = {payload}")
+            if topic == "homie/test/backfill":  # many observations on a single message
+                assert qos == 1
+                assert retain is False
+                for values in json.loads(payload):
+                    time = values.pop("time")
+                    for name, value in values.items():
+                        assert DataPoint(time, name, value) == next(self._data_point)
+                return MessageInfo()
             assert topic.startswith("homie/test/")
             assert isinstance(payload, (str, float, int))
-            assert qos == 1
-            assert retain is True
-            if isinstance(payload, (float, int)):
+            assert qos == self.qos
+            if topic.rsplit("/", 1)[-1].startswith("$"):  # metadata
+                assert retain is True
+            else:
+                assert retain is self.retain
+            if topic == "homie/test/json":  # --payload json
+                values = json.loads(payload)
+                time = values.pop("time")
+                for name, value in values.items():
+                    assert DataPoint(time, name, value) == next(self._data_point)
+            elif topic == "homie/test/compact/$fields":  # --payload compact
+                self.compact_fields[:] = payload.split(",")
+            elif topic == "homie/test/compact":
+                time, *values = map(float, payload.split(","))
+                assert self.compact_fields[0] == "time"
+                for name, value in zip(self.compact_fields[1:], values, strict=True):
+                    assert DataPoint(int(time), name, value) == next(self._data_point)
+            elif isinstance(payload, (float, int)):
                 assert Message(topic, payload) == next(self._message)
+            return MessageInfo()
+
+        def is_connected(self) -> bool:
+            return True
 
         def loop_start(self):
             logger.debug("loop_start")
-            assert self.on_connect is not None
+            if self.client_id == "homie/test/backfill":  # not announced as online
+                assert self.on_connect is None
+                assert not self.will
+            else:
+                assert self.on_connect is not None
             assert self.on_message is None
 
+        def disconnect(self):
+            logger.debug("disconnect")
+            type(self).disconnected += 1
+
+        def loop_stop(self):
+            logger.debug("loop_stop")
+
         def loop_forever(self, timeout=1, retry_first_connection=False):
             logger.debug("loop_forever")
             assert self.on_connect is not None
@@ -80,6 +139,7 @@ def mock_mqtt_client(captured_data, monkeypatch: pytest.MonkeyPatch):
 
     mqtt = pytest.importorskip("pms.extra.mqtt")
     monkeypatch.setattr(mqtt, "Client", MockClient)
+    return MockClient
 
 
 class DataPoint(NamedTuple):
@@ -103,7 +163,14 @@ def mock_influxdb_client(captured_data, monkeypatch: pytest.MonkeyPatch):
         data_point = DataPoint.from_obs(captured_data.obs)
 
         def __init__(
-            self, host="localhost", port=8086, username="root", password="root", database=None
+            self,
+            host="localhost",
+            port=8086,
+            username="root",
+            password="root",
+            database=None,
+            *,
+            gzip=False,
         ):
             assert (host, port, username, password) == ("influxdb", 8086, "root", "root")
             assert database is None
@@ -126,6 +193,10 @@ def mock_influxdb_client(captured_data, monkeypatch: pytest.MonkeyPatch):
                 assert isinstance(point, dict)
                 assert point.keys() == {"measurement", "tags", "time", "fields"}
                 assert isinstance(point["fields"], dict)
+                if point["measurement"] == captured_data.name:  # --multi-field
+                    for name, value in point["fields"].items():
+                        assert DataPoint(point["time"], name, value) == next(self.data_point)
+                    continue
                 assert point["fields"].keys() == {"value"}
                 assert DataPoint(
                     point["time"], point["measurement"], point["fields"]["value"]
@@ -153,13 +224,145 @@ def test_mqtt(capture):
     assert result.exit_code == 0
 
 
+@pytest.mark.parametrize(
+    "payload,qos,retain",
+    [
+        pytest.param("homie", "0", "--no-retain", id="homie"),
+        pytest.param("json", "1", "--retain", id="json"),
+        pytest.param("compact", "2", "--no-retain", id="compact"),
+    ],
+)
+def test_mqtt_payload(capture, mock_mqtt_client, payload: str, qos: str, retain: str):
+    mock_mqtt_client.qos = int(qos)
+    mock_mqtt_client.retain = retain == "--retain"
+    options = capture.options("mqtt") + ["--payload", payload, "--qos", qos, retain]
+    result = runner.invoke(main, options)
+    assert result.exit_code == 0
+
+
+def test_mqtt_compact_no_retain(capture, mock_mqtt_client):
+    mock_mqtt_client.retain = False
+    options = capture.options("mqtt") + ["--payload", "compact", "--no-retain"]
+    result = runner.invoke(main, options)
+    assert result.exit_code == 0
+    # field names were published (and retained), so late subscribers can decode the messages
+    assert mock_mqtt_client.compact_fields[0] == "time"
+
+
+def pending(path: Path) -> int:
+    """observations left on the outbox"""
+
+    def send(items: list[dict]) -> None:
+        raise ConnectionError("server down")
+
+    with Outbox(path, send) as outbox:
+        return outbox.pending
+
+
+@pytest.mark.usefixtures("mock_mqtt_client")
+def test_mqtt_outbox(capture, tmp_path: Path):
+    result = runner.invoke(main, capture.options("mqtt") + ["--outbox", str(tmp_path)])
+    assert result.exit_code == 0
+    assert pending(tmp_path) == 0
+
+
 @pytest.mark.usefixtures("mock_influxdb_client")
 def test_influxdb(capture):
     result = runner.invoke(main, capture.options("influxdb"))
     assert result.exit_code == 0
 
 
+@pytest.mark.usefixtures("mock_influxdb_client")
+def test_influxdb_outbox(capture, tmp_path: Path):
+    result = runner.invoke(main, capture.options("influxdb") + ["--outbox", str(tmp_path)])
+    assert result.exit_code == 0
+    assert pending(tmp_path) == 0
+
+
+@pytest.mark.usefixtures("mock_influxdb_client")
+def test_influxdb_outbox_batch(capture, tmp_path: Path):
+    options = ["--outbox", str(tmp_path), "--batch-size", "2", "--flush-interval", "0.1"]
+    result = runner.invoke(main, capture.options("influxdb") + options)
+    assert result.exit_code == 0
+    assert pending(tmp_path) == 0
+
+
 @pytest.mark.usefixtures("mock_influxdb_client", "mock_mqtt_client", "mock_mqtt_time")
 def test_bridge(capture):
     result = runner.invoke(main, capture.options("bridge"))
     assert result.exit_code == 0
+
+
+@pytest.fixture
+def captured(capture) -> Iterator[str]:
+    """capture file from `pms csv --capture`"""
+    result = runner.invoke(main, capture.options("capture"))
+    assert result.exit_code == 0
+    path = Path(capture.options("capture")[-1])
+    yield str(path)
+    path.unlink()
+
+
+def test_backfill_mqtt(capture, captured: str, mock_mqtt_client):
+    result = runner.invoke(
+        main, capture.options("backfill") + ["--sink", "mqtt", "-b", "3", captured]
+    )
+    assert result.exit_code == 0
+    assert mock_mqtt_client.disconnected == -(-len(capture.value) // 3)  # once per batch
+
+
+@pytest.mark.usefixtures("mock_influxdb_client")
+def test_backfill_influxdb(capture, captured: str):
+    result = runner.invoke(
+        main, capture.options("backfill") + ["--sink", "influxdb", "-b", "3", captured]
+    )
+    assert result.exit_code == 0
+
+
+def test_backfill_sqlite(capture, captured: str, tmp_path: Path):
+    db = tmp_path / "pypms.sqlite"
+    options = capture.options("backfill") + ["--sqlite-db", str(db), "-b", "3"]
+    for _ in range(2):  # already backfilled observations are ignored
+        result = runner.invoke(main, options + [captured, captured])
+        assert result.exit_code == 0
+
+    with closing(connect(db)) as con:
+        rows = con.execute(f'SELECT * FROM "{capture}" ORDER BY time').fetchall()
+    expected = [(obs.time, *dict(db_measurements(obs)).values()) for obs in capture.obs]
+    assert rows == sorted(expected)
+
+
+@pytest.fixture()
+def checked_background(monkeypatch: pytest.MonkeyPatch):
+    """mock client assertions fail on the background, as failed writes"""
+    influxdb = pytest.importorskip("pms.extra.influxdb")
+    close = influxdb.BackgroundPublisher.close
+
+    def checked_close(self):
+        close(self)
+        assert self.sent > 0
+        assert self.failed == 0
+
+    monkeypatch.setattr(influxdb.BackgroundPublisher, "close", checked_close)
+
+
+@pytest.mark.usefixtures("mock_influxdb_client", "checked_background")
+def test_influxdb_batch(capture):
+    options = capture.options("influxdb") + ["--batch-size", "4", "--flush-interval", "0.1"]
+    result = runner.invoke(main, options)
+    assert result.exit_code == 0
+
+
+@pytest.mark.parametrize("batch_size", ("1", "4"))
+@pytest.mark.usefixtures("mock_influxdb_client", "checked_background")
+def test_influxdb_multi_field(capture, batch_size: str):
+    options = capture.options("influxdb") + ["--multi-field", "--batch-size", batch_size]
+    result = runner.invoke(main, options)
+    assert result.exit_code == 0
+
+
+@pytest.mark.usefixtures("mock_influxdb_client")
+def test_backfill_influxdb_multi_field(capture, captured: str):
+    options = capture.options("backfill") + ["--sink", "influxdb", "--multi-field", captured]
+    result = runner.invoke(main, options)
+    assert result.exit_code == 0
@@ -0,0 +1,120 @@
+import time
+from threading import Event, Lock
+
+import pytest
+
+influxdb = pytest.importorskip("pms.extra.influxdb")
+
+
+class MockClient:
+    """record written batches, optionally wait for `release` before returning"""
+
+    def __init__(self, *args, **kwargs):
+        self.batches: list[list[dict]] = []
+        self.release = Event()
+        self.release.set()
+        self.writing = 0
+        self.max_writing = 0
+        self.fail = False
+        self.lock = Lock()
+
+    def get_list_database(self):
+        return [{"name": "homie"}]
+
+    def switch_database(self, database):
+        assert database == "homie"
+
+    def write_points(self, points, time_precision=None):
+        assert time_precision == "s"
+        with self.lock:
+            self.writing += 1
+            self.max_writing = max(self.max_writing, self.writing)
+        self.release.wait(5)
+        with self.lock:
+            self.writing -= 1
+            if self.fail:
+                raise ConnectionError("server down")
+            self.batches.append(points)
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> MockClient:
+    client = MockClient()
+    monkeypatch.setattr(influxdb, "Client", lambda *args, **kwargs: client)
+    return client
+
+
+def publisher(**kwargs):
+    return influxdb.BackgroundPublisher(
+        host="influxdb", port=8086, username="root", password="root", db_name="homie", **kwargs
+    )
+
+
+def publish(pub, n: int) -> None:
+    for secs in range(n):
+        pub(time=secs, tags={"location": "test"}, data={"pm25": secs})
+
+
+def test_batch_size(client: MockClient):
+    with publisher(batch_size=3, flush_interval=60) as pub:
+        publish(pub, 7)
+    assert [len(batch) for batch in client.batches] == [3, 3, 1]  # rest flushed on close
+    assert [point["time"] for batch in client.batches for point in batch] == list(range(7))
+    assert (pub.sent, pub.batches, pub.dropped, pub.failed) == (7, 3, 0, 0)
+    assert pub.queue_depth == 0
+
+
+def test_flush_interval(client: MockClient):
+    with publisher(batch_size=100, flush_interval=0.05) as pub:
+        publish(pub, 2)
+        time.sleep(0.5)
+        assert [len(batch) for batch in client.batches] == [2]
+    assert pub.max_flush_latency >= pub.flush_latency >= 0
+
+
+def test_concurrency(client: MockClient):
+    client.release.clear()
+    with publisher(batch_size=1, flush_interval=0, concurrency=2) as pub:
+        publish(pub, 6)
+        time.sleep(0.2)
+        assert client.writing == 2  # the other batches wait
+        client.release.set()
+    assert client.max_writing == 2
+    assert pub.sent == 6
+
+
+def test_queue_full(client: MockClient):
+    client.release.clear()
+    with publisher(batch_size=1, flush_interval=0, concurrency=1, max_queue=2) as pub:
+        publish(pub, 1)
+        time.sleep(0.2)  # 1st point on write, the 2nd waits for a free slot
+        publish(pub, 5)
+        assert pub.dropped > 0
+        client.release.set()
+    assert pub.sent + pub.dropped == 6
+
+
+def test_failed(client: MockClient):
+    client.fail = True
+    with publisher(batch_size=2) as pub:
+        publish(pub, 3)
+    assert (pub.sent, pub.failed) == (0, 3)
+
+
+def test_points():
+    data = {"pm01": 1, "pm25": 2, "pm10": 3}
+    tags = {"location": "test"}
+    assert influxdb.points(tags, 10, data) == [
+        {"measurement": name, "tags": tags, "time": 10, "fields": {"value": value}}
+        for name, value in data.items()
+    ]
+    assert influxdb.points(tags, 10, data, "PMSx003") == [
+        {"measurement": "PMSx003", "tags": tags, "time": 10, "fields": data}
+    ]
+
+
+def test_multi_field(client: MockClient):
+    with publisher(batch_size=2, measurement="PMSx003") as pub:
+        publish(pub, 3)
+    assert [len(batch) for batch in client.batches] == [2, 1]  # one point per observation
+    assert {point["measurement"] for batch in client.batches for point in batch} == {"PMSx003"}
@@ -0,0 +1,254 @@
+import gzip
+import json
+import time
+from base64 import b64encode
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from pms.extra import influxdb
+from pms.extra.line_protocol import Client, InfluxDBError, line
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    params: dict[str, str]
+    headers: dict[str, str]
+    body: str
+    client_port: int
+
+
+class Server(ThreadingHTTPServer):
+    """stand-in InfluxDB server, records the requests"""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.requests: list[Request] = []
+        self.databases = ["_internal"]
+        self.status = 204
+        self.close_after = 0  # close the connection after N requests, 0 for keep-alive
+        self.stall = 0  # do not answer the next N writes on time
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: Server
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.record()
+        values = [[name] for name in self.server.databases]
+        self.reply(200, {"results": [{"series": [{"name": "databases", "values": values}]}]})
+
+    def do_POST(self):
+        request = self.record()
+        if request.path == "/query":
+            self.server.databases.append(request.params["q"].split('"')[1])
+            self.reply(200, {"results": [{}]})
+        elif self.server.stall:
+            self.server.stall -= 1
+            time.sleep(0.5)
+        elif self.server.status >= 300:
+            self.reply(self.server.status, {"error": "database not found"})
+        else:
+            self.reply(self.server.status)
+
+    def record(self) -> Request:
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        request = Request(
+            self.command,
+            url.path,
+            {k: v[0] for k, v in parse_qs(url.query).items()},
+            dict(self.headers),
+            body.decode(),
+            self.client_address[1],
+        )
+        self.server.requests.append(request)
+        return request
+
+    def reply(self, status: int, data: dict | None = None):
+        body = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.close_after and len(self.server.requests) % self.server.close_after == 0:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server() -> Iterator[Server]:
+    server = Server()
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def point(measurement: str, fields: dict, time: int | None = 1_567_201_793, **tags) -> dict:
+    return {"measurement": measurement, "tags": tags, "time": time, "fields": fields}
+
+
+@pytest.mark.parametrize(
+    "point,text",
+    [
+        pytest.param(
+            point("pm25", {"value": 10}, location="test"),
+            "pm25,location=test value=10i 1567201793",
+            id="int",
+        ),
+        pytest.param(point("temp", {"value": 21.5}), "temp value=21.5 1567201793", id="float"),
+        pytest.param(
+            point("PMSx003", {"pm01": 5, "pm25": 10, "pm10": 27}, room="b", location="a"),
+            "PMSx003,location=a,room=b pm01=5i,pm25=10i,pm10=27i 1567201793",
+            id="multi-field",
+        ),
+        pytest.param(
+            {
+                "measurement": "a b,c",
+                "tags": {"t k": "v,w=x"},  # not a valid keyword for `point`
+                "time": 1_567_201_793,
+                "fields": {"k=y": True, "s": 'say "hi"'},
+            },
+            'a\\ b\\,c,t\\ k=v\\,w\\=x k\\=y=true,s="say \\"hi\\"" 1567201793',
+            id="escape",
+        ),
+        pytest.param(point("pm25", {"value": 10}, time=None), "pm25 value=10i", id="no time"),
+        pytest.param(
+            point("temp", {"value": float("nan"), "rhum": 50.0}),
+            "temp rhum=50.0 1567201793",
+            id="nan",
+        ),
+        pytest.param(point("temp", {"value": float("inf")}), None, id="no fields"),
+    ],
+)
+def test_line(point: dict, text: str | None):
+    assert line(point) == text
+
+
+def test_create_database(server: Server):
+    client = Client("127.0.0.1", server.port, "user", "pass")
+    assert client.get_list_database() == [{"name": "_internal"}]
+    client.create_database("homie")
+    assert client.get_list_database() == [{"name": "_internal"}, {"name": "homie"}]
+
+    auth = b64encode(b"user:pass").decode()
+    assert {request.headers["Authorization"] for request in server.requests} == {f"Basic {auth}"}
+    assert server.requests[1].params == {"q": 'CREATE DATABASE "homie"'}
+
+
+@pytest.mark.parametrize("compress", (False, True), ids=("plain", "gzip"))
+def test_write_points(server: Server, compress: bool):
+    client = Client("127.0.0.1", server.port, database="homie", gzip=compress)
+    points = [point("pm25", {"value": 10}), point("pm10", {"value": 27})]
+    assert client.write_points(points, time_precision="s")
+
+    (request,) = server.requests
+    assert request.method == "POST"
+    assert request.path == "/write"
+    assert request.params == {"db": "homie", "precision": "s"}
+    assert request.body == "pm25 value=10i 1567201793\npm10 value=27i 1567201793"
+    assert ("Content-Encoding" in request.headers) is compress
+
+
+def test_write_nothing(server: Server):
+    client = Client("127.0.0.1", server.port, database="homie")
+    assert client.write_points([point("temp", {"value": float("nan")})])
+    assert not server.requests
+
+
+def test_keep_alive(server: Server):
+    client = Client("127.0.0.1", server.port, database="homie")
+    for n in range(5):
+        client.write_points([point("pm25", {"value": n})])
+    assert len(server.requests) == 5
+    assert len({request.client_port for request in server.requests}) == 1
+
+
+def test_reconnect(server: Server):
+    server.close_after = 2
+    client = Client("127.0.0.1", server.port, database="homie")
+    for n in range(6):
+        client.write_points([point("pm25", {"value": n})])
+    assert [request.body.split()[1] for request in server.requests] == [
+        f"value={n}i" for n in range(6)
+    ]
+    assert len({request.client_port for request in server.requests}) == 3
+
+
+def test_timeout(server: Server):
+    server.stall = 1
+    client = Client("127.0.0.1", server.port, database="homie", timeout=0.1)
+    client.write_points([point("pm25", {"value": 10})])
+    assert [request.body for request in server.requests] == ["pm25 value=10i 1567201793"] * 2
+
+    # give up after the second time out
+    server.stall = 2
+    with pytest.raises(TimeoutError):
+        client.write_points([point("pm25", {"value": 10})])
+    assert client._local.connection is None
+
+
+def test_error(server: Server):
+    server.status = 404
+    client = Client("127.0.0.1", server.port, database="homie")
+    with pytest.raises(InfluxDBError, match="404"):
+        client.write_points([point("pm25", {"value": 10})])
+
+
+@pytest.mark.parametrize("compress", (False, True), ids=("plain", "gzip"))
+def test_publisher(server: Server, compress: bool):
+    pub = influxdb.publisher(
+        host="127.0.0.1",
+        port=server.port,
+        username="root",
+        password="root",
+        db_name="homie",
+        gzip=compress,
+    )
+    pub(time=1_567_201_793, tags={"location": "test"}, data={"pm25": 10, "temp": 21.5})
+    assert "homie" in server.databases
+    request = server.requests[-1]
+    assert request.params == {"db": "homie", "precision": "s"}
+    assert request.body == (
+        "pm25,location=test value=10i 1567201793\ntemp,location=test value=21.5 1567201793"
+    )
+
+
+def test_background_publisher(server: Server):
+    with influxdb.BackgroundPublisher(
+        host="127.0.0.1",
+        port=server.port,
+        username="root",
+        password="root",
+        db_name="homie",
+        measurement="PMSx003",
+        gzip=True,
+        batch_size=3,
+        flush_interval=0.1,
+    ) as pub:
+        for n in range(7):
+            pub(time=n, tags={}, data={"pm25": n})
+    assert (pub.sent, pub.failed) == (7, 0)
+    writes = [request.body for request in server.requests if request.path == "/write"]
+    # batches can be written on any order
+    assert sorted("\n".join(writes).splitlines()) == [f"PMSx003 pm25={n}i {n}" for n in range(7)]
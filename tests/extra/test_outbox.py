@@ -0,0 +1,143 @@
+import time
+from pathlib import Path
+from threading import Lock
+
+from pms.extra.outbox import Outbox
+
+
+class Sink:
+    """record published batches, fail while `down`"""
+
+    def __init__(self, down: bool = False, delay: float = 0):
+        self.down = down
+        self.delay = delay
+        self.batches: list[list[dict]] = []
+        self.lock = Lock()
+
+    def __call__(self, items: list[dict]) -> None:
+        time.sleep(self.delay)
+        if self.down:
+            raise ConnectionError("server down")
+        with self.lock:
+            self.batches.append(items)
+
+    @property
+    def items(self) -> list[dict]:
+        with self.lock:
+            return [item for batch in self.batches for item in batch]
+
+
+def wait_until_empty(outbox: Outbox, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while outbox.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert outbox.pending == 0
+
+
+def stored(path: Path) -> list[Path]:
+    return sorted(path.glob("*.jsonl"))
+
+
+def test_publish(tmp_path: Path):
+    sink = Sink()
+    with Outbox(tmp_path, sink) as outbox:
+        for n in range(3):
+            outbox(time=n, data={"pm25": n})
+    assert sink.items == [{"time": n, "data": {"pm25": n}} for n in range(3)]
+    assert (outbox.stored, outbox.replayed, outbox.pending) == (3, 3, 0)
+
+    with Outbox(tmp_path, sink) as outbox:
+        assert outbox.pending == 0
+
+
+def test_slow_sink(tmp_path: Path):
+    sink = Sink(delay=0.2)
+    start = time.monotonic()
+    with Outbox(tmp_path, sink) as outbox:
+        for n in range(5):
+            outbox(time=n)
+        assert time.monotonic() - start < 0.1  # the caller is never blocked by the sink
+        wait_until_empty(outbox)
+    assert sink.items == [{"time": n} for n in range(5)]
+
+
+def test_flush_interval(tmp_path: Path):
+    sink = Sink()
+    with Outbox(tmp_path, sink, batch_size=3, flush_interval=0.2) as outbox:
+        for n in range(4):
+            outbox(time=n)
+        time.sleep(0.1)
+        assert [len(batch) for batch in sink.batches] == [3]  # full batch
+        wait_until_empty(outbox)
+    assert [len(batch) for batch in sink.batches] == [3, 1]  # flush interval
+
+
+def test_outage(tmp_path: Path):
+    sink = Sink(down=True)
+    with Outbox(tmp_path, sink, batch_size=4, retry=0.05) as outbox:
+        for n in range(5):
+            outbox(time=n)
+        assert outbox.pending == 5
+        assert stored(tmp_path)
+
+        sink.down = False
+        outbox(time=5)  # older observations are published first
+        wait_until_empty(outbox)
+        outbox(time=6)
+
+    assert max(len(batch) for batch in sink.batches) == 4
+    assert sink.items == [{"time": n} for n in range(7)]
+    assert (outbox.stored, outbox.replayed) == (7, 7)
+
+
+def test_restart(tmp_path: Path):
+    with Outbox(tmp_path, Sink(down=True)) as outbox:
+        for n in range(5):
+            outbox(time=n)
+    assert outbox.pending == 5
+
+    sink = Sink()
+    with Outbox(tmp_path, sink, batch_size=2) as outbox:
+        assert outbox.pending == 5
+        wait_until_empty(outbox)
+    assert sink.items == [{"time": n} for n in range(5)]
+    assert (tmp_path / "cursor").read_text().split()[1] != "0"
+
+    with Outbox(tmp_path, sink) as outbox:
+        assert outbox.pending == 0
+
+
+def test_segments(tmp_path: Path):
+    sink = Sink(down=True)
+    with Outbox(tmp_path, sink, batch_size=3, retry=0.05, segment_size=20) as outbox:
+        for n in range(10):
+            outbox(time=n)
+        assert len(stored(tmp_path)) == 5
+
+        sink.down = False
+        wait_until_empty(outbox)
+        outbox(time=10)
+
+    assert sink.items == [{"time": n} for n in range(11)]
+    assert len(stored(tmp_path)) == 1  # published segments are deleted
+
+
+def test_max_rate(tmp_path: Path):
+    with Outbox(tmp_path, Sink(down=True)) as outbox:
+        for n in range(6):
+            outbox(time=n)
+
+    sink = Sink()
+    start = time.monotonic()
+    with Outbox(tmp_path, sink, batch_size=2, max_rate=20) as outbox:
+        wait_until_empty(outbox)
+    assert time.monotonic() - start >= 0.2  # 3 batches of 2 observations, at 20 obs/sec
+    assert sink.items == [{"time": n} for n in range(6)]
+
+
+def test_incomplete_line(tmp_path: Path):
+    (tmp_path / "00000000.jsonl").write_text('{"time": 0}\n{"time": 1}\n{"ti')
+    sink = Sink()
+    with Outbox(tmp_path, sink) as outbox:
+        wait_until_empty(outbox)
+    assert sink.items == [{"time": 0}, {"time": 1}]
@@ -0,0 +1,24 @@
+from pms.core import Sensor
+from pms.sensors.base import _struct
+
+
+def test_decode_cache(captured_data, number: int = 100):
+    sensor = Sensor[captured_data.name]
+    messages = tuple(captured_data.raw_message)
+    check_signature = sensor.Message._check_signature  # type: ignore[attr-defined]
+    check_signature.cache_clear()
+    _struct.cache_clear()
+
+    for _ in range(number):
+        for message in messages:
+            sensor.decode(message, time=1_567_201_793)
+
+    # message signature is only checked once per message layout
+    info = check_signature.cache_info()
+    assert info.misses <= len(messages)
+    assert info.hits + info.misses >= number * len(messages)
+
+    # payload formats are only compiled once per message layout
+    info = _struct.cache_info()
+    assert info.misses <= len(messages)
+    assert info.hits >= (number - 1) * len(messages)
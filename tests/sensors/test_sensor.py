@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from collections.abc import Iterator
+from dataclasses import astuple
 from enum import Enum
 from typing import NamedTuple
 
@@ -42,6 +43,11 @@ def test_pre_heat(sensor: Sensor):
     assert sensor.pre_heat == pre_heat
 
 
+def test_active_mode(sensor: Sensor):
+    active_mode = sensor.name not in {"HPMA115S0", "HPMA115C0", "SPS30", "MHZ19B", "ZH0xx"}
+    assert sensor.active_mode == active_mode
+
+
 @pytest.mark.parametrize("sensor", [Sensor["HPMA115S0"], Sensor["HPMA115C0"]])
 @pytest.mark.parametrize("command", ["passive_mode", "wake"])
 @pytest.mark.parametrize(
@@ -277,3 +283,44 @@ def test_command(sensor, command, hex, length):
     cmd = Sensor[sensor].command(command)
     assert cmd.command == bytes.fromhex(hex)
     assert cmd.answer_length == length
+
+
+@pytest.mark.parametrize("sensor,msg,raw", GoodData.test_param())
+def test_decode_many(sensor, msg, raw, secs=1567201793):
+    pytest.importorskip("numpy")
+    obs = Sensor[sensor].decode_many([msg] * 3, [secs] * 3)
+    assert obs.shape == (3,)
+    assert obs.tolist() == [astuple(Sensor[sensor].decode(msg, time=secs))] * 3
+
+
+@pytest.mark.parametrize(
+    "sensor,hex",
+    [
+        pytest.param("PMSx003", "424d001c0005000d0016", id="PMSx003 short message"),
+        pytest.param(
+            "PMSx003",
+            "424d001c0005000d00160005000d001602fd00fc001d000f0006000697000000",
+            id="PMSx003 wrong checksum",
+        ),
+        pytest.param(
+            "PMSx003",
+            "424d001c0000000a00200000000a002000000000000000000000000097000196",
+            id="PMSx003 inconsistent obs",
+        ),
+        pytest.param("SDS01x", "AAC0D4043A0AA1601DAA", id="SDS01x wrong tail"),
+        pytest.param("SDS01x", "AAC000000000000000AB", id="SDS01x empty message"),
+        pytest.param("HPMA115S0", "40050400000000B7", id="HPMA115S0 empty message"),
+        pytest.param("MCU680", "5A5A3F0F0835198A01885430D200032BE1004A00", id="MCU680 checksum"),
+        pytest.param("MHZ19B", "FF8701F40000000084", id="MHZ19B wrong header"),
+        pytest.param(
+            "SPS30",
+            "7E0003002800000000000000000000000000000000000000000000000000000000000000000000000000000000D47E",
+            id="SPS30 empty message",
+        ),
+    ],
+)
+def test_decode_many_error(sensor: str, hex: str, secs=1567201793):
+    pytest.importorskip("numpy")
+    good = GoodData[sensor].msg
+    obs = Sensor[sensor].decode_many([good, bytes.fromhex(hex), good], [secs, secs + 1, secs + 2])
+    assert obs["time"].tolist() == [secs, secs + 2]
@@ -8,7 +8,10 @@ from loguru import logger
 from typer.testing import CliRunner
 
 from pms import __version__
+from pms.core.reader import MessageReader, MultiMessageReader, SensorReader
+from pms.core.sensor import Sensor
 from pms.main import main
+from tests.conftest import CAPTURED_DATA
 
 runner = CliRunner()
 
@@ -86,3 +89,152 @@ def test_capture_decode(capture, caplog: pytest.LogCaptureFixture):
     logs = caplog.text.splitlines()
     assert logs[0].endswith(f"PyPMS v{__version__}")
     assert logs[1].endswith(f"{capture} ... serial")
+
+
+def test_capture_decode_binary(capture, caplog: pytest.LogCaptureFixture):
+    path = Path(f"{capture}_pypms.pmscap")
+    options = capture.options("capture")
+    result = runner.invoke(main, options[:-1] + [str(path)])
+    assert result.exit_code == 0
+    assert path.exists()
+
+    options = capture.options("decode")
+    result = runner.invoke(main, options[:-1] + [str(path)])
+    path.unlink()
+    Path(f"{path}.idx").unlink()
+    assert result.exit_code == 0
+    assert result.output == capture.output("csv")
+
+
+@pytest.mark.parametrize("suffix", ("csv.gz", "csv.xz"))
+def test_capture_decode_compressed(capture, suffix: str):
+    path = Path(f"{capture}_pypms.{suffix}")
+    options = capture.options("capture")
+    result = runner.invoke(main, options[:-1] + [str(path)])
+    assert result.exit_code == 0
+
+    options = capture.options("decode")
+    result = runner.invoke(main, options[:-1] + [str(path)])
+    path.unlink()
+    assert result.exit_code == 0
+    assert result.output == capture.output("csv")
+
+
+@pytest.mark.parametrize("suffix", ("csv", "csv.gz", "pmscap"))
+def test_capture_decode_parallel(capture, suffix: str):
+    path = Path(f"{capture}_pypms.{suffix}")
+    options = capture.options("capture")
+    result = runner.invoke(main, options[:-1] + [str(path)])
+    assert result.exit_code == 0
+
+    options = capture.options("decode")
+    result = runner.invoke(main, options[:-5] + ["decode", "-f", "csv", "-w", "2", str(path)])
+    path.unlink()
+    Path(f"{path}.idx").unlink(missing_ok=True)
+    assert result.exit_code == 0
+    assert result.output == capture.output("csv")
+
+
+def test_capture_decode_follow(capture):
+    result = runner.invoke(main, capture.options("capture"))
+    assert result.exit_code == 0
+
+    result = runner.invoke(main, capture.options("decode") + ["--follow"])
+    Path(capture.options("capture")[-1]).unlink()
+    assert result.exit_code == 0
+    assert result.output == capture.output("csv")
+
+
+@pytest.mark.parametrize("suffix", ("csv", "pmscap"))
+def test_capture_follow(capture, suffix: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """a follower sees each message before the next one is read from the sensor"""
+    path = tmp_path / f"pypms.{suffix}"
+    path.touch()
+    follower = MessageReader(path, Sensor[capture.name], follow=True)
+    follower.open()
+    followed = follower(raw=True)
+
+    def sleep(delay: float):
+        raise AssertionError(f"last message not on {path}")
+
+    messages: list[bytes] = []
+    read = SensorReader._cmd
+
+    def _cmd(self, command: str) -> bytes:
+        if command == "passive_read" and messages:
+            assert next(followed).data == messages[-1]
+        message = read(self, command)
+        if command == "passive_read":
+            messages.append(message)
+        return message
+
+    monkeypatch.setattr("pms.core.reader.time.sleep", sleep)
+    monkeypatch.setattr("pms.core.reader.SensorReader._cmd", _cmd)
+    options = capture.options("capture")
+    result = runner.invoke(main, options[:-1] + [str(path)])
+    follower.close()
+    assert result.exit_code == 0
+    assert len(messages) == len(capture.value)
+
+
+def test_replay(capture):
+    result = runner.invoke(main, capture.options("capture"))
+    assert result.exit_code == 0
+    path = capture.options("capture")[-1]
+
+    options = capture.options("csv")
+    replay = ["--replay", path, "--speed", "1000"]
+    result = runner.invoke(main, options[:-3] + replay + options[-3:])
+    Path(path).unlink()
+    assert result.exit_code == 0
+
+    csv = Path(options[-1])
+    assert csv.read_text() == capture.output("csv")
+    csv.unlink()
+
+
+@pytest.mark.parametrize("suffix", ("csv", "csv.gz", "pmscap"))
+def test_captures_merge(tmp_path: Path, suffix: str):
+    header, *lines = CAPTURED_DATA.read_text().splitlines(keepends=True)
+    first, second = tmp_path / "first.csv", tmp_path / "second.csv"
+    first.write_text(header + "".join(lines[: len(lines) * 2 // 3]))
+    second.write_text(header + "".join(lines[len(lines) // 3 :]))
+
+    output = tmp_path / f"merged.{suffix}"
+    result = runner.invoke(main, ["captures", "merge", str(first), str(second), "-o", str(output)])
+    assert result.exit_code == 0
+
+    with MultiMessageReader(output) as reader:
+        merged = [f"{raw.time},{sensor},{raw.hex}\n" for sensor, raw in reader(raw=True)]
+    assert merged == sorted(lines, key=lambda line: (int(line.split(",")[0]), line.split(",")[1]))
+
+    # existing output
+    result = runner.invoke(main, ["captures", "merge", str(first), "-o", str(output)])
+    assert result.exit_code != 0
+    result = runner.invoke(main, ["captures", "merge", str(first), "-o", str(first), "--overwrite"])
+    assert result.exit_code != 0
+
+
+@pytest.mark.parametrize("new", (False, True), ids=("existing", "new"))
+def test_capture_decode_partition(capture, tmp_path: Path, new: bool):
+    if new:
+        tmp_path /= "captures"
+    options = capture.options("capture")
+    result = runner.invoke(main, options[:-1] + ["--partition", str(tmp_path)])
+    assert result.exit_code == 0
+    assert list(tmp_path.glob(f"sensor={capture}/date=*/pypms.csv"))
+
+    options = capture.options("decode")
+    result = runner.invoke(main, options[:-1] + [str(tmp_path)])
+    assert result.exit_code == 0
+    assert result.output == capture.output("csv")
+
+    options = capture.options("decode")
+    result = runner.invoke(main, options[:-5] + ["decode", "-f", "csv", "-w", "2", str(tmp_path)])
+    assert result.exit_code == 0
+    assert result.output == capture.output("csv")
+
+    # observations can not be partitioned
+    options = capture.options("csv")
+    result = runner.invoke(main, options[:-1] + ["--partition", str(tmp_path)])
+    assert result.exit_code != 0